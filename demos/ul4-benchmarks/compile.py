@@ -0,0 +1,67 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# cython: language_level=3, always_allow_keywords=True
+
+"""
+Compare the compile speed of the ``"antlr"`` and ``"ul4parse"`` parsers of
+:class:`ll.ul4c.Template` on the templates from the UL4 test suite.
+"""
+
+
+import os, ast, argparse, timeit
+
+from ll import ul4c
+
+
+def sources(filename):
+	# Return all string constants in the Python source file ``filename`` that
+	# contain template tags
+	with open(filename, encoding="utf-8") as f:
+		tree = ast.parse(f.read(), filename)
+	return sorted({node.value for node in ast.walk(tree) if isinstance(node, ast.Constant) and isinstance(node.value, str) and "<?" in node.value})
+
+
+def compileall(sources):
+	for source in sources:
+		ul4c.Template(source)
+
+
+def main(args=None):
+	p = argparse.ArgumentParser(description="Compare the compile speed of the UL4 parsers")
+	p.add_argument("filename", nargs="?", help="Python source file containing the templates (default %(default)s)", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "test", "test_ul4.py"))
+	p.add_argument("-n", "--number", dest="number", help="Number of compilations of all templates per measurement (default %(default)s)", type=int, default=1)
+	p.add_argument("-r", "--repeat", dest="repeat", help="Number of measurements (default %(default)s)", type=int, default=3)
+
+	args = p.parse_args(args)
+
+	oldparser = ul4c.Template.parser
+	try:
+		# Only use the templates that compile with both parsers (the test suite
+		# contains templates with syntax errors)
+		corpus = sources(args.filename)
+		for parser in ("antlr", "ul4parse"):
+			ul4c.Template.parser = parser
+			valid = []
+			for source in corpus:
+				try:
+					ul4c.Template(source)
+				except Exception:
+					pass
+				else:
+					valid.append(source)
+			corpus = valid
+
+		print(f"{len(corpus):,} templates")
+		times = {}
+		for parser in ("antlr", "ul4parse"):
+			ul4c.Template.parser = parser
+			times[parser] = min(timeit.repeat(lambda: compileall(corpus), number=args.number, repeat=args.repeat)) / args.number
+			print(f"{parser:<10} {times[parser]:>8.3f}s")
+		print(f"{'speedup':<10} {times['antlr']/times['ul4parse']:>7.2f}x")
+	finally:
+		ul4c.Template.parser = oldparser
+
+
+if __name__ == "__main__":
+	import sys
+	sys.exit(main())
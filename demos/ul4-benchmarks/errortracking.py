@@ -0,0 +1,57 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# cython: language_level=3, always_allow_keywords=True
+
+"""
+Compare the render speed of the ``"eager"`` and ``"lazy"`` error tracking
+modes of the ``"ast"`` backend of :class:`ll.ul4c.Template`.
+"""
+
+
+import argparse, timeit
+
+from ll import ul4c
+
+
+templates = {
+	"table": (
+		"<table><?for row in rows?><tr><?for cell in row?><td><?print cell?></td><?end for?></tr><?end for?></table>",
+		dict(rows=[[f"{i}/{j}" for j in range(10)] for i in range(100)]),
+	),
+	"arithmetic": (
+		"<?code t = 0?><?for i in range(n)?><?code t += i * 2 + 1 if i % 3 else -i?><?end for?><?print t?>",
+		dict(n=2000),
+	),
+	"attrs": (
+		"<?for p in persons?><?print p.firstname?> <?print p.lastname.upper()?> (<?print p.age?>)\n<?end for?>",
+		dict(persons=[dict(firstname="John", lastname=f"Doe{i}", age=i) for i in range(500)]),
+	),
+	"subtemplates": (
+		"<?def item(x)?><li><?printx x?></li><?end def?><ul><?for x in items?><?render item(x)?><?end for?></ul>",
+		dict(items=[f"<item {i}>" for i in range(500)]),
+	),
+}
+
+
+def main(args=None):
+	p = argparse.ArgumentParser(description="Compare the eager and lazy error tracking modes of UL4")
+	p.add_argument("-n", "--number", dest="number", help="Number of renders per measurement (default %(default)s)", type=int, default=20)
+	p.add_argument("-r", "--repeat", dest="repeat", help="Number of measurements (default %(default)s)", type=int, default=5)
+
+	args = p.parse_args(args)
+
+	print(f"{'template':<15} {'eager':>10} {'lazy':>10} {'speedup':>8}")
+	for (name, (source, vars)) in templates.items():
+		template = ul4c.Template(source, name)
+		times = {}
+		for mode in ("eager", "lazy"):
+			ul4c.set_errortracking(mode)
+			template.renders(**vars)
+			times[mode] = min(timeit.repeat(lambda: template.renders(**vars), number=args.number, repeat=args.repeat)) / args.number
+		print(f"{name:<15} {times['eager']*1000:>8.2f}ms {times['lazy']*1000:>8.2f}ms {times['eager']/times['lazy']:>7.2f}x")
+	ul4c.set_errortracking("eager")
+
+
+if __name__ == "__main__":
+	import sys
+	sys.exit(main())
@@ -0,0 +1,66 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# cython: language_level=3, always_allow_keywords=True
+
+"""
+Measure how fast large nested objects can be serialized by :mod:`ll.ul4on`
+and how fast the resulting dumps can be deserialized (from a string, from
+a stream and from a file).
+"""
+
+
+import os, argparse, io, tempfile, timeit
+
+from ll import ul4on
+
+
+def records(n):
+	return [
+		dict(
+			id=i,
+			name=f"Record #{i}",
+			description="A \"quoted\" text\nwith escapes\tand unicode: €",
+			price=i * 1.25,
+			tags=[f"tag{j}" for j in range(i % 5)],
+			children=[dict(id=j, value=-j) for j in range(i % 3)],
+		)
+		for i in range(n)
+	]
+
+
+data = {
+	"records": records,
+	"nested": lambda n: [[[[i, j, str(i*j)] for j in range(10)] for i in range(n//10)]],
+	"strings": lambda n: ["x"*i for i in range(n//10)],
+}
+
+
+def main(args=None):
+	p = argparse.ArgumentParser(description="Measure the speed of UL4ON serialization and deserialization")
+	p.add_argument("-s", "--size", dest="size", help="Number of records in each dump (default %(default)s)", type=int, default=10000)
+	p.add_argument("-n", "--number", dest="number", help="Number of dumps/loads per measurement (default %(default)s)", type=int, default=1)
+	p.add_argument("-r", "--repeat", dest="repeat", help="Number of measurements (default %(default)s)", type=int, default=3)
+	args = p.parse_args(args)
+
+	print(f"{'data':<10} {'size':>10} {'dumps':>10} {'loads':>10} {'load':>10} {'loadfile':>10}")
+	with tempfile.TemporaryDirectory() as dir:
+		filename = os.path.join(dir, "dump.ul4on")
+		for (name, factory) in data.items():
+			obj = factory(args.size)
+			dump = ul4on.dumps(obj)
+			with open(filename, "w", encoding="utf-8") as f:
+				f.write(dump)
+			times = {
+				"dumps": lambda: ul4on.dumps(obj),
+				"loads": lambda: ul4on.loads(dump),
+				"load": lambda: ul4on.load(io.StringIO(dump)),
+				"loadfile": lambda: ul4on.loadfile(filename),
+			}
+			for (mode, f) in times.items():
+				times[mode] = min(timeit.repeat(f, number=args.number, repeat=args.repeat)) / args.number
+			print(f"{name:<10} {len(dump):>10,} {times['dumps']*1000:>8.1f}ms {times['loads']*1000:>8.1f}ms {times['load']*1000:>8.1f}ms {times['loadfile']*1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+	import sys
+	sys.exit(main())
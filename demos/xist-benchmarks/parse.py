@@ -0,0 +1,57 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# cython: language_level=3, always_allow_keywords=True
+
+"""
+Measure how fast large XML documents can be parsed into XIST trees and how
+much memory the resulting trees need (with and without location information).
+"""
+
+
+import argparse, timeit, tracemalloc
+
+from ll.xist import xsc, parse
+from ll.xist.ns import html
+
+
+def document(n):
+	node = html.div(
+		html.p(
+			f"Paragraph #{i} with ",
+			html.b("bold"),
+			" and ",
+			html.a("linked", href=f"http://www.example.org/{i}.html", class_="link"),
+			" text",
+			html.br(),
+		)
+		for i in range(n//4)
+	)
+	return node.bytes(prefixes={html: None})
+
+
+def tree(data, loc):
+	return parse.tree(parse.String(data), parse.Expat(ns=True), parse.Node(loc=loc), validate=False)
+
+
+def main(args=None):
+	p = argparse.ArgumentParser(description="Measure the speed and memory usage of parsing XML into XIST trees")
+	p.add_argument("-s", "--size", dest="size", help="Approximate number of elements in the document (default %(default)s)", type=int, default=100000)
+	p.add_argument("-r", "--repeat", dest="repeat", help="Number of measurements (default %(default)s)", type=int, default=3)
+	args = p.parse_args(args)
+
+	data = document(args.size)
+	print(f"{'loc':<6} {'nodes':>10} {'bytes':>12} {'parse':>10} {'memory':>12} {'per node':>10}")
+	for loc in (False, True):
+		time = min(timeit.repeat(lambda: tree(data, loc), number=1, repeat=args.repeat))
+		tracemalloc.start()
+		node = tree(data, loc)
+		memory = tracemalloc.get_traced_memory()[0]
+		tracemalloc.stop()
+		nodes = sum(1 for n in node.walknodes(xsc.Node, enterattrs=True))
+		print(f"{loc!s:<6} {nodes:>10,} {len(data):>12,} {time*1000:>8.1f}ms {memory/1024/1024:>10.1f}MB {memory/nodes:>8.0f}B")
+		del node
+
+
+if __name__ == "__main__":
+	import sys
+	sys.exit(main())
@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# cython: language_level=3, always_allow_keywords=True
+
+"""
+Measure how fast large HTML documents built from :mod:`ll.xist.ns.html` can
+be published. The time for the normal publishing is compared with the time
+it takes when every node is published by calling its :meth:`publish` method
+and with the time it takes when namespaces are declared lazily (i.e. without
+the traversal of the tree that determines the namespaces before publishing).
+"""
+
+
+import argparse, timeit
+
+from ll.xist import xsc
+from ll.xist.ns import html, xml, chars
+
+
+class generators(xsc.Element):
+	# Forces publishing via the :meth:`publish` methods of all nodes
+	xmlns = None
+
+	def publish(self, publisher):
+		yield from self.content.publish(publisher)
+
+
+def elements(n):
+	return html.div(
+		html.span(html.b(i), html.br(), class_="item", id=f"item{i}")
+		for i in range(n//3)
+	)
+
+
+def table(n):
+	return html.table(
+		html.tr(
+			html.td(i, class_="number"),
+			html.td(f"Row #{i}", chars.nbsp(), "<&>"),
+			html.td(html.a("link", href=f"http://www.example.org/{i}.html")),
+			html.td(html.input(type="checkbox", checked=bool(i % 2))),
+			id=f"row{i}",
+		)
+		for i in range(n//7)
+	)
+
+
+def text(n):
+	return html.div(
+		html.p(
+			"Lorem ipsum ",
+			html.em("dolor"),
+			" sit amet, consectetur adipisici elit & sed eiusmod tempor incidunt €",
+			html.br(),
+		)
+		for i in range(n//3)
+	)
+
+
+def document(n):
+	return xsc.Frag(
+		xml.XML(),
+		html.DocTypeHTML5(),
+		html.html(
+			html.head(html.meta(charset="utf-8"), html.title("Benchmark")),
+			html.body(html.h1("Benchmark"), table(n//2), text(n//2)),
+		),
+	)
+
+
+data = {
+	"elements": elements,
+	"table": table,
+	"text": text,
+	"document": document,
+}
+
+
+def main(args=None):
+	p = argparse.ArgumentParser(description="Measure the speed of publishing XIST trees")
+	p.add_argument("-s", "--size", dest="size", help="Approximate number of elements in each tree (default %(default)s)", type=int, default=100000)
+	p.add_argument("-n", "--number", dest="number", help="Number of publishing calls per measurement (default %(default)s)", type=int, default=1)
+	p.add_argument("-r", "--repeat", dest="repeat", help="Number of measurements (default %(default)s)", type=int, default=3)
+	args = p.parse_args(args)
+
+	print(f"{'data':<10} {'elements':>10} {'bytes':>12} {'publish':>10} {'generators':>10} {'lazyxmlns':>10}")
+	for (name, factory) in data.items():
+		node = factory(args.size)
+		elements = sum(1 for e in node.walknodes(xsc.Element))
+		size = len(node.bytes())
+		times = {
+			"publish": lambda: node.bytes(),
+			"generators": lambda: generators(node).bytes(),
+			"lazyxmlns": lambda: node.bytes(lazyxmlns=True),
+		}
+		for (mode, f) in times.items():
+			times[mode] = min(timeit.repeat(f, number=args.number, repeat=args.repeat)) / args.number
+		print(f"{name:<10} {elements:>10,} {size:>12,} {times['publish']*1000:>8.1f}ms {times['generators']*1000:>8.1f}ms {times['lazyxmlns']*1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+	import sys
+	sys.exit(main())
@@ -265,6 +265,7 @@ args = dict(
 	ext_modules=[
 		setuptools.Extension("ll._ansistyle", ["src/ll/_ansistyle.c"]),
 		setuptools.Extension("ll._misc", ["src/ll/_misc.c"]),
+		setuptools.Extension("ll._ul4on", ["src/ll/_ul4on.c"]),
 		setuptools.Extension("ll._xml_codec", ["src/ll/_xml_codec.c", "src/ll/_xml_codec_include1.c", "src/ll/_xml_codec_include2.c"]),
 		setuptools.Extension("ll.xist.sgmlop", ["src/ll/xist/sgmlop.c"]),
 	],
@@ -333,6 +334,7 @@ if havecython:
 		setuptools.Extension("ll.xist.parse", ["src/ll/xist/parse.py"]),
 		setuptools.Extension("ll.url", ["src/ll/url.py"]),
 		# setuptools.Extension("ll.ul4c", ["src/ll/ul4c.py"]),
+		setuptools.Extension("ll.ul4parse", ["src/ll/ul4parse.py"]),
 		setuptools.Extension("ll.misc", ["src/ll/misc.py"]),
 		# setuptools.Extension("ll.ul4on", ["src/ll/ul4on.py"]),
 	])
@@ -0,0 +1,1596 @@
+/*
+** Copyright 2026 by LivingLogic AG, Bayreuth, Germany.
+** Copyright 2026 by Walter Dörwald
+**
+** All Rights Reserved
+**
+** See ll/xist/__init__.py for the license
+*/
+
+/*
+** C implementation of the hot paths of ``ll.ul4on.Encoder.dump()`` and
+** ``ll.ul4on.Decoder._load()``.
+**
+** Only ``None``, ``bool``, ``int``, ``float``, ``str``, lists, dictionaries
+** and sets are handled here (``skip()`` handles all typecodes, since it
+** doesn't have to create the objects). For everything else (and for anything unusual,
+** like strings containing escape sequences) the Python implementation is
+** called. Both implementations share the state stored in the ``Encoder`` and
+** ``Decoder`` objects, so they can call each other recursively.
+*/
+
+#include "Python.h"
+
+
+/* Objects from ``ll.ul4on`` (set via ``init()``) */
+static PyObject *streamed = NULL;
+static PyObject *unloaded = NULL;
+static PyObject *encodercache = NULL;
+static PyObject *encoderfor = NULL;
+static PyObject *dump_none = NULL;
+static PyObject *dump_bool = NULL;
+static PyObject *dump_int = NULL;
+static PyObject *dump_float = NULL;
+static PyObject *dump_str = NULL;
+static PyObject *dump_list = NULL;
+static PyObject *dump_dict = NULL;
+static PyObject *dump_set = NULL;
+
+/* Interned attribute names and constants */
+static PyObject *str_stream = NULL;
+static PyObject *str_write = NULL;
+static PyObject *str_binary = NULL;
+static PyObject *str_first = NULL;
+static PyObject *str_objects = NULL;
+static PyObject *str_id2index = NULL;
+static PyObject *str_str2index = NULL;
+static PyObject *str_scalarbackrefs = NULL;
+static PyObject *str_maxbackrefs = NULL;
+static PyObject *str_items = NULL;
+static PyObject *str_buffer = NULL;
+static PyObject *str_pos = NULL;
+static PyObject *str_fill = NULL;
+static PyObject *str_loadpy = NULL;
+static PyObject *str_skippy = NULL;
+static PyObject *str_keycache = NULL;
+static PyObject *str_stack = NULL;
+static PyObject *str_list = NULL;
+static PyObject *str_set = NULL;
+static PyObject *str_dict = NULL;
+static PyObject *str_odict = NULL;
+
+#define FLUSHSIZE 65536
+
+
+/*
+** Encoder
+*/
+
+typedef struct
+{
+	PyObject *encoder;
+	PyObject *write; /* bound ``write()`` method of the output stream */
+	PyObject *objects; /* ``encoder._objects`` */
+	PyObject *id2index; /* ``encoder._id2index`` */
+	PyObject *str2index; /* ``encoder._str2index`` (or ``NULL`` if strings aren't deduplicated) */
+	int scalarbackrefs; /* ``encoder.scalarbackrefs`` */
+	Py_ssize_t maxbackrefs; /* ``encoder.maxbackrefs`` (or -1 for no limit) */
+	int binary;
+	int first; /* ``encoder._first`` */
+	char *buf; /* Output not yet written to the stream (UTF-8 for text dumps) */
+	Py_ssize_t len;
+	Py_ssize_t cap;
+} Encoder;
+
+
+static int enc_reserve(Encoder *e, Py_ssize_t size)
+{
+	if (e->len + size > e->cap)
+	{
+		Py_ssize_t newcap = e->cap ? e->cap : 1024;
+		char *newbuf;
+		while (newcap < e->len + size)
+			newcap *= 2;
+		newbuf = PyMem_Realloc(e->buf, newcap);
+		if (newbuf == NULL)
+		{
+			PyErr_NoMemory();
+			return -1;
+		}
+		e->buf = newbuf;
+		e->cap = newcap;
+	}
+	return 0;
+}
+
+
+static int enc_write(Encoder *e, const char *data, Py_ssize_t size)
+{
+	if (enc_reserve(e, size) < 0)
+		return -1;
+	memcpy(e->buf + e->len, data, size);
+	e->len += size;
+	return 0;
+}
+
+
+static int enc_flush(Encoder *e)
+{
+	PyObject *data;
+	PyObject *result;
+
+	if (!e->len)
+		return 0;
+	if (e->binary)
+		data = PyBytes_FromStringAndSize(e->buf, e->len);
+	else
+		data = PyUnicode_DecodeUTF8(e->buf, e->len, "strict");
+	if (data == NULL)
+		return -1;
+	e->len = 0;
+	result = PyObject_CallOneArg(e->write, data);
+	Py_DECREF(data);
+	if (result == NULL)
+		return -1;
+	Py_DECREF(result);
+	return 0;
+}
+
+
+/* Write the start of a new item (i.e. the separator and typecode) */
+static int enc_line(Encoder *e, const char *line, Py_ssize_t size)
+{
+	if (!e->binary)
+	{
+		if (!e->first)
+		{
+			if (enc_write(e, " ", 1) < 0)
+				return -1;
+		}
+		e->first = 0;
+	}
+	return enc_write(e, line, size);
+}
+
+
+static int enc_varint(Encoder *e, unsigned long long value)
+{
+	char buffer[10];
+	int size = 0;
+
+	while (value >= 0x80)
+	{
+		buffer[size++] = (char)((value & 0x7f) | 0x80);
+		value >>= 7;
+	}
+	buffer[size++] = (char)value;
+	return enc_write(e, buffer, size);
+}
+
+
+/*
+** Record the object ``obj`` (with the id ``key``) for backreferences. Return 1
+** if the object has been recorded, 0 if it shouldn't be and -1 for exceptions.
+*/
+static int enc_record(Encoder *e, PyObject *key, PyObject *obj, int scalar)
+{
+	PyObject *index;
+	int result;
+
+	if (scalar && !e->scalarbackrefs)
+		return 0;
+	if (e->maxbackrefs >= 0 && PyList_GET_SIZE(e->objects) >= e->maxbackrefs)
+		return 0;
+	index = PyLong_FromSsize_t(PyList_GET_SIZE(e->objects));
+	if (index == NULL)
+		return -1;
+	if (e->str2index != NULL && PyUnicode_CheckExact(obj))
+		result = PyDict_SetItem(e->str2index, obj, index);
+	else
+		result = PyDict_SetItem(e->id2index, key, index);
+	Py_DECREF(index);
+	if (result < 0)
+		return -1;
+	if (PyList_Append(e->objects, obj) < 0)
+		return -1;
+	return 1;
+}
+
+
+static int enc_backref(Encoder *e, PyObject *index)
+{
+	Py_ssize_t position = PyLong_AsSsize_t(index);
+
+	if (position == -1 && PyErr_Occurred())
+		return -1;
+	if (e->binary)
+	{
+		if (enc_line(e, "^", 1) < 0)
+			return -1;
+		return enc_varint(e, position);
+	}
+	else
+	{
+		char buffer[32];
+		int size = PyOS_snprintf(buffer, sizeof(buffer), "^%zd", position);
+		return enc_line(e, buffer, size);
+	}
+}
+
+
+/* Write the UTF-8 encoded string ``str`` (replacing "<" with "\x3c" if ``escape`` is true) */
+static int enc_utf8(Encoder *e, PyObject *str, int escape)
+{
+	Py_ssize_t size;
+	Py_ssize_t i;
+	const char *data = PyUnicode_AsUTF8AndSize(str, &size);
+
+	if (data == NULL)
+		return -1;
+	if (!escape || memchr(data, '<', size) == NULL)
+		return enc_write(e, data, size);
+	for (i = 0; i < size; ++i)
+	{
+		if (data[i] == '<')
+		{
+			if (enc_write(e, "\\x3c", 4) < 0)
+				return -1;
+		}
+		else
+		{
+			if (enc_write(e, data + i, 1) < 0)
+				return -1;
+		}
+	}
+	return 0;
+}
+
+
+/* Call the Python implementation ``func`` for dumping ``obj`` */
+static int enc_python(Encoder *e, PyObject *func, PyObject *obj)
+{
+	PyObject *result;
+	PyObject *first;
+	int isfirst;
+
+	if (enc_flush(e) < 0)
+		return -1;
+	if (PyObject_SetAttr(e->encoder, str_first, e->first ? Py_True : Py_False) < 0)
+		return -1;
+	result = PyObject_CallFunctionObjArgs(func, e->encoder, obj, NULL);
+	if (result == NULL)
+		return -1;
+	Py_DECREF(result);
+	first = PyObject_GetAttr(e->encoder, str_first);
+	if (first == NULL)
+		return -1;
+	isfirst = PyObject_IsTrue(first);
+	Py_DECREF(first);
+	if (isfirst < 0)
+		return -1;
+	e->first = isfirst;
+	return 0;
+}
+
+
+static int enc_dump(Encoder *e, PyObject *obj);
+
+
+static int enc_dumpiter(Encoder *e, PyObject *obj, int pairs)
+{
+	PyObject *iter = PyObject_GetIter(obj);
+	PyObject *item;
+
+	if (iter == NULL)
+		return -1;
+	while ((item = PyIter_Next(iter)) != NULL)
+	{
+		int result;
+		if (pairs)
+		{
+			if (!PyTuple_Check(item) || PyTuple_GET_SIZE(item) != 2)
+			{
+				PyErr_SetString(PyExc_TypeError, "items() must return pairs");
+				result = -1;
+			}
+			else
+			{
+				result = enc_dump(e, PyTuple_GET_ITEM(item, 0));
+				if (result >= 0)
+					result = enc_dump(e, PyTuple_GET_ITEM(item, 1));
+			}
+		}
+		else
+			result = enc_dump(e, item);
+		Py_DECREF(item);
+		if (result < 0)
+		{
+			Py_DECREF(iter);
+			return -1;
+		}
+	}
+	Py_DECREF(iter);
+	return PyErr_Occurred() ? -1 : 0;
+}
+
+
+static int enc_dumpobject(Encoder *e, PyObject *key, PyObject *obj)
+{
+	PyObject *func;
+	int result = -1;
+
+	func = PyDict_GetItemWithError(encodercache, (PyObject *)Py_TYPE(obj));
+	if (func != NULL)
+		Py_INCREF(func);
+	else
+	{
+		if (PyErr_Occurred())
+			return -1;
+		func = PyObject_CallOneArg(encoderfor, (PyObject *)Py_TYPE(obj));
+		if (func == NULL)
+			return -1;
+	}
+
+	if (func == dump_none)
+		result = enc_line(e, "n", 1);
+	else if (func == dump_bool)
+		result = enc_line(e, obj == Py_True ? "bT" : "bF", 2);
+	else if (func == dump_int && PyLong_CheckExact(obj))
+	{
+		if (e->binary)
+		{
+			int overflow;
+			long long value = PyLong_AsLongLongAndOverflow(obj, &overflow);
+			if (value == -1 && PyErr_Occurred())
+				goto finish;
+			if (overflow || value == LLONG_MIN)
+				result = enc_python(e, func, obj);
+			else if ((result = enc_line(e, "i", 1)) >= 0)
+				result = enc_varint(e, value >= 0 ? ((unsigned long long)value) << 1 : (((unsigned long long)-value) << 1) - 1);
+		}
+		else
+		{
+			PyObject *str = PyObject_Str(obj);
+			if (str == NULL)
+				goto finish;
+			if ((result = enc_line(e, "i", 1)) >= 0)
+				result = enc_utf8(e, str, 0);
+			Py_DECREF(str);
+		}
+	}
+	else if (func == dump_float && PyFloat_CheckExact(obj))
+	{
+		if (e->binary)
+		{
+			char buffer[8];
+			if (PyFloat_Pack8(PyFloat_AS_DOUBLE(obj), buffer, 0) < 0)
+				goto finish;
+			if ((result = enc_line(e, "f", 1)) >= 0)
+				result = enc_write(e, buffer, 8);
+		}
+		else
+		{
+			PyObject *repr = PyObject_Repr(obj);
+			if (repr == NULL)
+				goto finish;
+			if ((result = enc_line(e, "f", 1)) >= 0)
+				result = enc_utf8(e, repr, 0);
+			Py_DECREF(repr);
+		}
+	}
+	else if (func == dump_str && PyUnicode_CheckExact(obj))
+	{
+		const char *typecode;
+		if (e->str2index != NULL)
+		{
+			PyObject *index = PyDict_GetItemWithError(e->str2index, obj);
+			if (index != NULL)
+			{
+				result = enc_backref(e, index);
+				goto finish;
+			}
+			if (PyErr_Occurred())
+				goto finish;
+		}
+		switch (enc_record(e, key, obj, 1))
+		{
+			case -1:
+				goto finish;
+			case 0:
+				typecode = "s";
+				break;
+			default:
+				typecode = "S";
+		}
+		if (e->binary)
+		{
+			if (PyUnicode_IS_ASCII(obj))
+			{
+				Py_ssize_t size = PyUnicode_GET_LENGTH(obj);
+				if ((result = enc_line(e, typecode, 1)) >= 0 && (result = enc_varint(e, size)) >= 0)
+					result = enc_write(e, (const char *)PyUnicode_DATA(obj), size);
+			}
+			else
+			{
+				PyObject *bytes = PyUnicode_AsEncodedString(obj, "utf-8", "surrogatepass");
+				if (bytes == NULL)
+					goto finish;
+				if ((result = enc_line(e, typecode, 1)) >= 0 && (result = enc_varint(e, PyBytes_GET_SIZE(bytes))) >= 0)
+					result = enc_write(e, PyBytes_AS_STRING(bytes), PyBytes_GET_SIZE(bytes));
+				Py_DECREF(bytes);
+			}
+		}
+		else
+		{
+			PyObject *repr = PyObject_Repr(obj);
+			if (repr == NULL)
+				goto finish;
+			if ((result = enc_line(e, typecode, 1)) >= 0)
+				result = enc_utf8(e, repr, 1);
+			Py_DECREF(repr);
+		}
+	}
+	else if (func == dump_list)
+	{
+		int recorded = enc_record(e, key, obj, 0);
+		if (recorded < 0 || enc_line(e, recorded ? "L" : "l", 1) < 0)
+			goto finish;
+		if (PyList_CheckExact(obj) || PyTuple_CheckExact(obj))
+		{
+			Py_ssize_t i;
+			for (i = 0; i < PySequence_Fast_GET_SIZE(obj); ++i)
+			{
+				PyObject *item = PySequence_Fast_GET_ITEM(obj, i);
+				Py_INCREF(item);
+				result = enc_dump(e, item);
+				Py_DECREF(item);
+				if (result < 0)
+					goto finish;
+			}
+		}
+		else if (enc_dumpiter(e, obj, 0) < 0)
+			goto finish;
+		result = enc_line(e, "]", 1);
+	}
+	else if (func == dump_dict)
+	{
+		int recorded = enc_record(e, key, obj, 0);
+		if (recorded < 0 || enc_line(e, recorded ? "E" : "e", 1) < 0)
+			goto finish;
+		if (PyDict_CheckExact(obj))
+		{
+			Py_ssize_t pos = 0;
+			PyObject *itemkey;
+			PyObject *itemvalue;
+			while (PyDict_Next(obj, &pos, &itemkey, &itemvalue))
+			{
+				Py_INCREF(itemkey);
+				Py_INCREF(itemvalue);
+				result = enc_dump(e, itemkey);
+				if (result >= 0)
+					result = enc_dump(e, itemvalue);
+				Py_DECREF(itemkey);
+				Py_DECREF(itemvalue);
+				if (result < 0)
+					goto finish;
+			}
+		}
+		else
+		{
+			PyObject *items = PyObject_CallMethodNoArgs(obj, str_items);
+			if (items == NULL)
+				goto finish;
+			result = enc_dumpiter(e, items, 1);
+			Py_DECREF(items);
+			if (result < 0)
+				goto finish;
+		}
+		result = enc_line(e, "}", 1);
+	}
+	else if (func == dump_set)
+	{
+		int recorded = enc_record(e, key, obj, 0);
+		if (recorded < 0 || enc_line(e, recorded ? "Y" : "y", 1) < 0)
+			goto finish;
+		if (enc_dumpiter(e, obj, 0) < 0)
+			goto finish;
+		result = enc_line(e, "}", 1);
+	}
+	else
+		result = enc_python(e, func, obj);
+
+	if (result >= 0 && e->len >= FLUSHSIZE)
+		result = enc_flush(e);
+
+	finish:
+	Py_DECREF(func);
+	return result;
+}
+
+
+static int enc_dump(Encoder *e, PyObject *obj)
+{
+	PyObject *key;
+	PyObject *index;
+	int result;
+
+	if (Py_EnterRecursiveCall(" while dumping UL4ON"))
+		return -1;
+	key = PyLong_FromVoidPtr(obj);
+	if (key == NULL)
+	{
+		Py_LeaveRecursiveCall();
+		return -1;
+	}
+	index = PyDict_GetItemWithError(e->id2index, key);
+	if (index != NULL)
+		result = enc_backref(e, index); /* Store a backreference to the object */
+	else if (PyErr_Occurred())
+		result = -1;
+	else
+		result = enc_dumpobject(e, key, obj);
+	Py_DECREF(key);
+	Py_LeaveRecursiveCall();
+	return result;
+}
+
+
+static PyObject *dump(PyObject *self, PyObject *const *args, Py_ssize_t nargs)
+{
+	Encoder e = {NULL, NULL, NULL, NULL, NULL, 1, -1, 0, 0, NULL, 0, 0};
+	PyObject *stream = NULL;
+	PyObject *value = NULL;
+	PyObject *result = NULL;
+	PyObject *exc = NULL;
+	int ok;
+
+	if (nargs != 2)
+	{
+		PyErr_SetString(PyExc_TypeError, "dump() expects two arguments");
+		return NULL;
+	}
+	e.encoder = args[0];
+	if ((stream = PyObject_GetAttr(e.encoder, str_stream)) == NULL)
+		goto finish;
+	if ((e.write = PyObject_GetAttr(stream, str_write)) == NULL)
+		goto finish;
+	if ((e.objects = PyObject_GetAttr(e.encoder, str_objects)) == NULL)
+		goto finish;
+	if (!PyList_Check(e.objects))
+	{
+		PyErr_SetString(PyExc_TypeError, "Encoder._objects must be a list");
+		goto finish;
+	}
+	if ((e.id2index = PyObject_GetAttr(e.encoder, str_id2index)) == NULL)
+		goto finish;
+	if (!PyDict_Check(e.id2index))
+	{
+		PyErr_SetString(PyExc_TypeError, "Encoder._id2index must be a dict");
+		goto finish;
+	}
+	if ((e.str2index = PyObject_GetAttr(e.encoder, str_str2index)) == NULL)
+		goto finish;
+	if (e.str2index == Py_None)
+		Py_CLEAR(e.str2index);
+	else if (!PyDict_Check(e.str2index))
+	{
+		PyErr_SetString(PyExc_TypeError, "Encoder._str2index must be a dict or None");
+		goto finish;
+	}
+	if ((value = PyObject_GetAttr(e.encoder, str_maxbackrefs)) == NULL)
+		goto finish;
+	if (value != Py_None && (e.maxbackrefs = PyLong_AsSsize_t(value)) == -1 && PyErr_Occurred())
+		goto finish;
+	Py_DECREF(value);
+	if ((value = PyObject_GetAttr(e.encoder, str_scalarbackrefs)) == NULL || (e.scalarbackrefs = PyObject_IsTrue(value)) < 0)
+		goto finish;
+	Py_DECREF(value);
+	if ((value = PyObject_GetAttr(e.encoder, str_binary)) == NULL || (e.binary = PyObject_IsTrue(value)) < 0)
+		goto finish;
+	Py_DECREF(value);
+	if ((value = PyObject_GetAttr(e.encoder, str_first)) == NULL || (e.first = PyObject_IsTrue(value)) < 0)
+		goto finish;
+
+	ok = enc_dump(&e, args[1]);
+	/* Write what we have, even in case of an exception (which we have to put aside while doing that) */
+	exc = ok < 0 ? PyErr_GetRaisedException() : NULL;
+	if (enc_flush(&e) < 0)
+		ok = -1;
+	if (PyObject_SetAttr(e.encoder, str_first, e.first ? Py_True : Py_False) < 0)
+		ok = -1;
+	if (exc != NULL)
+	{
+		/* The original exception wins over anything raised while flushing */
+		PyErr_Clear();
+		PyErr_SetRaisedException(exc);
+	}
+	else if (ok >= 0)
+		result = Py_NewRef(Py_None);
+
+	finish:
+	PyMem_Free(e.buf);
+	Py_XDECREF(value);
+	Py_XDECREF(e.str2index);
+	Py_XDECREF(e.id2index);
+	Py_XDECREF(e.objects);
+	Py_XDECREF(e.write);
+	Py_XDECREF(stream);
+	return result;
+}
+
+
+static char dump_doc[] = PyDoc_STR(
+	"dump(encoder, obj)\n\
+	\n\
+	Dump ``obj`` with the :class:`ll.ul4on.Encoder` ``encoder`` into its stream\n\
+	(which must not use indentation)."
+);
+
+
+/*
+** Decoder
+*/
+
+typedef struct
+{
+	PyObject *decoder;
+	PyObject *buffer; /* ``decoder._buffer`` */
+	int binary;
+	int bytes; /* Is ``buffer`` a bytes-like object? (For binary dumps and for UTF-8 encoded text dumps) */
+	Py_buffer view; /* The buffer of ``buffer`` if it's neither ``bytes`` nor ``str`` (e.g. for an ``mmap``) */
+	int hasview;
+	int kind; /* For text dumps in a ``str``: The kind of ``buffer`` */
+	const void *data;
+	Py_ssize_t pos; /* ``decoder._pos`` */
+	Py_ssize_t len; /* Length of ``buffer`` */
+	Py_ssize_t mark; /* Position of the current typecode (i.e. the part of ``buffer`` that must be kept when refilling it) */
+	PyObject *objects; /* ``decoder._objects`` */
+	PyObject *keycache; /* ``decoder._keycache`` */
+	PyObject *stack; /* ``decoder._stack`` */
+} Decoder;
+
+
+/* Fetch the buffer and position from the decoder */
+static int dec_get(Decoder *d)
+{
+	PyObject *buffer = PyObject_GetAttr(d->decoder, str_buffer);
+	PyObject *pos;
+
+	if (buffer == NULL)
+		return -1;
+	if (d->binary && PyUnicode_Check(buffer))
+	{
+		PyErr_SetString(PyExc_TypeError, "unexpected type for Decoder._buffer");
+		Py_DECREF(buffer);
+		return -1;
+	}
+	if (d->hasview)
+	{
+		PyBuffer_Release(&d->view);
+		d->hasview = 0;
+	}
+	Py_XSETREF(d->buffer, buffer);
+	if (PyUnicode_Check(buffer))
+	{
+		d->bytes = 0;
+		d->kind = PyUnicode_KIND(buffer);
+		d->data = PyUnicode_DATA(buffer);
+		d->len = PyUnicode_GET_LENGTH(buffer);
+	}
+	else if (PyBytes_Check(buffer))
+	{
+		d->bytes = 1;
+		d->data = PyBytes_AS_STRING(buffer);
+		d->len = PyBytes_GET_SIZE(buffer);
+	}
+	else
+	{
+		if (PyObject_GetBuffer(buffer, &d->view, PyBUF_SIMPLE) < 0)
+			return -1;
+		d->hasview = 1;
+		d->bytes = 1;
+		d->data = d->view.buf;
+		d->len = d->view.len;
+	}
+	pos = PyObject_GetAttr(d->decoder, str_pos);
+	if (pos == NULL)
+		return -1;
+	d->pos = PyLong_AsSsize_t(pos);
+	Py_DECREF(pos);
+	if (d->pos == -1 && PyErr_Occurred())
+		return -1;
+	d->mark = d->pos;
+	return 0;
+}
+
+
+/* Store the position in the decoder */
+static int dec_set(Decoder *d)
+{
+	PyObject *pos = PyLong_FromSsize_t(d->pos);
+	int result;
+
+	if (pos == NULL)
+		return -1;
+	result = PyObject_SetAttr(d->decoder, str_pos, pos);
+	Py_DECREF(pos);
+	return result;
+}
+
+
+/*
+** Read more input (keeping everything from ``d->mark`` on). All positions
+** are shifted by the amount of data that is dropped from the buffer.
+** Return 1 if more data is available, 0 if not and -1 for exceptions.
+*/
+static int dec_fill(Decoder *d)
+{
+	Py_ssize_t pos = d->pos - d->mark;
+	PyObject *result;
+	int more;
+
+	d->pos = d->mark;
+	if (dec_set(d) < 0)
+		return -1;
+	result = PyObject_CallMethodNoArgs(d->decoder, str_fill);
+	if (result == NULL)
+		return -1;
+	more = PyObject_IsTrue(result);
+	Py_DECREF(result);
+	if (more < 0)
+		return -1;
+	if (dec_get(d) < 0)
+		return -1;
+	d->pos += pos;
+	return more;
+}
+
+
+static Py_UCS4 dec_char(Decoder *d, Py_ssize_t pos)
+{
+	if (d->bytes)
+		return ((const unsigned char *)d->data)[pos];
+	return PyUnicode_READ(d->kind, d->data, pos);
+}
+
+
+/* Is ``c`` whitespace? (In bytes only ASCII whitespace counts, as for the regular expressions in ``ll.ul4on``) */
+static int dec_isspace(Decoder *d, Py_UCS4 c)
+{
+	if (d->bytes)
+		return c == ' ' || (c >= '\t' && c <= '\r');
+	return Py_UNICODE_ISSPACE(c);
+}
+
+
+/* Return the next non-whitespace character or -1 for exceptions */
+static Py_UCS4 dec_nextchar(Decoder *d)
+{
+	for (;;)
+	{
+		if (d->pos >= d->len)
+		{
+			int more = dec_fill(d);
+			if (more < 0)
+				return (Py_UCS4)-1;
+			if (!more)
+			{
+				PyErr_SetNone(PyExc_EOFError);
+				return (Py_UCS4)-1;
+			}
+			continue;
+		}
+		Py_UCS4 c = dec_char(d, d->pos++);
+		if (d->binary || !dec_isspace(d, c))
+			return c;
+	}
+}
+
+
+/*
+** Make sure that the text token starting at ``d->pos`` is completely in the
+** buffer and return its end position (or -1 for exceptions).
+*/
+static Py_ssize_t dec_token(Decoder *d)
+{
+	Py_ssize_t end = d->pos;
+	for (;;)
+	{
+		while (end < d->len && !dec_isspace(d, dec_char(d, end)))
+			++end;
+		if (end < d->len)
+			return end;
+		Py_ssize_t oldpos = d->pos;
+		int more = dec_fill(d);
+		if (more < 0)
+			return -1;
+		end += d->pos - oldpos;
+		if (!more)
+			return end;
+	}
+}
+
+
+/* Make sure that ``size`` bytes are available after ``d->pos`` (return -1 for exceptions) */
+static int dec_need(Decoder *d, Py_ssize_t size)
+{
+	while (d->len - d->pos < size)
+	{
+		int more = dec_fill(d);
+		if (more < 0)
+			return -1;
+		if (!more)
+		{
+			PyErr_SetNone(PyExc_EOFError);
+			return -1;
+		}
+	}
+	return 0;
+}
+
+
+/* Read a variable length integer from a binary dump (return 0 for success, 1 for overflow and -1 for exceptions) */
+static int dec_varint(Decoder *d, unsigned long long *value)
+{
+	int shift = 0;
+	*value = 0;
+	for (;;)
+	{
+		unsigned char byte;
+		if (dec_need(d, 1) < 0)
+			return -1;
+		byte = ((const unsigned char *)d->data)[d->pos++];
+		if (shift >= 64)
+		{
+			if (byte & 0x7f)
+				return 1;
+		}
+		else
+		{
+			if (shift > 57 && (byte & 0x7f) >> (64 - shift))
+				return 1;
+			*value |= ((unsigned long long)(byte & 0x7f)) << shift;
+		}
+		if (byte < 0x80)
+			return 0;
+		shift += 7;
+	}
+}
+
+
+/* Read an integer (return 0 for success, 1 if the Python implementation must handle it and -1 for exceptions) */
+static int dec_int(Decoder *d, long long *value)
+{
+	if (d->binary)
+	{
+		unsigned long long raw;
+		int result = dec_varint(d, &raw);
+		if (result)
+			return result;
+		*value = (raw & 1) ? -(long long)(raw >> 1) - 1 : (long long)(raw >> 1);
+		return 0;
+	}
+	else
+	{
+		Py_ssize_t end = dec_token(d);
+		Py_ssize_t i = d->pos;
+		int negative = 0;
+		if (end < 0)
+			return -1;
+		if (i < end && dec_char(d, i) == '-')
+		{
+			negative = 1;
+			++i;
+		}
+		if (i == end || end - i > 18)
+			return 1;
+		*value = 0;
+		for (; i < end; ++i)
+		{
+			Py_UCS4 c = dec_char(d, i);
+			if (c < '0' || c > '9')
+				return 1;
+			*value = *value * 10 + (c - '0');
+		}
+		if (negative)
+			*value = -*value;
+		d->pos = end;
+		return 0;
+	}
+}
+
+
+/* Let the Python implementation load the object whose typecode is at ``d->mark`` */
+static PyObject *dec_python(Decoder *d)
+{
+	PyObject *result;
+
+	d->pos = d->mark;
+	if (dec_set(d) < 0)
+		return NULL;
+	result = PyObject_CallMethodNoArgs(d->decoder, str_loadpy);
+	if (result == NULL)
+		return NULL;
+	if (dec_get(d) < 0)
+	{
+		Py_DECREF(result);
+		return NULL;
+	}
+	return result;
+}
+
+
+static PyObject *dec_load(Decoder *d);
+
+
+/* Load the items of a list, set or dict up to the terminator ``terminator`` into ``container`` */
+static int dec_items(Decoder *d, PyObject *container, PyObject *name, Py_UCS4 terminator)
+{
+	if (PyList_Append(d->stack, name) < 0)
+		return -1;
+	for (;;)
+	{
+		int result;
+		PyObject *item;
+		Py_UCS4 c;
+		d->mark = d->pos;
+		c = dec_nextchar(d);
+		if (c == (Py_UCS4)-1)
+			return -1;
+		if (c == terminator)
+			break;
+		d->pos--; /* Push back the typecode */
+		item = dec_load(d);
+		if (item == NULL)
+			return -1;
+		if (PyList_Check(container))
+			result = PyList_Append(container, item);
+		else if (PyAnySet_Check(container))
+			result = PySet_Add(container, item);
+		else
+		{
+			PyObject *value;
+			if (PyUnicode_CheckExact(item))
+			{
+				/* "Intern" the key */
+				PyObject *key = PyDict_SetDefault(d->keycache, item, item);
+				if (key == NULL)
+				{
+					Py_DECREF(item);
+					return -1;
+				}
+				Py_INCREF(key);
+				Py_SETREF(item, key);
+			}
+			value = dec_load(d);
+			if (value == NULL)
+			{
+				Py_DECREF(item);
+				return -1;
+			}
+			result = PyDict_SetItem(container, item, value);
+			Py_DECREF(value);
+		}
+		Py_DECREF(item);
+		if (result < 0)
+			return -1;
+	}
+	return PySequence_DelItem(d->stack, PyList_GET_SIZE(d->stack) - 1);
+}
+
+
+static PyObject *dec_loadtypecode(Decoder *d, Py_UCS4 typecode)
+{
+	PyObject *value = NULL;
+
+	switch (typecode)
+	{
+		case '^':
+		{
+			long long position;
+			int result;
+			if (d->binary)
+			{
+				/* Backreferences are not zigzag encoded */
+				unsigned long long raw;
+				result = dec_varint(d, &raw);
+				position = raw > PY_SSIZE_T_MAX ? -1 : (long long)raw;
+			}
+			else
+				result = dec_int(d, &position);
+			if (result < 0)
+				return NULL;
+			if (result > 0 || position < 0 || position >= PyList_GET_SIZE(d->objects))
+				return dec_python(d);
+			value = PyList_GET_ITEM(d->objects, position);
+			if (value == streamed || value == unloaded)
+				return dec_python(d);
+			return Py_NewRef(value);
+		}
+		case 'n':
+		case 'N':
+			if (typecode == 'N' && PyList_Append(d->objects, Py_None) < 0)
+				return NULL;
+			return Py_NewRef(Py_None);
+		case 'b':
+		case 'B':
+		{
+			Py_UCS4 c;
+			if (d->pos >= d->len)
+				return dec_python(d);
+			c = dec_char(d, d->pos);
+			if (c == 'T')
+				value = Py_True;
+			else if (c == 'F')
+				value = Py_False;
+			else
+				return dec_python(d);
+			d->pos++;
+			if (typecode == 'B' && PyList_Append(d->objects, value) < 0)
+				return NULL;
+			return Py_NewRef(value);
+		}
+		case 'i':
+		case 'I':
+		{
+			long long intvalue;
+			int result = dec_int(d, &intvalue);
+			if (result < 0)
+				return NULL;
+			if (result > 0)
+				return dec_python(d);
+			value = PyLong_FromLongLong(intvalue);
+			break;
+		}
+		case 'f':
+		case 'F':
+			if (d->binary)
+			{
+				if (dec_need(d, 8) < 0)
+					return NULL;
+				double floatvalue = PyFloat_Unpack8((const char *)d->data + d->pos, 0);
+				if (floatvalue == -1.0 && PyErr_Occurred())
+					return NULL;
+				d->pos += 8;
+				value = PyFloat_FromDouble(floatvalue);
+			}
+			else
+			{
+				Py_ssize_t end = dec_token(d);
+				PyObject *token;
+				if (end < 0)
+					return NULL;
+				if (d->bytes)
+					token = PyBytes_FromStringAndSize((const char *)d->data + d->pos, end - d->pos);
+				else
+					token = PyUnicode_Substring(d->buffer, d->pos, end);
+				if (token == NULL)
+					return NULL;
+				value = PyFloat_FromString(token);
+				Py_DECREF(token);
+				if (value == NULL)
+					return NULL;
+				d->pos = end;
+			}
+			break;
+		case 's':
+		case 'S':
+			if (d->binary)
+			{
+				unsigned long long size;
+				int result = dec_varint(d, &size);
+				if (result < 0)
+					return NULL;
+				if (result > 0 || size > PY_SSIZE_T_MAX)
+					return dec_python(d);
+				if (dec_need(d, (Py_ssize_t)size) < 0)
+					return NULL;
+				value = PyUnicode_DecodeUTF8((const char *)d->data + d->pos, (Py_ssize_t)size, "surrogatepass");
+				if (value == NULL)
+					return NULL;
+				d->pos += (Py_ssize_t)size;
+			}
+			else
+			{
+				Py_UCS4 delimiter;
+				Py_ssize_t end;
+				if (dec_need(d, 1) < 0)
+					return NULL;
+				delimiter = dec_char(d, d->pos);
+				end = ++d->pos;
+				for (;;)
+				{
+					Py_UCS4 c;
+					if (end >= d->len)
+					{
+						Py_ssize_t oldpos = d->pos;
+						int more = dec_fill(d);
+						if (more < 0)
+							return NULL;
+						end += d->pos - oldpos;
+						if (!more)
+						{
+							PyErr_SetNone(PyExc_EOFError);
+							return NULL;
+						}
+						continue;
+					}
+					c = dec_char(d, end);
+					if (c == delimiter)
+						break;
+					if (c == '\\')
+						return dec_python(d); /* Escape sequences are handled by Python */
+					++end;
+				}
+				if (d->bytes)
+					value = PyUnicode_DecodeUTF8((const char *)d->data + d->pos, end - d->pos, NULL);
+				else
+					value = PyUnicode_Substring(d->buffer, d->pos, end);
+				if (value == NULL)
+					return NULL;
+				d->pos = end + 1;
+			}
+			break;
+		case 'l':
+		case 'L':
+			value = PyList_New(0);
+			if (value == NULL)
+				return NULL;
+			if ((typecode == 'L' && PyList_Append(d->objects, value) < 0) || dec_items(d, value, str_list, ']') < 0)
+			{
+				Py_DECREF(value);
+				return NULL;
+			}
+			return value;
+		case 'd':
+		case 'D':
+		case 'e':
+		case 'E':
+			value = PyDict_New();
+			if (value == NULL)
+				return NULL;
+			if (((typecode == 'D' || typecode == 'E') && PyList_Append(d->objects, value) < 0) || dec_items(d, value, (typecode == 'd' || typecode == 'D') ? str_dict : str_odict, '}') < 0)
+			{
+				Py_DECREF(value);
+				return NULL;
+			}
+			return value;
+		case 'y':
+		case 'Y':
+			value = PySet_New(NULL);
+			if (value == NULL)
+				return NULL;
+			if ((typecode == 'Y' && PyList_Append(d->objects, value) < 0) || dec_items(d, value, str_set, '}') < 0)
+			{
+				Py_DECREF(value);
+				return NULL;
+			}
+			return value;
+		default:
+			return dec_python(d);
+	}
+	/* Register the scalar ``value`` for backreferences if the typecode is uppercase */
+	if (value != NULL && typecode >= 'A' && typecode <= 'Z' && PyList_Append(d->objects, value) < 0)
+		Py_CLEAR(value);
+	return value;
+}
+
+
+static PyObject *dec_load(Decoder *d)
+{
+	PyObject *value;
+	Py_UCS4 typecode;
+
+	if (Py_EnterRecursiveCall(" while loading UL4ON"))
+		return NULL;
+	typecode = dec_nextchar(d);
+	if (typecode == (Py_UCS4)-1)
+		value = NULL;
+	else
+	{
+		d->mark = d->pos - 1;
+		value = dec_loadtypecode(d, typecode);
+	}
+	Py_LeaveRecursiveCall();
+	return value;
+}
+
+
+/* Let the Python implementation skip the object whose typecode is at ``d->mark`` */
+static int dec_skippython(Decoder *d)
+{
+	PyObject *result;
+
+	d->pos = d->mark;
+	if (dec_set(d) < 0)
+		return -1;
+	result = PyObject_CallMethodNoArgs(d->decoder, str_skippy);
+	if (result == NULL)
+		return -1;
+	Py_DECREF(result);
+	return dec_get(d);
+}
+
+
+static int dec_skip(Decoder *d);
+
+
+/* Skip ``count`` objects */
+static int dec_skipcount(Decoder *d, int count)
+{
+	for (; count; --count)
+	{
+		if (dec_skip(d) < 0)
+			return -1;
+	}
+	return 0;
+}
+
+
+/* Skip objects up to (and including) the terminator ``terminator`` */
+static int dec_skipitems(Decoder *d, Py_UCS4 terminator)
+{
+	for (;;)
+	{
+		Py_UCS4 c;
+		d->mark = d->pos;
+		c = dec_nextchar(d);
+		if (c == (Py_UCS4)-1)
+			return -1;
+		if (c == terminator)
+			return 0;
+		d->pos--; /* Push back the typecode */
+		if (dec_skip(d) < 0)
+			return -1;
+	}
+}
+
+
+/* Skip a text token or a variable length integer from a binary dump */
+static int dec_skipnumber(Decoder *d)
+{
+	if (d->binary)
+	{
+		for (;;)
+		{
+			if (dec_need(d, 1) < 0)
+				return -1;
+			if (((const unsigned char *)d->data)[d->pos++] < 0x80)
+				return 0;
+		}
+	}
+	else
+	{
+		Py_ssize_t end = dec_token(d);
+		if (end < 0)
+			return -1;
+		d->pos = end;
+		return 0;
+	}
+}
+
+
+static int dec_skipstr(Decoder *d)
+{
+	if (d->binary)
+	{
+		unsigned long long size;
+		int result = dec_varint(d, &size);
+		if (result < 0)
+			return -1;
+		if (result > 0 || size > PY_SSIZE_T_MAX)
+		{
+			PyErr_SetString(PyExc_ValueError, "broken UL4ON stream: string too long");
+			return -1;
+		}
+		if (dec_need(d, (Py_ssize_t)size) < 0)
+			return -1;
+		d->pos += (Py_ssize_t)size;
+		return 0;
+	}
+	else
+	{
+		Py_UCS4 delimiter;
+		Py_ssize_t end;
+		if (dec_need(d, 1) < 0)
+			return -1;
+		delimiter = dec_char(d, d->pos);
+		end = ++d->pos;
+		for (;;)
+		{
+			Py_UCS4 c;
+			if (end >= d->len)
+			{
+				Py_ssize_t oldpos = d->pos;
+				int more = dec_fill(d);
+				if (more < 0)
+					return -1;
+				end += d->pos - oldpos;
+				if (end >= d->len && !more)
+				{
+					PyErr_SetNone(PyExc_EOFError);
+					return -1;
+				}
+				continue;
+			}
+			c = dec_char(d, end);
+			if (c == delimiter)
+				break;
+			end += (c == '\\') ? 2 : 1; /* Skip the character after the backslash too */
+		}
+		d->pos = end + 1;
+		return 0;
+	}
+}
+
+
+static int dec_skiptypecode(Decoder *d, Py_UCS4 typecode)
+{
+	Py_UCS4 lower = typecode;
+
+	if (typecode >= 'A' && typecode <= 'Z')
+	{
+		lower = typecode - 'A' + 'a';
+		if (strchr("nbifsczxrtmlydeop", (int)lower) == NULL)
+			return dec_skippython(d); /* Produce the appropriate exception */
+		/* Record a placeholder for the object that would be available for backreferences */
+		if (PyList_Append(d->objects, unloaded) < 0)
+			return -1;
+	}
+	switch (lower)
+	{
+		case '^':
+		case 'i':
+			return dec_skipnumber(d);
+		case 'n':
+			return 0;
+		case 'b':
+			if (dec_need(d, 1) < 0)
+				return -1;
+			d->pos++;
+			return 0;
+		case 'f':
+			if (d->binary)
+			{
+				if (dec_need(d, 8) < 0)
+					return -1;
+				d->pos += 8;
+				return 0;
+			}
+			return dec_skipnumber(d);
+		case 's':
+			return dec_skipstr(d);
+		case 'c':
+			return dec_skipcount(d, 4);
+		case 'z':
+			return dec_skipcount(d, 7);
+		case 'x':
+		case 't':
+			return dec_skipcount(d, 3);
+		case 'r':
+			return dec_skipcount(d, 2);
+		case 'm':
+			return dec_skipcount(d, 1);
+		case 'l':
+			return dec_skipitems(d, ']');
+		case 'y':
+		case 'd':
+		case 'e':
+			return dec_skipitems(d, '}');
+		case 'o':
+			return dec_skipcount(d, 1) < 0 ? -1 : dec_skipitems(d, ')');
+		case 'p':
+			return dec_skipcount(d, 2) < 0 ? -1 : dec_skipitems(d, ')');
+		default:
+			return dec_skippython(d); /* Produce the appropriate exception */
+	}
+}
+
+
+static int dec_skip(Decoder *d)
+{
+	int result;
+	Py_UCS4 typecode;
+
+	if (Py_EnterRecursiveCall(" while skipping UL4ON"))
+		return -1;
+	typecode = dec_nextchar(d);
+	if (typecode == (Py_UCS4)-1)
+		result = -1;
+	else
+	{
+		d->mark = d->pos - 1;
+		result = dec_skiptypecode(d, typecode);
+	}
+	Py_LeaveRecursiveCall();
+	return result;
+}
+
+
+/* Initialize ``d`` from the ``ll.ul4on.Decoder`` object ``decoder`` */
+static int dec_init(Decoder *d, PyObject *decoder)
+{
+	PyObject *binary;
+
+	memset(d, 0, sizeof(*d));
+	d->decoder = decoder;
+	if ((binary = PyObject_GetAttr(decoder, str_binary)) == NULL)
+		return -1;
+	d->binary = PyObject_IsTrue(binary);
+	Py_DECREF(binary);
+	if (d->binary < 0)
+		return -1;
+	if ((d->objects = PyObject_GetAttr(decoder, str_objects)) == NULL)
+		return -1;
+	if ((d->keycache = PyObject_GetAttr(decoder, str_keycache)) == NULL)
+		return -1;
+	if ((d->stack = PyObject_GetAttr(decoder, str_stack)) == NULL)
+		return -1;
+	if (!PyList_Check(d->objects) || !PyDict_Check(d->keycache) || !PyList_Check(d->stack))
+	{
+		PyErr_SetString(PyExc_TypeError, "unexpected decoder state");
+		return -1;
+	}
+	return dec_get(d);
+}
+
+
+static void dec_clear(Decoder *d)
+{
+	if (d->hasview)
+		PyBuffer_Release(&d->view);
+	Py_XDECREF(d->buffer);
+	Py_XDECREF(d->stack);
+	Py_XDECREF(d->keycache);
+	Py_XDECREF(d->objects);
+}
+
+
+static PyObject *load(PyObject *self, PyObject *decoder)
+{
+	Decoder d;
+	PyObject *result = NULL;
+
+	if (dec_init(&d, decoder) >= 0)
+	{
+		result = dec_load(&d);
+		if (dec_set(&d) < 0)
+			Py_CLEAR(result);
+	}
+	dec_clear(&d);
+	return result;
+}
+
+
+static char load_doc[] = PyDoc_STR(
+	"load(decoder)\n\
+	\n\
+	Load the next object with the :class:`ll.ul4on.Decoder` ``decoder`` from its\n\
+	input buffer."
+);
+
+
+static PyObject *skip(PyObject *self, PyObject *decoder)
+{
+	Decoder d;
+	int result = -1;
+
+	if (dec_init(&d, decoder) >= 0)
+	{
+		result = dec_skip(&d);
+		if (dec_set(&d) < 0)
+			result = -1;
+	}
+	dec_clear(&d);
+	if (result < 0)
+		return NULL;
+	Py_RETURN_NONE;
+}
+
+
+static char skip_doc[] = PyDoc_STR(
+	"skip(decoder)\n\
+	\n\
+	Skip the next object in the input buffer of the :class:`ll.ul4on.Decoder`\n\
+	``decoder`` without creating it (but record placeholders for the objects\n\
+	that would be available for backreferences)."
+);
+
+
+static PyObject *init(PyObject *self, PyObject *args)
+{
+	PyObject *objects[12];
+
+	if (!PyArg_UnpackTuple(args, "init", 12, 12, &objects[0], &objects[1], &objects[2], &objects[3], &objects[4], &objects[5], &objects[6], &objects[7], &objects[8], &objects[9], &objects[10], &objects[11]))
+		return NULL;
+	if (!PyDict_Check(objects[2]))
+	{
+		PyErr_SetString(PyExc_TypeError, "encodercache must be a dict");
+		return NULL;
+	}
+	Py_XSETREF(streamed, Py_NewRef(objects[0]));
+	Py_XSETREF(unloaded, Py_NewRef(objects[1]));
+	Py_XSETREF(encodercache, Py_NewRef(objects[2]));
+	Py_XSETREF(encoderfor, Py_NewRef(objects[3]));
+	Py_XSETREF(dump_none, Py_NewRef(objects[4]));
+	Py_XSETREF(dump_bool, Py_NewRef(objects[5]));
+	Py_XSETREF(dump_int, Py_NewRef(objects[6]));
+	Py_XSETREF(dump_float, Py_NewRef(objects[7]));
+	Py_XSETREF(dump_str, Py_NewRef(objects[8]));
+	Py_XSETREF(dump_list, Py_NewRef(objects[9]));
+	Py_XSETREF(dump_dict, Py_NewRef(objects[10]));
+	Py_XSETREF(dump_set, Py_NewRef(objects[11]));
+	Py_RETURN_NONE;
+}
+
+
+static char init_doc[] = PyDoc_STR(
+	"init(streamed, unloaded, encodercache, encoderfor, dump_none, dump_bool, dump_int, dump_float, dump_str, dump_list, dump_dict, dump_set)\n\
+	\n\
+	Pass the objects from :mod:`ll.ul4on` required by :func:`dump`, :func:`load`\n\
+	and :func:`skip`."
+);
+
+
+static PyMethodDef _functions[] = {
+	{"init", (PyCFunction)init, METH_VARARGS,     init_doc},
+	{"dump", (PyCFunction)(void(*)(void))dump, METH_FASTCALL, dump_doc},
+	{"load", (PyCFunction)load, METH_O,           load_doc},
+	{"skip", (PyCFunction)skip, METH_O,           skip_doc},
+	{NULL,   NULL} /* sentinel */
+};
+
+static char module__doc__[] = PyDoc_STR(
+	"This module contains a C implementation of the hot paths of\n\
+	:meth:`ll.ul4on.Encoder.dump` and :meth:`ll.ul4on.Decoder.load`."
+);
+
+
+static int _ul4on_exec(PyObject *module)
+{
+#define INTERN(var, value) if ((var == NULL) && ((var = PyUnicode_InternFromString(value)) == NULL)) return -1
+	INTERN(str_stream, "stream");
+	INTERN(str_write, "write");
+	INTERN(str_binary, "binary");
+	INTERN(str_first, "_first");
+	INTERN(str_objects, "_objects");
+	INTERN(str_id2index, "_id2index");
+	INTERN(str_str2index, "_str2index");
+	INTERN(str_scalarbackrefs, "scalarbackrefs");
+	INTERN(str_maxbackrefs, "maxbackrefs");
+	INTERN(str_items, "items");
+	INTERN(str_buffer, "_buffer");
+	INTERN(str_pos, "_pos");
+	INTERN(str_fill, "_fill");
+	INTERN(str_loadpy, "_loadpy");
+	INTERN(str_skippy, "_skippy");
+	INTERN(str_keycache, "_keycache");
+	INTERN(str_stack, "_stack");
+	INTERN(str_list, "list");
+	INTERN(str_set, "set");
+	INTERN(str_dict, "dict");
+	INTERN(str_odict, "odict");
+#undef INTERN
+	return 0;
+}
+
+
+static PyModuleDef_Slot _ul4on_slots[] = {
+	{Py_mod_exec, _ul4on_exec},
+	{0, NULL}
+};
+
+static struct PyModuleDef _ul4on_module = {
+	PyModuleDef_HEAD_INIT,
+	.m_name = "_ul4on",
+	.m_doc = module__doc__, /* module doc */
+	.m_size = 0,
+	.m_methods = _functions,
+	.m_slots = _ul4on_slots
+};
+
+PyMODINIT_FUNC
+PyInit__ul4on(void)
+{
+	return PyModuleDef_Init(&_ul4on_module);
+}
@@ -121,6 +121,18 @@ Options
 	``keep``, ``strip``, or ``smart``). This can of course be overwritten with
 	the template tag ``<?whitespace ...?>`` in the template files.
 
+.. option:: --profile <flag>
+
+	If true, profile rendering the template and print the template locations
+	where most of the time was spent to ``stderr`` (see
+	:class:`ll.ul4c.Profiler`). (Valid flag values are ``false``, ``no``,
+	``0``, ``true``, ``yes`` or ``1``; the default is ``false``)
+
+.. option:: --profile_limit <count>
+
+	The number of template locations printed by :option:`--profile`
+	(default 20).
+
 .. option:: -D, --define
 
 	Defines an additional variable that will be available inside the template
@@ -837,19 +849,31 @@ def main(args=None):
 	p.add_argument("-D", "--define", dest="vars", metavar="var=value", help="Pass additional parameters to the template (can be specified multiple times).", action="append", type=define)
 	p.add_argument(      "--oracle_thick", dest="oracle_thick", help="Use oracledb's 'thick' mode for Oracle connections?", default=False, action=misc.FlagAction)
 	p.add_argument(      "--oracle_config_dir", dest="oracle_config_dir", metavar="DIR", help="Directory that contains 'tnsnames.ora', if it should be used for Oracle connections.")
+	p.add_argument(      "--profile", dest="profile", help="Print where rendering the template spends its time? (default %(default)s)", default=False, action=misc.FlagAction)
+	p.add_argument(      "--profile_limit", dest="profile_limit", metavar="COUNT", help="Number of template locations printed by --profile (default %(default)s)", type=int, default=20)
 
 	args = p.parse_args(args)
 
 	maintemplate = globals.from_args(args)
 
-	if args.stacktrace == "short":
-		try:
-			maintemplate.render(sys.stdout, globals=globals)
-		except Exception as exc:
-			print_exception_chain(exc)
-			return 1
-	else:
-		maintemplate.render(sys.stdout, globals=globals)
+	profiler = ul4c.Profiler() if args.profile else None
+
+	def render():
+		maintemplate.ul4_render(ul4c.Context(None, sys.stdout, profiler), globals=globals)
+		sys.stdout.flush()
+
+	try:
+		if args.stacktrace == "short":
+			try:
+				render()
+			except Exception as exc:
+				print_exception_chain(exc)
+				return 1
+		else:
+			render()
+	finally:
+		if profiler is not None:
+			print(profiler.report(limit=args.profile_limit), file=sys.stderr)
 
 
 if __name__ == "__main__":
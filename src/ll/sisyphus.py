@@ -1417,12 +1417,12 @@ class Job:
 			result = self.healthcheck()
 			raise SystemExit(result)
 
-		self._formatlogline = ul4c.Template(self.formatlogline, "formatlogline", whitespace="strip") # Log line formatting template
-		self._formatemailsubject = ul4c.Template(self.formatemailsubject, "formatemailsubject", whitespace="strip") # Email subject formatting template
-		self._formatemailbodytext = ul4c.Template(self.formatemailbodytext, "formatemailbodytext", whitespace="strip") # Email body formatting template (plain text)
-		self._formatemailbodyhtml = ul4c.Template(self.formatemailbodyhtml, "formatemailbodyhtml", whitespace="strip") # Email body formatting template (HTML)
-		self._formatmattermosttitle = ul4c.Template(self.formatmattermosttitle, "formatmattermosttitle", whitespace="strip") # Mattermost chat title formatting template
-		self._formatmattermostmessage = ul4c.Template(self.formatmattermostmessage, "formatmattermostmessage", whitespace="strip") # Mattermost chat message formatting template
+		self._formatlogline = ul4c.templatecache.template(self.formatlogline, "formatlogline", whitespace="strip") # Log line formatting template
+		self._formatemailsubject = ul4c.templatecache.template(self.formatemailsubject, "formatemailsubject", whitespace="strip") # Email subject formatting template
+		self._formatemailbodytext = ul4c.templatecache.template(self.formatemailbodytext, "formatemailbodytext", whitespace="strip") # Email body formatting template (plain text)
+		self._formatemailbodyhtml = ul4c.templatecache.template(self.formatemailbodyhtml, "formatemailbodyhtml", whitespace="strip") # Email body formatting template (HTML)
+		self._formatmattermosttitle = ul4c.templatecache.template(self.formatmattermosttitle, "formatmattermosttitle", whitespace="strip") # Mattermost chat title formatting template
+		self._formatmattermostmessage = ul4c.templatecache.template(self.formatmattermostmessage, "formatmattermostmessage", whitespace="strip") # Mattermost chat message formatting template
 
 		# Obtain a lock on the script file to make sure we're the only one running
 		with open(misc.sysinfo.script_name, "rb") as f:
@@ -2205,8 +2205,7 @@ class StreamLogger(Logger):
 	def log(self, timestamp:datetime.datetime, tags:Tags, tasks:List[Task], text:str) -> None:
 		for line in _formatlines(text):
 			line = self.linetemplate.renders(line=line, time=timestamp, tags=tags, tasks=tasks, sysinfo=misc.sysinfo, job=self.job, env=env)
-			self.stream.write(line)
-			self.stream.write("\n")
+			self.stream.write(f"{line}\n")
 			self.lineno += 1
 		self.stream.flush()
 
@@ -2397,7 +2396,9 @@ class EmailLogger(Logger):
 					filename.parent.mkdir(parents=True)
 					file = filename.open("w", encoding="utf-8", buffering=1)
 				self.file = file
-				self.encoder = ul4on.Encoder()
+				# The encoder is used for the complete job run, so limit the number
+				# of objects it keeps alive for backreferences
+				self.encoder = ul4on.Encoder(dedupstrings=True, maxbackrefs=10000)
 			data = {"timestamp": timestamp, "tags": tags, "tasks": [t.asdict() for t in tasks]}
 			if isinstance(text, BaseException):
 				data["type"] = "exception"
@@ -23,14 +23,13 @@ possible to implement template renderers in multiple programming languages.
 __docformat__ = "reStructuredText"
 
 
-import re, io, os.path, datetime, urllib.parse as urlparse, json, collections
+import sys, re, io, os.path, datetime, urllib.parse as urlparse, json, collections
 import locale, itertools, random, functools, math, inspect, contextlib
-import types, textwrap, decimal, operator
+import types, textwrap, decimal, operator, threading, hashlib, tempfile, queue, pickle, time
+import concurrent.futures
 
 from collections import abc
 
-import antlr3
-
 
 # Regular expression used for splitting dates in isoformat
 _datesplitter = re.compile("[-T:.]")
@@ -39,6 +38,10 @@ _datesplitter = re.compile("[-T:.]")
 _defaultitem = object()
 
 
+# Marks a slot for a local variable that hasn't been assigned yet
+_unset = object()
+
+
 def register(name):
 	from ll import ul4on
 
@@ -129,6 +132,129 @@ class XMLEscapeStream:
 		self.close()
 
 
+class BufferedStream:
+	"""
+	Output stream that collects all writes and passes them on to the
+	underlying stream ``stream`` in chunks of (at least) ``bufsize``
+	characters.
+
+	Rendering a template produces lots of small strings (one for each piece
+	of literal text, each ``<?print?>`` tag and each indentation). Wrapping
+	the target stream in a :class:`!BufferedStream` reduces the number of
+	calls to the :meth:`write` method of the target stream (and for files and
+	sockets the number of system calls).
+
+	Calling :meth:`flush` writes the remaining output to ``stream`` and
+	flushes ``stream``.
+	"""
+	def __init__(self, stream, bufsize=65536):
+		self.stream = stream
+		self.bufsize = bufsize
+		self._buffer = []
+		self._size = 0
+
+	def write(self, text):
+		self._buffer.append(text)
+		self._size += len(text)
+		if self._size >= self.bufsize:
+			self._flushbuffer()
+
+	def writelines(self, lines):
+		for line in lines:
+			self.write(line)
+
+	def _flushbuffer(self):
+		if self._buffer:
+			chunk = "".join(self._buffer)
+			self._buffer = []
+			self._size = 0
+			self.stream.write(chunk)
+
+	def flush(self):
+		self._flushbuffer()
+		flush = getattr(self.stream, "flush", None)
+		if flush is not None:
+			flush()
+
+	def close(self):
+		self._flushbuffer()
+		self.stream.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+class _RenderCancelled(BaseException):
+	# Raised in the rendering thread of :meth:`Template.iterrender` when
+	# the consumer has stopped the iteration. (This is a :class:`BaseException`
+	# so that it doesn't get decorated with location information.)
+	pass
+
+
+def _iterchunks(render, chunksize):
+	"""
+	Call ``render(stream)`` in a separate thread and produce the output
+	written to ``stream`` in chunks of about ``chunksize`` characters.
+
+	At most two chunks are kept in memory, i.e. the rendering thread waits
+	until the consumer has fetched the chunks. Exceptions raised by
+	``render`` are reraised in the consumer. When the consumer stops the
+	iteration, rendering will be aborted on the next chunk.
+	"""
+	chunks = queue.Queue(maxsize=1)
+	cancelled = threading.Event()
+
+	def put(item):
+		# Wait until ``item`` can be put into the queue (or the consumer has
+		# stopped the iteration)
+		while True:
+			if cancelled.is_set():
+				raise _RenderCancelled()
+			try:
+				chunks.put(item, timeout=0.1)
+			except queue.Full:
+				pass
+			else:
+				return
+
+	class Target:
+		def write(self, chunk):
+			put((chunk, None))
+
+	def run():
+		try:
+			stream = BufferedStream(Target(), chunksize)
+			render(stream)
+			stream._flushbuffer()
+		except _RenderCancelled:
+			return
+		except BaseException as exc:
+			result = (None, exc)
+		else:
+			result = (None, None)
+		try:
+			put(result)
+		except _RenderCancelled:
+			pass
+
+	thread = threading.Thread(target=run, name="ul4 iterrender", daemon=True)
+	thread.start()
+	try:
+		while True:
+			(chunk, exc) = chunks.get()
+			if chunk is not None:
+				yield chunk
+			elif exc is not None:
+				raise exc
+			else:
+				break
+	finally:
+		cancelled.set()
+
+
 error_underline = os.environ.get("LL_UL4_ERRORUNDERLINE", "~")[:1] or "~"
 
 
@@ -207,6 +333,58 @@ class BlockError(Exception):
 		return self.message
 
 
+class LimitError(Exception):
+	"""
+	Base class of the exceptions that are raised when rendering or calling a
+	template exceeds one of the limits of the :class:`Context` (see
+	:class:`Context` for more info).
+	"""
+
+	def __init__(self, limit):
+		self.limit = limit
+
+
+class StepLimitError(LimitError):
+	"""
+	Exception that is raised when more than ``maxsteps`` loop iterations
+	(including those of comprehensions and generator expressions) and template
+	calls have been executed.
+	"""
+
+	def __str__(self):
+		return f"more than {self.limit:,} steps executed"
+
+
+class OutputLimitError(LimitError):
+	"""
+	Exception that is raised when more than ``maxoutput`` characters of output
+	have been produced.
+	"""
+
+	def __str__(self):
+		return f"more than {self.limit:,} characters of output produced"
+
+
+class DepthLimitError(LimitError):
+	"""
+	Exception that is raised when templates calls are nested deeper than
+	``maxdepth``.
+	"""
+
+	def __str__(self):
+		return f"template calls nested deeper than {self.limit:,}"
+
+
+class TimeLimitError(LimitError):
+	"""
+	Exception that is raised when rendering or calling the template takes
+	longer than ``timeout`` seconds.
+	"""
+
+	def __str__(self):
+		return f"timeout of {self.limit:,} seconds exceeded"
+
+
 ###
 ### Exceptions used by the interpreted code for flow control
 ###
@@ -228,12 +406,45 @@ class Context:
 	"""
 	A :class:`Context` object stores the context of a call to a template. This
 	consists of local, global and builtin variables and the indent stack.
+
+	If ``profiler`` is a :class:`Profiler` object, it will collect timing
+	information while templates are rendered or called with this context.
+
+	For rendering untrusted templates, the resources they may use can be
+	limited. If a limit is exceeded, an exception (an instance of a subclass of
+	:class:`LimitError`) will be raised:
+
+	``maxsteps``
+		The maximum number of steps, i.e. iterations of ``<?for?>`` and
+		``<?while?>`` loops, of comprehensions and generator expressions and
+		calls or renders of templates (:class:`StepLimitError`);
+
+	``maxoutput``
+		The maximum number of characters output by templates
+		(:class:`OutputLimitError`). This includes output that doesn't end up
+		in ``stream``, e.g. the output of ``renders()``;
+
+	``maxdepth``
+		The maximum nesting depth of template calls or renders
+		(:class:`DepthLimitError`);
+
+	``timeout``
+		The maximum number of seconds (measured from the creation of the
+		:class:`!Context`) that rendering or calling templates may take
+		(:class:`TimeLimitError`). This is only checked at steps, so
+		e.g. a single slow function call can't be interrupted.
+
+	:const:`None` means no limit. The number of steps executed so far is
+	available as the attribute ``steps``.
 	"""
 
 	# "Builtin" functions, types and modules. Will be exposed to UL4 code
 	builtins = {}
 
-	def __init__(self, globals=None, stream=None):
+	# How many steps may be executed between two checks of the timeout
+	checkinterval = 100
+
+	def __init__(self, globals=None, stream=None, profiler=None, *, maxsteps=None, maxoutput=None, maxdepth=None, timeout=None):
 		self._globals = globals if globals is not None else {}
 		if not self.builtins:
 			self.add_builtins()
@@ -241,7 +452,42 @@ class Context:
 		self.indents = [] # Stack of additional indentations for the ``<?render?>`` tag
 		self.escapes = [] # Stack of functions for escaping the output
 		self.asts = [] # Call stack (of :class:`AST` objects)
+		self.slots = None # Local variables of the current template (see :meth:`Template._resolve`)
 		self.stream = stream if stream is not None else NullStream()
+		self.profiler = profiler
+		self.maxsteps = maxsteps
+		self.maxoutput = maxoutput
+		self.maxdepth = maxdepth
+		self.timeout = timeout
+		self.deadline = time.monotonic() + timeout if timeout is not None else None
+		self.steps = 0
+		self.depth = 0
+		self._output = 0 # Number of characters output so far (if ``maxoutput`` is set)
+		self._setnextcheck()
+
+	def _setnextcheck(self):
+		# Set the step count at which :meth:`_checklimits` has to be called next
+		nextcheck = sys.maxsize
+		if self.deadline is not None:
+			nextcheck = self.steps + self.checkinterval
+		if self.maxsteps is not None:
+			nextcheck = min(nextcheck, self.maxsteps)
+		self._nextcheck = nextcheck
+
+	def _step(self):
+		# Count a step (an iteration of a loop or comprehension or a call or
+		# render of a template) and check the limits if necessary
+		self.steps += 1
+		if self.steps > self._nextcheck:
+			self._checklimits()
+
+	def _checklimits(self):
+		# Called when ``self.steps`` exceeds ``self._nextcheck``
+		if self.maxsteps is not None and self.steps > self.maxsteps:
+			raise StepLimitError(self.maxsteps)
+		if self.deadline is not None and time.monotonic() > self.deadline:
+			raise TimeLimitError(self.timeout)
+		self._setnextcheck()
 
 	@property
 	def globals(self):
@@ -501,14 +747,173 @@ class Context:
 			self.stream = oldstream
 
 	def write(self, string):
+		# The output is counted here (and not in the stream), so that output
+		# into streams installed via :meth:`replacestream` (e.g. by ``renders()``)
+		# counts too
+		if self.maxoutput is not None:
+			self._output += len(string)
+			if self._output > self.maxoutput:
+				raise OutputLimitError(self.maxoutput)
 		self.stream.write(string)
 
 
+class Profiler:
+	"""
+	A :class:`!Profiler` collects timing information while templates are
+	rendered or called with a :class:`Context` whose ``profiler`` is the
+	:class:`!Profiler`, e.g.::
+
+		profiler = ul4c.Profiler()
+		template.ul4_render(ul4c.Context(None, sys.stdout, profiler), **vars)
+		print(profiler.report(limit=20))
+
+	For each template and each AST node the profiler counts how often it has
+	been evaluated (or rendered or called for templates) and measures the
+	cumulative time (including the time spent in nested AST nodes and
+	templates) and the own time (excluding it). Results for nodes at the same
+	source location are aggregated (e.g. if a template has been loaded
+	multiple times).
+
+	AST nodes are only timed with the ``"ast"`` backend and the ``"eager"``
+	error tracking mode (see :func:`set_errortracking`). Otherwise only
+	templates are timed.
+	"""
+
+	def __init__(self):
+		self._nodes = {}
+		self._templates = {}
+		self._active = [] # Stack of the nodes and templates that are currently timed
+		self._children = [] # Time spent in nested nodes for each active node
+
+	def _enter(self, entries, obj):
+		# Start timing the node or template ``obj`` and return a token for :meth:`_leave`
+		active = self._active
+		if active and active[-1] is obj:
+			# The node evaluates itself recursively (e.g. the content of a ``<?for?>``
+			# loop), this is part of the current evaluation
+			return None
+		try:
+			entry = entries[obj]
+		except KeyError:
+			# Count, cumulative time, own time and recursion depth
+			entry = entries[obj] = [0, 0.0, 0.0, 0]
+		entry[3] += 1
+		active.append(obj)
+		self._children.append(0.0)
+		return (entry, time.perf_counter())
+
+	def _leave(self, token):
+		if token is None:
+			return
+		(entry, start) = token
+		elapsed = time.perf_counter() - start
+		self._active.pop()
+		children = self._children
+		entry[0] += 1
+		entry[2] += elapsed - children.pop()
+		entry[3] -= 1
+		# Only count the outermost call of a recursive template in the cumulative time
+		if not entry[3]:
+			entry[1] += elapsed
+		if children:
+			children[-1] += elapsed
+
+	def stats(self, sort="owntime"):
+		"""
+		Return the collected timing information as a list of dictionaries, one
+		for each template and source location. Each dictionary has the
+		following keys:
+
+		``kind``
+			``"template"`` (for rendering or calling a template) or ``"node"``
+			(for evaluating an AST node);
+
+		``template``
+			The full name of the template;
+
+		``type``
+			The type of the AST node (e.g. ``"PrintAST"``);
+
+		``line``, ``col``
+			The position of the node or template in the template source;
+
+		``source``
+			The source code of the node (for block nodes just the start tag);
+
+		``count``
+			How often the node has been evaluated or the template has been
+			rendered or called;
+
+		``cumtime``, ``owntime``
+			The cumulative and own time (in seconds).
+
+		The list is sorted by ``sort`` (``"owntime"``, ``"cumtime"`` or
+		``"count"``) in descending order.
+		"""
+		if sort not in ("owntime", "cumtime", "count"):
+			raise ValueError(f"sort key {sort!r} unknown")
+		stats = {}
+		for (kind, entries) in (("template", self._templates), ("node", self._nodes)):
+			for (node, (count, cumtime, owntime, depth)) in entries.items():
+				if kind == "template":
+					template = node
+				else:
+					# The definition of a locally defined template belongs to the parent template
+					template = node.parenttemplate if isinstance(node, Template) else node.template
+				source = template.fullname if kind == "template" else node.startsource
+				key = (kind, template.fullname, type(node).__name__, node.startline, node.startcol, source)
+				try:
+					stat = stats[key]
+				except KeyError:
+					stats[key] = dict(zip(("kind", "template", "type", "line", "col", "source"), key), count=count, cumtime=cumtime, owntime=owntime)
+				else:
+					stat["count"] += count
+					stat["cumtime"] += cumtime
+					stat["owntime"] += owntime
+		return sorted(stats.values(), key=lambda stat: stat[sort], reverse=True)
+
+	def report(self, format="text", sort="owntime", limit=None):
+		"""
+		Return a report of the collected timing information as a string.
+
+		``format`` can be ``"text"`` (a table for humans), ``"json"`` or
+		``"ul4on"`` (the result of :meth:`stats` as JSON or UL4ON). ``sort``
+		is passed to :meth:`stats` and ``limit`` limits the number of entries
+		in the report.
+		"""
+		stats = self.stats(sort)[:limit]
+		if format == "json":
+			return json.dumps(stats)
+		elif format == "ul4on":
+			from ll import ul4on
+			return ul4on.dumps(stats)
+		elif format != "text":
+			raise ValueError(f"report format {format!r} unknown")
+		lines = [f"{'count':>10} {'cumtime':>10} {'owntime':>10}  location"]
+		for stat in stats:
+			location = f"{stat['template'] or '?'}:{stat['line']}:{stat['col']}"
+			if stat["kind"] == "template":
+				what = "template"
+			else:
+				source = stat["source"].replace("\n", " ")
+				if len(source) > 60:
+					source = f"{source[:59]}…"
+				what = f"{stat['type']} {source}"
+			lines.append(f"{stat['count']:>10,} {stat['cumtime']*1000:>8.2f}ms {stat['owntime']*1000:>8.2f}ms  {location} {what}")
+		return "\n".join(lines)
+
+
 ###
 ### Helper functions
 ###
 
 def _decorateexception(exc, ast, obj=None):
+	if _errortracking == "lazy":
+		_locateevalframes(exc)
+	_attachlocation(exc, ast, obj)
+
+
+def _attachlocation(exc, ast, obj=None):
 	# Find the end of the exception chain
 	while exc.__cause__:
 		exc = exc.__cause__
@@ -517,6 +922,27 @@ def _decorateexception(exc, ast, obj=None):
 		exc.__cause__ = LocationError(ast)
 
 
+def _locateevalframes(exc):
+	"""
+	Attach the location of the innermost AST node whose :meth:`eval` method
+	(or :meth:`evalset` etc.) appears in the traceback of ``exc``.
+
+	This is used by the ``"lazy"`` error tracking mode (see
+	:func:`set_errortracking`) to reconstruct the location information that
+	the ``"eager"`` mode attaches while the exception propagates.
+	"""
+	if isinstance(exc, (BreakException, ContinueException, ReturnException)):
+		return
+	node = None
+	tb = exc.__traceback__
+	while tb is not None:
+		if tb.tb_frame.f_code in _evalcodes:
+			node = tb.tb_frame.f_locals.get("self", node)
+		tb = tb.tb_next
+	if node is not None:
+		_attachlocation(exc, node)
+
+
 def _handleeval(f):
 	"""
 	Decorator for an implementation of the :meth:`eval` method that does not
@@ -529,6 +955,9 @@ def _handleeval(f):
 	@functools.wraps(f)
 	def wrapped(self, context, /, *args, **kwargs):
 		context.asts.append(self)
+		profiler = context.profiler
+		if profiler is not None:
+			token = profiler._enter(profiler._nodes, self)
 		try:
 			return f(self, context, *args, **kwargs)
 		except (BreakException, ContinueException, ReturnException):
@@ -538,10 +967,61 @@ def _handleeval(f):
 			_decorateexception(exc, self)
 			raise
 		finally:
+			if profiler is not None:
+				profiler._leave(token)
 			context.asts.pop()
+	_evalfunctions[wrapped] = f
+	_evalcodes.add(f.__code__)
 	return wrapped
 
 
+# How the location of exceptions is tracked (see :func:`set_errortracking`)
+_errortracking = "eager"
+
+# Maps the methods wrapped by :func:`_handleeval` to the original methods
+_evalfunctions = {}
+
+# The code objects of the original methods (used for finding them in tracebacks)
+_evalcodes = set()
+
+
+def set_errortracking(mode):
+	"""
+	Set how the ``"ast"`` backend of :class:`Template` tracks the template
+	location of exceptions. ``mode`` can be:
+
+	``"eager"``
+		Each AST node maintains the call stack in ``context.asts`` and attaches
+		its location to exceptions propagating through it. This is the default.
+
+	``"lazy"``
+		AST nodes do no bookkeeping at all. Only when an exception leaves a
+		template (or a call or ``<?render?>`` tag), its location will be
+		reconstructed from the Python traceback. This makes rendering faster,
+		but ``context.asts`` will always be empty.
+
+	Both modes produce the same exception chains. This setting affects all
+	templates and can also be set via the environment variable
+	``LL_UL4_ERRORTRACKING``.
+	"""
+	global _errortracking
+	if mode not in ("eager", "lazy"):
+		raise ValueError(f"error tracking mode {mode!r} unknown")
+	_errortracking = mode
+	wrappers = {f: wrapped for (wrapped, f) in _evalfunctions.items()}
+	classes = [AST]
+	while classes:
+		cls = classes.pop()
+		classes.extend(cls.__subclasses__())
+		for (name, value) in list(vars(cls).items()):
+			if not isinstance(value, types.FunctionType):
+				continue
+			if mode == "lazy" and value in _evalfunctions:
+				setattr(cls, name, _evalfunctions[value])
+			elif mode == "eager" and value in wrappers:
+				setattr(cls, name, wrappers[value])
+
+
 def _unpackvar(lvalue, value):
 	"""
 	A generator used for recursively unpacking values for assignment.
@@ -685,6 +1165,13 @@ def _loadslice(decoder):
 			return None
 
 
+def _isconst(node):
+	# Return whether ``node`` is a constant whose value is immutable (so the
+	# value can be shared by all evaluations of e.g. a list literal)
+	from ll import misc, color
+	return isinstance(node, ConstAST) and (node.value is None or isinstance(node.value, (bool, int, float, str, datetime.date, datetime.timedelta, misc.monthdelta, color.Color)))
+
+
 ###
 ### Helper functions for the various UL4 functions
 ###
@@ -1647,6 +2134,34 @@ class AST:
 		"""
 		pass
 
+	# The following methods are used by the ``"python"`` backend of
+	# :class:`Template` (see :class:`_PythonSource`). The default implementations
+	# delegate to the tree walking interpreter, so AST classes that don't
+	# implement them still work.
+
+	def _pyexpr(self, source):
+		# Return Python source code for an expression evaluating this node
+		return f"{source.node(self)}.eval(context)"
+
+	def _pystmt(self, source):
+		# Generate Python statements for executing this node
+		source.line(source.mark(self, self._pyexpr(source)))
+
+	def _pyset(self, source, value):
+		# Generate Python statements for assigning ``value`` to this node
+		source.line(source.mark(self, f"{source.node(self)}.evalset(context, {value})"))
+
+	def _pymodify(self, source, operator, value):
+		# Generate Python statements for modifying this node with ``operator`` and ``value``
+		source.line(source.mark(self, f"{source.node(self)}.evalmodify(context, {source.const(operator)}, {value})"))
+
+	# The following method is used by the optimization pass (see the
+	# ``optimize`` argument of :class:`Template`). It optimizes the subnodes of
+	# the node and returns the node that should replace ``self`` (or
+	# :const:`None`, if the node can be dropped completely).
+	def _optimize(self):
+		return self
+
 	def ul4ondump(self, encoder):
 		encoder.dump(self.template)
 		_dumpslice(encoder, self._startpos)
@@ -1690,6 +2205,23 @@ class TextAST(AST):
 	def eval(self, context):
 		context.write(self.text)
 
+	def _pystmt(self, source):
+		if self.text:
+			source.line(f"_w({source.const(self.text)})")
+
+	@classmethod
+	def _make(cls, template, startpos, text):
+		# Create a node for the text ``text`` (which might differ from the source at ``startpos``)
+		node = cls(template)
+		node.startpos = startpos
+		node.text = text
+		return node
+
+	def _merge(self, other):
+		# Return a node that outputs the text of ``self`` followed by the text of ``other``
+		cls = IndentAST if isinstance(self, IndentAST) else TextAST
+		return cls._make(self.template, slice(self._startpos.start, other._startpos.stop), self.text + other.text)
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.text)
@@ -1726,6 +2258,10 @@ class IndentAST(TextAST):
 			context.write(indent)
 		context.write(self.text)
 
+	def _pystmt(self, source):
+		source.line("if context.indents: _w(''.join(context.indents))")
+		super()._pystmt(source)
+
 
 @register("lineend")
 class LineEndAST(TextAST):
@@ -1807,6 +2343,9 @@ class ConstAST(CodeAST):
 		# We don't need a decorator, because this can't fail anyway.
 		return self.value
 
+	def _pyexpr(self, source):
+		return source.const(self.value)
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.value)
@@ -1859,10 +2398,17 @@ class SeqItemAST(CodeAST):
 	def eval_list(self, context, result):
 		result.append(self.value.eval(context))
 
+	def _pyexpr(self, source):
+		return source.expr(self.value)
+
 	@_handleeval
 	def eval_set(self, context, result):
 		result.add(self.value.eval(context))
 
+	def _optimize(self):
+		self.value = self.value._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.value)
@@ -1909,12 +2455,20 @@ class UnpackSeqItemAST(CodeAST):
 		for item in self.value.eval(context):
 			result.append(item)
 
+	def _pyexpr(self, source):
+		# Calling :func:`iter` explicitely gives us a proper location when the ``*`` argument isn't iterable
+		return f"iter({source.expr(self.value)})"
+
 	@_handleeval
 	def eval_set(self, context, result):
 		# We're updating the result set here to get a proper location when the ``*`` argument isn't iterable
 		for item in self.value.eval(context):
 			result.add(item)
 
+	def _optimize(self):
+		self.value = self.value._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.value)
@@ -1966,6 +2520,14 @@ class DictItemAST(CodeAST):
 		value = self.value.eval(context)
 		result[key] = value
 
+	def _pyexpr(self, source):
+		return f"{source.expr(self.key)}: {source.expr(self.value)}"
+
+	def _optimize(self):
+		self.key = self.key._optimize()
+		self.value = self.value._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.key)
@@ -2012,6 +2574,14 @@ class UnpackDictItemAST(CodeAST):
 	def eval_dict(self, context, result):
 		result.update(self.item.eval(context))
 
+	def _pyexpr(self, source):
+		# :class:`dict` accepts the same arguments as :meth:`dict.update`
+		return f"dict({source.expr(self.item)})"
+
+	def _optimize(self):
+		self.item = self.item._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.item)
@@ -2064,6 +2634,13 @@ class PositionalArgumentAST(CodeAST):
 	def eval_call(self, context, args, kwargs):
 		args.append(self.value.eval(context))
 
+	def _pyexpr(self, source):
+		return source.expr(self.value)
+
+	def _optimize(self):
+		self.value = self.value._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.value)
@@ -2119,6 +2696,13 @@ class KeywordArgumentAST(CodeAST):
 			raise SyntaxError(f"duplicate keyword argument {self.name!r}")
 		kwargs[self.name] = self.value.eval(context)
 
+	def _pyexpr(self, source):
+		return source.expr(self.value)
+
+	def _optimize(self):
+		self.value = self.value._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.name)
@@ -2171,6 +2755,14 @@ class UnpackListArgumentAST(CodeAST):
 		for item in self.item.eval(context):
 			args.append(item)
 
+	def _pyexpr(self, source):
+		# Calling :func:`iter` explicitely gives us a proper location when the ``*`` argument isn't iterable
+		return f"iter({source.expr(self.item)})"
+
+	def _optimize(self):
+		self.item = self.item._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.item)
@@ -2228,6 +2820,13 @@ class UnpackDictArgumentAST(CodeAST):
 					raise SyntaxError(f"duplicate keyword argument {key!r}")
 				kwargs[key] = value
 
+	def _pyexpr(self, source):
+		return source.expr(self.item)
+
+	def _optimize(self):
+		self.item = self.item._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.item)
@@ -2253,6 +2852,9 @@ class ListAST(CodeAST):
 	ul4_type = Type("ul4")
 	ul4_attrs = CodeAST.ul4_attrs.union({"items"})
 
+	# If all items are constant, the optimization pass stores them here
+	_const = None
+
 	def __init__(self, template=None, startpos=None, *items):
 		super().__init__(template, startpos)
 		self.items = list(items)
@@ -2271,11 +2873,24 @@ class ListAST(CodeAST):
 
 	@_handleeval
 	def eval(self, context):
+		if self._const is not None:
+			return list(self._const)
 		result = []
 		for item in self.items:
 			item.eval_list(context, result)
 		return result
 
+	def _pyexpr(self, source):
+		if self._const is not None:
+			return f"list({source.const(self._const)})"
+		return f"[{', '.join(source.item(item) for item in self.items)}]"
+
+	def _optimize(self):
+		self.items = [item._optimize() for item in self.items]
+		if self.items and all(isinstance(item, SeqItemAST) and _isconst(item.value) for item in self.items):
+			self._const = tuple(item.value.value for item in self.items)
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.items)
@@ -2353,12 +2968,23 @@ class ListComprehensionAST(CodeAST):
 		with context.chainvars(): # Don't let loop variables leak into the surrounding scope
 			result = []
 			for item in container:
+				context._step()
 				for (lvalue, value) in _unpackvar(self.varname, item):
 					lvalue.evalset(context, value)
 				if self.condition is None or self.condition.eval(context):
 					result.append(self.item.eval(context))
 			return result
 
+	def _pyexpr(self, source):
+		return source.comprehension(self, "[]", lambda: source.line(f"_r.append({source.expr(self.item)})"))
+
+	def _optimize(self):
+		self.item = self.item._optimize()
+		self.container = self.container._optimize()
+		if self.condition is not None:
+			self.condition = self.condition._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.item)
@@ -2390,6 +3016,9 @@ class SetAST(CodeAST):
 	ul4_type = Type("ul4")
 	ul4_attrs = CodeAST.ul4_attrs.union({"items"})
 
+	# If all items are constant, the optimization pass stores them here
+	_const = None
+
 	def __init__(self, template=None, startpos=None, *items):
 		super().__init__(template, startpos)
 		self.items = list(items)
@@ -2408,11 +3037,26 @@ class SetAST(CodeAST):
 
 	@_handleeval
 	def eval(self, context):
+		if self._const is not None:
+			return set(self._const)
 		result = set()
 		for item in self.items:
 			item.eval_set(context, result)
 		return result
 
+	def _pyexpr(self, source):
+		if self._const is not None:
+			return f"set({source.const(self._const)})"
+		if not self.items:
+			return "set()"
+		return f"{{{', '.join(source.item(item) for item in self.items)}}}"
+
+	def _optimize(self):
+		self.items = [item._optimize() for item in self.items]
+		if self.items and all(isinstance(item, SeqItemAST) and _isconst(item.value) for item in self.items):
+			self._const = frozenset(item.value.value for item in self.items)
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.items)
@@ -2490,12 +3134,23 @@ class SetComprehensionAST(CodeAST):
 		with context.chainvars(): # Don't let loop variables leak into the surrounding scope
 			result = set()
 			for item in container:
+				context._step()
 				for (lvalue, value) in _unpackvar(self.varname, item):
 					lvalue.evalset(context, value)
 				if self.condition is None or self.condition.eval(context):
 					result.add(self.item.eval(context))
 		return result
 
+	def _pyexpr(self, source):
+		return source.comprehension(self, "set()", lambda: source.line(f"_r.add({source.expr(self.item)})"))
+
+	def _optimize(self):
+		self.item = self.item._optimize()
+		self.container = self.container._optimize()
+		if self.condition is not None:
+			self.condition = self.condition._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.item)
@@ -2527,6 +3182,9 @@ class DictAST(CodeAST):
 	ul4_type = Type("ul4")
 	ul4_attrs = CodeAST.ul4_attrs.union({"items"})
 
+	# If all items are constant, the optimization pass stores them here
+	_const = None
+
 	def __init__(self, template=None, startpos=None, *items):
 		super().__init__(template, startpos)
 		self.items = list(items)
@@ -2545,11 +3203,24 @@ class DictAST(CodeAST):
 
 	@_handleeval
 	def eval(self, context):
+		if self._const is not None:
+			return dict(self._const)
 		result = {}
 		for item in self.items:
 			item.eval_dict(context, result)
 		return result
 
+	def _pyexpr(self, source):
+		if self._const is not None:
+			return f"dict({source.const(self._const)})"
+		return f"{{{', '.join(source.item(item) for item in self.items)}}}"
+
+	def _optimize(self):
+		self.items = [item._optimize() for item in self.items]
+		if self.items and all(isinstance(item, DictItemAST) and _isconst(item.key) and _isconst(item.value) for item in self.items):
+			self._const = {item.key.value: item.value.value for item in self.items}
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.items)
@@ -2633,12 +3304,28 @@ class DictComprehensionAST(CodeAST):
 		with context.chainvars(): # Don't let loop variables leak into the surrounding scope
 			result = {}
 			for item in container:
+				context._step()
 				for (lvalue, value) in _unpackvar(self.varname, item):
 					lvalue.evalset(context, value)
 				if self.condition is None or self.condition.eval(context):
 					result[self.key.eval(context)] = self.value.eval(context)
 			return result
 
+	def _pyexpr(self, source):
+		def add():
+			# Evaluate the key first (like :meth:`eval` does)
+			source.line(f"_k = {source.expr(self.key)}")
+			source.line(f"_r[_k] = {source.expr(self.value)}")
+		return source.comprehension(self, "{}", add)
+
+	def _optimize(self):
+		self.key = self.key._optimize()
+		self.value = self.value._optimize()
+		self.container = self.container._optimize()
+		if self.condition is not None:
+			self.condition = self.condition._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.key)
@@ -2721,6 +3408,7 @@ class GeneratorExpressionAST(CodeAST):
 		try:
 			with context.chainvars(): # Don't let loop variables leak into the surrounding scope
 				for item in container:
+					context._step()
 					for (lvalue, value) in _unpackvar(self.varname, item):
 						lvalue.evalset(context, value)
 					if self.condition is None or self.condition.eval(context):
@@ -2731,6 +3419,16 @@ class GeneratorExpressionAST(CodeAST):
 			_decorateexception(exc, self)
 			raise
 
+	def _pyexpr(self, source):
+		return source.comprehension(self, None, lambda: source.line(f"yield {source.expr(self.item)}"))
+
+	def _optimize(self):
+		self.item = self.item._optimize()
+		self.container = self.container._optimize()
+		if self.condition is not None:
+			self.condition = self.condition._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.item)
@@ -2760,6 +3458,17 @@ class VarAST(CodeAST):
 	ul4_type = Type("ul4")
 	ul4_attrs = CodeAST.ul4_attrs.union({"name"})
 
+	# How the variable is looked up. This is set by :meth:`Template._resolve`:
+	# ``"local"`` (the variable is stored in the slot ``_slot`` of
+	# ``context.slots``), ``"global"`` or ``"builtin"`` (the variable can't be
+	# a local variable, so the global and builtin variables are checked
+	# directly). For :const:`None` the variable is looked up by name in
+	# ``context.vars``. This is also the fallback for local variables that
+	# haven't been assigned yet and for global and builtin variables that
+	# can't be found.
+	_scope = None
+	_slot = None
+
 	def __init__(self, template=None, startpos=None, name=None):
 		super().__init__(template, startpos)
 		self.name = name
@@ -2771,6 +3480,20 @@ class VarAST(CodeAST):
 
 	@_handleeval
 	def eval(self, context):
+		scope = self._scope
+		if scope == "local":
+			value = context.slots[self._slot]
+			if value is not _unset:
+				return value
+		elif scope is not None:
+			globals = context.globals
+			if self.name in globals:
+				return globals[self.name]
+			if scope == "builtin":
+				try:
+					return context.builtins[self.name]
+				except KeyError:
+					pass
 		try:
 			return context.vars[self.name]
 		except KeyError:
@@ -2778,11 +3501,44 @@ class VarAST(CodeAST):
 
 	@_handleeval
 	def evalset(self, context, value):
-		context.vars[self.name] = value
+		if self._scope == "local":
+			context.slots[self._slot] = value
+		else:
+			context.vars[self.name] = value
 
 	@_handleeval
 	def evalmodify(self, context, operator, value):
-		context.vars[self.name] = operator.evalfoldaug(context.vars[self.name], value)
+		if self._scope == "local":
+			oldvalue = context.slots[self._slot]
+			if oldvalue is _unset:
+				oldvalue = context.vars[self.name]
+			context.slots[self._slot] = operator.evalfoldaug(oldvalue, value)
+		else:
+			context.vars[self.name] = operator.evalfoldaug(context.vars[self.name], value)
+
+	def _pyexpr(self, source):
+		name = source.const(self.name)
+		if self._scope == "local":
+			return f"(_x if (_x := _s[{self._slot}]) is not _unset else _pygetvar(_v, {name}))"
+		elif self._scope == "global":
+			return f"(_g[{name}] if {name} in _g else _pygetvar(_v, {name}))"
+		elif self._scope == "builtin":
+			return f"(_g[{name}] if {name} in _g else _b[{name}] if {name} in _b else _pygetvar(_v, {name}))"
+		return f"_pygetvar(_v, {name})"
+
+	def _pyset(self, source, value):
+		if self._scope == "local":
+			source.line(f"{source.mark(self, f'_s[{self._slot}]')} = {value}")
+		else:
+			source.line(f"{source.mark(self, f'_v[{source.const(self.name)}]')} = {value}")
+
+	def _pymodify(self, source, operator, value):
+		name = source.const(self.name)
+		if self._scope == "local":
+			slot = f"_s[{self._slot}]"
+			source.line(source.mark(self, f"{slot} = {source.const(operator.evalfoldaug)}((_x if (_x := {slot}) is not _unset else _v[{name}]), {value})"))
+		else:
+			source.line(source.mark(self, f"_v[{name}] = {source.const(operator.evalfoldaug)}(_v[{name}], {value})"))
 
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
@@ -2850,6 +3606,35 @@ class BlockAST(CodeAST):
 		for node in self.content:
 			node.eval(context)
 
+	def _optimize(self):
+		self.content = self._optimizecontent(self.content)
+		return self
+
+	@staticmethod
+	def _optimizecontent(content):
+		# Optimize the nodes in the list ``content`` and return the new list of nodes
+		result = []
+		for node in content:
+			node = node._optimize()
+			if node is None:
+				continue
+			if isinstance(node, ConditionalBlocksAST) and isinstance(node.content[0], ElseBlockAST):
+				# An ``<?if?>`` block whose first condition is always true: Use the content directly
+				nodes = node.content[0].content
+			else:
+				nodes = (node,)
+			for node in nodes:
+				if isinstance(node, TextAST) and not isinstance(node, IndentAST):
+					if not node.text:
+						continue
+					# Merge adjacent text nodes (an :class:`IndentAST` can't be merged
+					# into the previous node, as it outputs the current indentation first)
+					if result and isinstance(result[-1], TextAST):
+						result[-1] = result[-1]._merge(node)
+						continue
+				result.append(node)
+		return result
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		_dumpslice(encoder, self.stoppos)
@@ -2911,6 +3696,42 @@ class ConditionalBlocksAST(BlockAST):
 				node.eval(context)
 				break
 
+	def _pystmt(self, source):
+		for node in self.content:
+			if isinstance(node, IfBlockAST):
+				source.line(source.mark(self, f"if {source.expr(node.condition)}:"))
+			elif isinstance(node, ElIfBlockAST):
+				source.line(source.mark(self, f"elif {source.expr(node.condition)}:"))
+			else:
+				source.line("else:")
+			source.indent()
+			source.stmts(node.content)
+			source.dedent()
+
+	def _optimize(self):
+		content = []
+		for block in self.content:
+			block = block._optimize()
+			if not isinstance(block, ElseBlockAST) and isinstance(block.condition, ConstAST) and not isinstance(block.condition.value, Undefined):
+				if not block.condition.value:
+					continue # This block will never be executed
+				# All remaining blocks can never be executed
+				elseblock = ElseBlockAST(block.template, block.startpos, block.stoppos)
+				elseblock.content = block.content
+				block = elseblock
+			elif not content and isinstance(block, ElIfBlockAST):
+				# The ``<?if?>`` block has been dropped, so the ``<?elif?>`` block replaces it
+				ifblock = IfBlockAST(block.template, block.startpos, block.stoppos, block.condition)
+				ifblock.content = block.content
+				block = ifblock
+			content.append(block)
+			if isinstance(block, ElseBlockAST):
+				break
+		if not content:
+			return None
+		self.content = content
+		return self
+
 
 @register("ifblock")
 class IfBlockAST(BlockAST):
@@ -2955,6 +3776,10 @@ class IfBlockAST(BlockAST):
 		yield from BlockAST._str(self)
 		yield -1
 
+	def _optimize(self):
+		self.condition = self.condition._optimize()
+		return super()._optimize()
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.condition)
@@ -3007,6 +3832,10 @@ class ElIfBlockAST(BlockAST):
 		yield from super()._str()
 		yield -1
 
+	def _optimize(self):
+		self.condition = self.condition._optimize()
+		return super()._optimize()
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.condition)
@@ -3087,6 +3916,10 @@ class ForBlockAST(BlockAST):
 		p.text("container=")
 		p.pretty(self.container)
 
+	def _optimize(self):
+		self.container = self.container._optimize()
+		return super()._optimize()
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.varname)
@@ -3110,6 +3943,7 @@ class ForBlockAST(BlockAST):
 	def eval(self, context):
 		container = self.container.eval(context)
 		for item in container:
+			context._step()
 			for (lvalue, value) in _unpackvar(self.varname, item):
 				lvalue.evalset(context, value)
 			try:
@@ -3119,6 +3953,15 @@ class ForBlockAST(BlockAST):
 			except ContinueException:
 				pass
 
+	def _pystmt(self, source):
+		item = source.temp()
+		source.line(source.mark(self, f"for {item} in {source.expr(self.container)}:"))
+		source.indent()
+		source.step(self)
+		source.assign(self, self.varname, item)
+		source.loop(self.content)
+		source.dedent()
+
 
 @register("whileblock")
 class WhileBlockAST(BlockAST):
@@ -3162,6 +4005,12 @@ class WhileBlockAST(BlockAST):
 		p.pretty(self.condition)
 		p.breakable()
 
+	def _optimize(self):
+		self.condition = self.condition._optimize()
+		if isinstance(self.condition, ConstAST) and not isinstance(self.condition.value, Undefined) and not self.condition.value:
+			return None # The loop body will never be executed
+		return super()._optimize()
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.condition)
@@ -3182,6 +4031,7 @@ class WhileBlockAST(BlockAST):
 	@_handleeval
 	def eval(self, context):
 		while 1:
+			context._step()
 			condition = self.condition.eval(context)
 			if not condition:
 				break
@@ -3192,6 +4042,13 @@ class WhileBlockAST(BlockAST):
 			except ContinueException:
 				pass
 
+	def _pystmt(self, source):
+		source.line(source.mark(self, f"while {source.expr(self.condition)}:"))
+		source.indent()
+		source.step(self)
+		source.loop(self.content)
+		source.dedent()
+
 
 @register("break")
 class BreakAST(CodeAST):
@@ -3208,6 +4065,11 @@ class BreakAST(CodeAST):
 	def eval(self, context):
 		raise BreakException()
 
+	def _pystmt(self, source):
+		# Outside of a loop we must be in the content of a ``<?renderblock?>``
+		# (which is a separate template), so use an exception in this case
+		source.line("break" if source.inloop() else "raise _BreakException()")
+
 
 @register("continue")
 class ContinueAST(CodeAST):
@@ -3224,6 +4086,9 @@ class ContinueAST(CodeAST):
 	def eval(self, context):
 		raise ContinueException()
 
+	def _pystmt(self, source):
+		source.line("continue" if source.inloop() else "raise _ContinueException()")
+
 
 @register("attr")
 class AttrAST(CodeAST):
@@ -3284,6 +4149,19 @@ class AttrAST(CodeAST):
 		newvalue = operator.evalfoldaug(oldvalue, value)
 		t.setattr(obj, self.attrname, newvalue)
 
+	def _pyexpr(self, source):
+		return f"_getattr({source.expr(self.obj)}, {source.const(self.attrname)})"
+
+	def _pyset(self, source, value):
+		source.line(source.mark(self, f"_setattr({source.expr(self.obj)}, {source.const(self.attrname)}, {value})"))
+
+	def _pymodify(self, source, operator, value):
+		source.line(source.mark(self, f"_pymodifyattr({source.expr(self.obj)}, {source.const(self.attrname)}, {source.const(operator.evalfoldaug)}, {value})"))
+
+	def _optimize(self):
+		self.obj = self.obj._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.obj)
@@ -3350,6 +4228,18 @@ class SliceAST(CodeAST):
 			index2 = self.index2.eval(context)
 		return slice(index1, index2)
 
+	def _pyexpr(self, source):
+		index1 = source.expr(self.index1) if self.index1 is not None else "None"
+		index2 = source.expr(self.index2) if self.index2 is not None else "None"
+		return f"slice({index1}, {index2})"
+
+	def _optimize(self):
+		if self.index1 is not None:
+			self.index1 = self.index1._optimize()
+		if self.index2 is not None:
+			self.index2 = self.index2._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.index1)
@@ -3389,6 +4279,12 @@ class UnaryAST(CodeAST):
 		p.breakable()
 		p.pretty(self.obj)
 
+	def _optimize(self):
+		self.obj = self.obj._optimize()
+		if isinstance(self.obj, ConstAST):
+			return self.make(self.template, self.startpos, self.obj)
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.obj)
@@ -3402,6 +4298,9 @@ class UnaryAST(CodeAST):
 		obj = self.obj.eval(context)
 		return self.evalfold(obj)
 
+	def _pyexpr(self, source):
+		return f"{source.const(self.evalfold)}({source.expr(self.obj)})"
+
 	@classmethod
 	def make(cls, tag, pos, obj):
 		if isinstance(obj, ConstAST):
@@ -3431,6 +4330,9 @@ class NotAST(UnaryAST):
 	def evalfold(cls, obj):
 		return not obj
 
+	def _pyexpr(self, source):
+		return f"(not {source.expr(self.obj)})"
+
 
 @register("neg")
 class NegAST(UnaryAST):
@@ -3449,6 +4351,9 @@ class NegAST(UnaryAST):
 	def evalfold(cls, obj):
 		return -obj
 
+	def _pyexpr(self, source):
+		return f"(-{source.expr(self.obj)})"
+
 
 @register("bitnot")
 class BitNotAST(UnaryAST):
@@ -3492,6 +4397,15 @@ class PrintAST(UnaryAST):
 	def eval(self, context):
 		context.write(_str(self.obj.eval(context)))
 
+	def _pystmt(self, source):
+		source.line(source.mark(self, f"_w(_str({source.expr(self.obj)}))"))
+
+	def _optimize(self):
+		self.obj = self.obj._optimize()
+		if isinstance(self.obj, ConstAST):
+			return TextAST._make(self.template, self.startpos, _str(self.obj.value))
+		return self
+
 
 @register("printx")
 class PrintXAST(UnaryAST):
@@ -3514,6 +4428,15 @@ class PrintXAST(UnaryAST):
 	def eval(self, context):
 		context.write(_xmlescape(self.obj.eval(context)))
 
+	def _pystmt(self, source):
+		source.line(source.mark(self, f"_w(_xmlescape({source.expr(self.obj)}))"))
+
+	def _optimize(self):
+		self.obj = self.obj._optimize()
+		if isinstance(self.obj, ConstAST):
+			return TextAST._make(self.template, self.startpos, _xmlescape(self.obj.value))
+		return self
+
 
 @register("return")
 class ReturnAST(UnaryAST):
@@ -3537,6 +4460,13 @@ class ReturnAST(UnaryAST):
 		value = self.obj.eval(context)
 		raise ReturnException(value)
 
+	def _pystmt(self, source):
+		source.line(source.mark(self, f"return {source.expr(self.obj)}"))
+
+	def _optimize(self):
+		self.obj = self.obj._optimize()
+		return self
+
 
 class BinaryAST(CodeAST):
 	"""
@@ -3571,6 +4501,13 @@ class BinaryAST(CodeAST):
 		p.breakable()
 		p.pretty(self.obj2)
 
+	def _optimize(self):
+		self.obj1 = self.obj1._optimize()
+		self.obj2 = self.obj2._optimize()
+		if isinstance(self.obj1, ConstAST) and isinstance(self.obj2, ConstAST):
+			return self.make(self.template, self.startpos, self.obj1, self.obj2)
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.obj1)
@@ -3581,12 +4518,20 @@ class BinaryAST(CodeAST):
 		self.obj1 = decoder.load()
 		self.obj2 = decoder.load()
 
+	# Python operator that implements :meth:`evalfold` (:const:`None` if there's none)
+	_pyoperator = None
+
 	@_handleeval
 	def eval(self, context):
 		obj1 = self.obj1.eval(context)
 		obj2 = self.obj2.eval(context)
 		return self.evalfold(obj1, obj2)
 
+	def _pyexpr(self, source):
+		if self._pyoperator is not None:
+			return f"({source.expr(self.obj1)} {self._pyoperator} {source.expr(self.obj2)})"
+		return f"{source.const(self.evalfold)}({source.expr(self.obj1)}, {source.expr(self.obj2)})"
+
 	@classmethod
 	def make(cls, tag, pos, obj1, obj2):
 		if isinstance(obj1, ConstAST) and isinstance(obj2, ConstAST):
@@ -3637,6 +4582,16 @@ class ItemAST(BinaryAST):
 		newvalue = operator.evalfoldaug(oldvalue, value)
 		obj1[obj2] = newvalue
 
+	def _pyset(self, source, value):
+		source.line(f"{source.mark(self, f'{source.expr(self.obj1)}[{source.expr(self.obj2)}]')} = {value}")
+
+	def _pymodify(self, source, operator, value):
+		obj1 = source.temp()
+		obj2 = source.temp()
+		source.line(f"{obj1} = {source.expr(self.obj1)}")
+		source.line(f"{obj2} = {source.expr(self.obj2)}")
+		source.line(source.mark(self, f"{obj1}[{obj2}] = {source.const(operator.evalfoldaug)}({obj1}[{obj2}], {value})"))
+
 
 @register("is")
 class IsAST(BinaryAST):
@@ -3654,6 +4609,8 @@ class IsAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "is"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 is obj2
@@ -3675,6 +4632,8 @@ class IsNotAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "is not"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 is not obj2
@@ -3696,6 +4655,8 @@ class EQAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "=="
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 == obj2
@@ -3717,6 +4678,8 @@ class NEAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "!="
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 != obj2
@@ -3738,6 +4701,8 @@ class LTAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "<"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 < obj2
@@ -3759,6 +4724,8 @@ class LEAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "<="
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 <= obj2
@@ -3780,6 +4747,8 @@ class GTAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = ">"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 > obj2
@@ -3801,6 +4770,8 @@ class GEAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = ">="
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 >= obj2
@@ -3822,6 +4793,8 @@ class ContainsAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "in"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 in obj2
@@ -3843,6 +4816,8 @@ class NotContainsAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "not in"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 not in obj2
@@ -3864,6 +4839,8 @@ class AddAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "+"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 + obj2
@@ -3882,6 +4859,8 @@ class SubAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "-"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 - obj2
@@ -3908,6 +4887,8 @@ class MulAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "*"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 * obj2
@@ -3934,6 +4915,8 @@ class FloorDivAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "//"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 // obj2
@@ -3960,6 +4943,8 @@ class TrueDivAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "/"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 / obj2
@@ -3986,6 +4971,8 @@ class ModAST(BinaryAST):
 
 	ul4_type = Type("ul4")
 
+	_pyoperator = "%"
+
 	@classmethod
 	def evalfold(cls, obj1, obj2):
 		return obj1 % obj2
@@ -4184,6 +5171,16 @@ class AndAST(BinaryAST):
 			return obj1
 		return self.obj2.eval(context)
 
+	def _pyexpr(self, source):
+		return f"({source.expr(self.obj1)} and {source.expr(self.obj2)})"
+
+	def _optimize(self):
+		self.obj1 = self.obj1._optimize()
+		self.obj2 = self.obj2._optimize()
+		if isinstance(self.obj1, ConstAST) and not isinstance(self.obj1.value, Undefined):
+			return self.obj2 if self.obj1.value else ConstAST(self.template, self.startpos, self.obj1.value)
+		return self
+
 
 @register("or")
 class OrAST(BinaryAST):
@@ -4213,6 +5210,16 @@ class OrAST(BinaryAST):
 			return obj1
 		return self.obj2.eval(context)
 
+	def _pyexpr(self, source):
+		return f"({source.expr(self.obj1)} or {source.expr(self.obj2)})"
+
+	def _optimize(self):
+		self.obj1 = self.obj1._optimize()
+		self.obj2 = self.obj2._optimize()
+		if isinstance(self.obj1, ConstAST) and not isinstance(self.obj1.value, Undefined):
+			return ConstAST(self.template, self.startpos, self.obj1.value) if self.obj1.value else self.obj2
+		return self
+
 
 @register("if")
 class IfAST(CodeAST):
@@ -4258,6 +5265,14 @@ class IfAST(CodeAST):
 		p.breakable()
 		p.pretty(self.objelse)
 
+	def _optimize(self):
+		self.objif = self.objif._optimize()
+		self.objcond = self.objcond._optimize()
+		self.objelse = self.objelse._optimize()
+		if isinstance(self.objcond, ConstAST):
+			return self.make(self.template, self.startpos, self.objif, self.objcond, self.objelse)
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.objif)
@@ -4283,6 +5298,9 @@ class IfAST(CodeAST):
 		else:
 			return self.objelse.eval(context)
 
+	def _pyexpr(self, source):
+		return f"({source.expr(self.objif)} if {source.expr(self.objcond)} else {source.expr(self.objelse)})"
+
 
 class ChangeVarAST(CodeAST):
 	"""
@@ -4323,6 +5341,10 @@ class ChangeVarAST(CodeAST):
 		p.text("value=")
 		p.pretty(self.value)
 
+	def _optimize(self):
+		self.value = self.value._optimize()
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.lvalue)
@@ -4333,6 +5355,16 @@ class ChangeVarAST(CodeAST):
 		self.lvalue = decoder.load()
 		self.value = decoder.load()
 
+	# The :class:`BinaryAST` subclass implementing the operator for augmented assignment
+	_operator = None
+
+	def _pystmt(self, source):
+		# Evaluate the right hand side first (like :meth:`eval` does)
+		value = source.temp()
+		source.line(f"{value} = {source.expr(self.value)}")
+		for (lvalue, value) in source.unpack(self, self.lvalue, value):
+			lvalue._pymodify(source, self._operator, value)
+
 
 @register("setvar")
 class SetVarAST(ChangeVarAST):
@@ -4355,6 +5387,16 @@ class SetVarAST(ChangeVarAST):
 		for (lvalue, value) in _unpackvar(self.lvalue, value):
 			lvalue.evalset(context, value)
 
+	def _pystmt(self, source):
+		if isinstance(self.lvalue, (VarAST, ItemAST)):
+			# Python evaluates the right hand side first, so we can assign directly
+			self.lvalue._pyset(source, source.expr(self.value))
+		else:
+			value = source.temp()
+			source.line(f"{value} = {source.expr(self.value)}")
+			for (lvalue, value) in source.unpack(self, self.lvalue, value):
+				lvalue._pyset(source, value)
+
 
 @register("addvar")
 class AddVarAST(ChangeVarAST):
@@ -4373,6 +5415,8 @@ class AddVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = AddAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4397,6 +5441,8 @@ class SubVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = SubAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4421,6 +5467,8 @@ class MulVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = MulAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4445,6 +5493,8 @@ class FloorDivVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = FloorDivAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4469,6 +5519,8 @@ class TrueDivVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = TrueDivAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4493,6 +5545,8 @@ class ModVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = ModAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4517,6 +5571,8 @@ class ShiftLeftVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = ShiftLeftAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4541,6 +5597,8 @@ class ShiftRightVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = ShiftRightAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4566,6 +5624,8 @@ class BitAndVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = BitAndAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4591,6 +5651,8 @@ class BitXOrVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = BitXOrAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4616,6 +5678,8 @@ class BitOrVarAST(ChangeVarAST):
 
 	ul4_type = Type("ul4")
 
+	_operator = BitOrAST
+
 	@_handleeval
 	def eval(self, context):
 		value = self.value.eval(context)
@@ -4678,13 +5742,7 @@ class CallAST(CodeAST):
 		else:
 			return obj(*args, **kwargs)
 
-	def eval(self, context):
-		obj = self.obj.eval(context)
-		args = []
-		kwargs = {}
-		for arg in self.args:
-			arg.eval_call(context, args, kwargs)
-
+	def _evalcall(self, context, obj, args, kwargs):
 		try:
 			return self._call(context, obj, args, kwargs)
 		except Exception as exc:
@@ -4694,6 +5752,53 @@ class CallAST(CodeAST):
 				_decorateexception(exc, self, obj)
 			raise
 
+	def eval(self, context):
+		obj = self.obj.eval(context)
+		args = []
+		kwargs = {}
+		for arg in self.args:
+			arg.eval_call(context, args, kwargs)
+
+		return self._evalcall(context, obj, args, kwargs)
+
+	def _pyargs(self, source):
+		# Return Python source code for the positional and keyword arguments
+		# (i.e. code for two comma separated expressions)
+		args = []
+		kwargs = []
+		simple = True
+		for arg in self.args:
+			if isinstance(arg, KeywordArgumentAST):
+				if any(arg.name == name for (name, value) in kwargs):
+					simple = False # Let :func:`_pymakeargs` complain about the duplicate argument
+				kwargs.append((arg.name, source.expr(arg)))
+			elif isinstance(arg, (PositionalArgumentAST, UnpackListArgumentAST)):
+				if kwargs:
+					simple = False # Keep the evaluation order
+				args.append(("*" if isinstance(arg, UnpackListArgumentAST) else "") + source.expr(arg))
+			else:
+				simple = False
+		if simple:
+			args = ", ".join(args)
+			kwargs = ", ".join(f"{source.const(name)}: {value}" for (name, value) in kwargs)
+			return f"[{args}], {{{kwargs}}}"
+		else:
+			items = []
+			for arg in self.args:
+				if isinstance(arg, PositionalArgumentAST):
+					name = None
+				elif isinstance(arg, UnpackListArgumentAST):
+					name = "*"
+				elif isinstance(arg, UnpackDictArgumentAST):
+					name = "**"
+				else:
+					name = arg.name
+				items.append(f"({source.const(name)}, {source.expr(arg)})")
+			return f"*_pymakeargs({', '.join(items)})"
+
+	def _pyexpr(self, source):
+		return f"{source.node(self)}._evalcall(context, {source.expr(self.obj)}, {self._pyargs(source)})"
+
 	@_handleeval
 	def evalset(self, context, value):
 		raise TypeError("can't use = on call result")
@@ -4702,6 +5807,11 @@ class CallAST(CodeAST):
 	def evalmodify(self, context, operator, value):
 		raise TypeError("augmented assigment not allowed for call result")
 
+	def _optimize(self):
+		self.obj = self.obj._optimize()
+		self.args = [arg._optimize() for arg in self.args]
+		return self
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		encoder.dump(self.obj)
@@ -4802,6 +5912,9 @@ class RenderAST(CallAST):
 		(obj, args, kwargs) = self._evalobjargs(context)
 		self._render(context, obj, args, kwargs)
 
+	def _pystmt(self, source):
+		source.line(source.mark(self, f"{source.node(self)}._render(context, {source.expr(self.obj)}, {self._pyargs(source)})"))
+
 	@_handleeval
 	def evalset(self, context, value):
 		raise TypeError("can't use = on call result")
@@ -4976,9 +6089,7 @@ class RenderBlockAST(RenderAST):
 		else:
 			return None
 
-	def eval(self, context):
-		(obj, args, kwargs) = self._evalobjargs(context)
-
+	def _renderblock(self, context, obj, args, kwargs):
 		# Check that the argument ``content`` hasn't been specified yet
 		if "content" in kwargs:
 			raise TypeError(f"multiple values for keyword argument 'content'")
@@ -4986,6 +6097,15 @@ class RenderBlockAST(RenderAST):
 
 		self._render(context, obj, args, kwargs)
 
+	def eval(self, context):
+		(obj, args, kwargs) = self._evalobjargs(context)
+		self._renderblock(context, obj, args, kwargs)
+
+	def _pystmt(self, source):
+		# ``<?break?>``/``<?continue?>`` in the content will raise an exception
+		source.renderblock()
+		source.line(source.mark(self, f"{source.node(self)}._renderblock(context, {source.expr(self.obj)}, {self._pyargs(source)})"))
+
 	def _str(self):
 		yield self.type
 		yield " "
@@ -4998,6 +6118,10 @@ class RenderBlockAST(RenderAST):
 		yield from BlockAST._str(self.content)
 		yield -1
 
+	def _optimize(self):
+		self.content._optimize()
+		return super()._optimize()
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		_dumpslice(encoder, self._stoppos)
@@ -5104,17 +6228,34 @@ class RenderBlocksAST(RenderAST):
 			with context.replacestream(NullStream()):
 				BlockAST.eval(self, context)
 
-			# Check that we have no duplicate arguments
-			vars = context.vars.maps[0]
-			for key in vars:
-				if key in kwargs:
-					raise TypeError(f"multiple values for keyword argument {key!r}")
-
-			# Copy variables from the block into the keyword arguments (but only the outermost map from the chain)
-			kwargs.update(vars)
+			self._addblockvars(context, kwargs)
 
 		self._render(context, obj, args, kwargs)
 
+	def _addblockvars(self, context, kwargs):
+		# Check that we have no duplicate arguments
+		vars = context.vars.maps[0]
+		for key in vars:
+			if key in kwargs:
+				raise TypeError(f"multiple values for keyword argument {key!r}")
+
+		# Copy variables from the block into the keyword arguments (but only the outermost map from the chain)
+		kwargs.update(vars)
+
+	def _pystmt(self, source):
+		node = source.node(self)
+		(obj, args, kwargs) = (source.temp(), source.temp(), source.temp())
+		source.line(f"({obj}, {args}, {kwargs}) = ({source.expr(self.obj)}, {self._pyargs(source)})")
+		source.line("with context.chainvars():")
+		source.indent()
+		source.line("with context.replacestream(NullStream()):")
+		source.indent()
+		source.stmts(self.content)
+		source.dedent()
+		source.line(source.mark(self, f"{node}._addblockvars(context, {kwargs})"))
+		source.dedent()
+		source.line(source.mark(self, f"{node}._render(context, {obj}, {args}, {kwargs})"))
+
 	@_handleeval
 	def evalset(self, context, value):
 		raise TypeError("can't use = on call result")
@@ -5123,6 +6264,10 @@ class RenderBlocksAST(RenderAST):
 	def evalmodify(self, context, operator, value):
 		raise TypeError("augmented assigment not allowed for call result")
 
+	def _optimize(self):
+		self.content = BlockAST._optimizecontent(self.content)
+		return super()._optimize()
+
 	def ul4ondump(self, encoder):
 		super().ul4ondump(encoder)
 		_dumpslice(encoder, self._stoppos)
@@ -5134,6 +6279,38 @@ class RenderBlocksAST(RenderAST):
 		self.content = decoder.load()
 
 
+# The template and the global variables used by the worker processes of
+# :meth:`Template.render_many`
+_rendermanystate = None
+
+
+def _rendermanyinit(dump, backend, globals):
+	# Initializer for the worker processes of :meth:`Template.render_many`
+	global _rendermanystate
+	template = Template.loads(dump)
+	template.backend = backend
+	_rendermanystate = (template, globals)
+
+
+def _rendermanyprocess(batch):
+	# Render the template in a worker process for all keyword argument
+	# dictionaries in ``batch``.
+	(template, globals) = _rendermanystate
+	results = template._rendermanythread(globals, batch)
+	for (i, result) in enumerate(results):
+		if isinstance(result, BaseException):
+			# Pickling drops the ``__cause__`` chain, so attach the locations as notes
+			from ll import misc
+			for exc in misc.exception_chain(result):
+				if isinstance(exc, LocationError):
+					result.add_note(str(exc))
+			try:
+				pickle.dumps(result)
+			except Exception:
+				results[i] = RuntimeError(misc.format_exception(result))
+	return results
+
+
 @register("template")
 class Template(BlockAST):
 	"""
@@ -5168,7 +6345,18 @@ class Template(BlockAST):
 
 	version = "52"
 
-	def __init__(self, source=None, name=None, *, namespace=None, whitespace="keep", signature=None):
+	# Which parser to use for the code in template tags: ``"ul4parse"`` uses the
+	# hand-written parser from :mod:`ll.ul4parse`, ``"antlr"`` uses the parser
+	# generated by ANTLR from :file:`UL4.g`.
+	parser = "ul4parse"
+
+	# Set by :meth:`_freeze` for templates that are shared by a :class:`TemplateCache`
+	_frozen = False
+
+	# The size of the chunks produced by :meth:`iterrender` (in characters)
+	chunksize = 65536
+
+	def __init__(self, source=None, name=None, *, namespace=None, whitespace="keep", signature=None, backend="ast", optimize=False):
 		"""
 		Create a :class:`Template` object.
 
@@ -5242,8 +6430,38 @@ class Template(BlockAST):
 		A :class:`SignatureAST` object
 			This AST node will be evaluated at the point of definition of the
 			subtemplate to create the final signature of the subtemplate.
+
+		``backend`` specifies how the template gets executed:
+
+		``"ast"``
+			The AST is interpreted directly (by calling the :meth:`~AST.eval`
+			method of each node).
+
+		``"python"``
+			On first use the template is compiled into a Python function, which
+			is then used for rendering and calling the template.
+
+		Both backends produce the same output and the same exception chains.
+		The backend is propagated to all locally defined subtemplates. It is
+		not part of the UL4ON dump.
+
+		If ``optimize`` is true, an optimization pass runs after the template
+		has been compiled: Constant subexpressions are folded, adjacent literal
+		text is merged into one node, list/set/dict literals with constant
+		items are precomputed and ``<?if?>``/``<?elif?>``/``<?while?>`` blocks
+		with constant conditions are removed (or replaced by their content).
+		All remaining nodes keep their source positions. As this changes the
+		AST (that is visible e.g. via the ``content`` attribute), optimization
+		is disabled by default.
 		"""
+		self._lazycontent = None
 		super().__init__(self, slice(0, 0), None)
+		self._backend = "ast"
+		self._pyfunc = None
+		self._slotnames = _unset # Will be set by :meth:`_resolve`
+		self._resultcache = None # Will be set by :meth:`memoize`
+		self.backend = backend
+		self.optimize = optimize
 		self.whitespace = whitespace
 		self.name = name
 		self.namespace = namespace
@@ -5282,6 +6500,68 @@ class Template(BlockAST):
 			return None
 		return f"{self.namespace}.{self.name}" if self.namespace is not None else self.name
 
+	@property
+	def content(self):
+		# The content of locally defined templates that have been loaded from
+		# a lazy UL4ON decoder is only loaded on first access
+		lazycontent = self._lazycontent
+		if lazycontent is not None:
+			self._content = lazycontent.load()
+			self._lazycontent = None
+		return self._content
+
+	@content.setter
+	def content(self, content):
+		self._lazycontent = None
+		self._content = content
+
+	@property
+	def backend(self):
+		return self._backend
+
+	@backend.setter
+	def backend(self, backend):
+		if backend not in ("ast", "python"):
+			raise ValueError(f"backend {backend!r} unknown")
+		self._backend = backend
+		# Propagate the backend to locally defined templates
+		# (:meth:`_walkpaths` doesn't produce the content of ``<?renderblock?>`` tags)
+		for path in self.walkpaths():
+			node = path[-1]
+			if isinstance(node, Template):
+				node._backend = backend
+			elif isinstance(node, RenderBlockAST):
+				node.content._backend = backend
+
+	def __setattr__(self, name, value):
+		# Private attributes are still available for caching internal state
+		if self._frozen and not name.startswith("_"):
+			self._checkfrozen()
+		super().__setattr__(name, value)
+
+	def __delattr__(self, name):
+		if self._frozen and not name.startswith("_"):
+			self._checkfrozen()
+		super().__delattr__(name)
+
+	def _checkfrozen(self):
+		if self._frozen:
+			raise TypeError(f"template {self.fullname!r} is shared by a TemplateCache and is readonly")
+
+	def _freeze(self):
+		# Make the template and its locally defined templates readonly (used by
+		# :class:`TemplateCache`, as the templates it returns are shared). The
+		# content of all blocks is turned into a tuple.
+		nodes = [path[-1] for path in self.walkpaths()]
+		for node in nodes:
+			if isinstance(node, Template):
+				node._content = tuple(node.content)
+				node._frozen = True
+			elif isinstance(node, BlockAST):
+				node.content = tuple(node.content)
+			elif isinstance(node, RenderBlockAST):
+				node.content._freeze()
+
 	def _repr(self):
 		yield f"fullname={self.fullname!r}"
 		yield f"whitespace={self.whitespace!r}"
@@ -5407,6 +6687,7 @@ class Template(BlockAST):
 			self.stoppos = slice(stop, stop)
 			del self.content[:]
 			self._compile(source)
+			self.backend = self._backend # Propagate the backend to the new subtemplates
 		else: # dump is in compiled form
 			if version != self.version:
 				raise ValueError(f"invalid version, expected {self.version!r}, got {version!r}")
@@ -5440,24 +6721,40 @@ class Template(BlockAST):
 						params.append(inspect.Parameter(paramname, self.ul42signature[paramtype], default=value))
 						state = 0
 				self.signature = inspect.Signature(params)
-			super().ul4onload(decoder)
+			if self.parenttemplate is not None and getattr(decoder, "lazy", False):
+				# Defer loading the content of a locally defined template until
+				# it's rendered or inspected
+				super(BlockAST, self).ul4onload(decoder)
+				self.stoppos = _loadslice(decoder)
+				self._lazycontent = decoder.loadlazy()
+			else:
+				super().ul4onload(decoder)
+			self._pyfunc = None
+			self._slotnames = _unset
 
 	@classmethod
-	def loads(cls, data):
+	def loads(cls, data, lazy=False):
 		"""
 		Loads a template as an UL4ON dump from the string ``data``.
+
+		If ``lazy`` is true, the content of locally defined templates will only
+		be loaded when they are rendered or inspected.
 		"""
 		from ll import ul4on
-		return ul4on.loads(data)
+		return ul4on.Decoder(lazy=lazy).loads(data)
 
 	@classmethod
-	def load(cls, stream):
+	def load(cls, stream, lazy=False):
 		"""
 		Loads the template as an UL4ON dump from the stream ``stream``.
 		format.
+
+		For the meaning of ``lazy`` see :meth:`loads`. As for
+		:func:`ll.ul4on.load` the stream will be positioned after the dump if it
+		is seekable, otherwise more input might have been consumed.
 		"""
 		from ll import ul4on
-		return ul4on.load(stream)
+		return ul4on.Decoder(lazy=lazy)._loadonce(stream)
 
 	def dump(self, stream):
 		"""
@@ -5473,22 +6770,167 @@ class Template(BlockAST):
 		from ll import ul4on
 		return ul4on.dumps(self)
 
+	def _pyfunction(self):
+		# Return the Python function implementing this template for the ``"python"`` backend
+		if self._pyfunc is None:
+			self._pyfunc = _PythonSource(self).function()
+		return self._pyfunc
+
+	def pythonsource(self):
+		"""
+		Return the Python source code that the ``"python"`` backend uses for
+		this template.
+
+		This is the source code of a module containing the function
+		``_template(context)`` that renders the template. Locally defined
+		subtemplates are compiled separately.
+		"""
+		return _PythonSource(self).source()
+
+	def _resolve(self):
+		"""
+		Classify the variables used in this template and return the names of the
+		local variables (or :const:`None` if local variables must be looked up
+		by name).
+
+		Each :class:`VarAST` node gets the scope ``"local"`` (if the template
+		assigns to the variable or if it is a parameter of the template),
+		``"global"`` or ``"builtin"``. Local variables get a slot in the list
+		``context.slots`` that is created each time the template gets rendered
+		or called. Variables can only be global or builtin if the template is
+		a top level template with a signature, otherwise they might be passed
+		as arguments or be variables of the parent template.
+
+		Loop variables of comprehensions and all variables in templates that
+		contain locally defined subtemplates, ``<?renderblock?>`` or
+		``<?renderblocks?>`` tags or generator expressions are always looked
+		up by name, as their values are accessed via ``context.vars`` outside
+		of the normal flow of execution.
+		"""
+		if self._slotnames is not _unset:
+			return self._slotnames
+		if not Context.builtins:
+			Context.add_builtins()
+
+		vars = []
+		assigned = set()
+		dynamic = set()
+		for path in self.walkpaths():
+			node = path[-1]
+			if node is self:
+				continue
+			elif isinstance(node, (Template, RenderBlockAST, RenderBlocksAST, GeneratorExpressionAST)):
+				self._slotnames = None
+				return None
+			elif isinstance(node, VarAST):
+				vars.append(node)
+			elif isinstance(node, (ForBlockAST, ChangeVarAST)):
+				lvalue = node.varname if isinstance(node, ForBlockAST) else node.lvalue
+				assigned.update(v.name for v in _unnestvar(lvalue) if isinstance(v, VarAST))
+			elif isinstance(node, (ListComprehensionAST, SetComprehensionAST, DictComprehensionAST)):
+				dynamic.update(v.name for v in _unnestvar(node.varname) if isinstance(v, VarAST))
+
+		signature = self.signature
+		if isinstance(signature, SignatureAST):
+			assigned.update(name for (name, type, default) in signature.params)
+		elif signature is not None:
+			assigned.update(signature.parameters)
+		resolveglobals = self.parenttemplate is None and isinstance(signature, inspect.Signature)
+
+		slotnames = []
+		slots = {}
+		for var in vars:
+			name = var.name
+			if name in dynamic:
+				(var._scope, var._slot) = (None, None)
+			elif name in assigned:
+				try:
+					slot = slots[name]
+				except KeyError:
+					slot = slots[name] = len(slotnames)
+					slotnames.append(name)
+				(var._scope, var._slot) = ("local", slot)
+			elif resolveglobals:
+				(var._scope, var._slot) = ("builtin" if name in Context.builtins else "global", None)
+			else:
+				(var._scope, var._slot) = (None, None)
+		self._slotnames = tuple(slotnames)
+		return self._slotnames
+
+	def _makeslots(self, context):
+		# Return the list of local variables for rendering or calling the template
+		# (or :const:`None` if local variables are looked up by name)
+		slotnames = self._resolve()
+		if not slotnames:
+			return None
+		# Initialize parameters (and for locally defined templates variables of
+		# the parent template), all other slots will fall back to a lookup by name
+		vars = context.vars.maps[0]
+		return [vars.get(name, _unset) for name in slotnames]
+
+	def _enterlimits(self, context):
+		# Count the call of the template as a step and increment the call depth
+		context._step()
+		if context.maxdepth is not None and context.depth >= context.maxdepth:
+			raise DepthLimitError(context.maxdepth)
+		context.depth += 1
+
 	def _renderbound(self, context):
 		# Helper method used by :meth:`render` and :meth:`TemplateClosure.render`
 		# where arguments have already been bound
+		self._enterlimits(context)
+		profiler = context.profiler
+		if profiler is not None:
+			token = profiler._enter(profiler._templates, self)
+		oldslots = context.slots
+		context.slots = self._makeslots(context)
 		try:
-			# Bypass ``self.eval()`` which simply stores the object as a local variable
-			# Also bypass ``super().eval()`` as this would add additional stackframe in exception messages
-			for node in self.content:
-				node.eval(context)
-		except ReturnException:
-			pass
+			if self._backend == "python":
+				self._pyfunction()(context)
+				return
+			try:
+				# Bypass ``self.eval()`` which simply stores the object as a local variable
+				# Also bypass ``super().eval()`` as this would add additional stackframe in exception messages
+				for node in self.content:
+					node.eval(context)
+			except ReturnException:
+				pass
+			except Exception as exc:
+				if _errortracking == "lazy":
+					_locateevalframes(exc)
+				raise
+		finally:
+			context.slots = oldslots
+			context.depth -= 1
+			if profiler is not None:
+				profiler._leave(token)
+
+	def _rendercached(self, context, args):
+		# Helper method used by :meth:`render` and :meth:`TemplateClosure.render`
+		# that uses the cache if the template is memoized (``args`` are the bound
+		# arguments, which are already available in ``context``)
+		cache = self._resultcache
+		key = cache._key(context, "render", args) if cache is not None else None
+		if key is None:
+			self._renderbound(context)
+			return
+		output = cache._get(key)
+		if output is _unset:
+			stream = io.StringIO()
+			with context.replacestream(stream):
+				self._renderbound(context)
+			output = stream.getvalue()
+			cache._put(key, output)
+			# The output has been counted already
+			context.stream.write(output)
+		else:
+			context.write(output)
 
 	@withcontext
 	def ul4_render(self, context, /, *args, **kwargs):
 		vars = _makevars(self.signature, args, kwargs)
 		with context.replacevars(vars):
-			self._renderbound(context)
+			self._rendercached(context, vars)
 
 	def render(self, stream, /, *args, **kwargs):
 		"""
@@ -5522,7 +6964,7 @@ class Template(BlockAST):
 		with context.replacestream(stream):
 			vars = _makevars(self.signature, args, kwargs)
 			with context.replacevars(vars):
-				self._renderbound(context)
+				self._rendercached(context, vars)
 		return stream.getvalue()
 
 	def renders(self, /, *args, **kwargs):
@@ -5546,14 +6988,142 @@ class Template(BlockAST):
 		"""
 		return self.ul4_renders(Context(globals), *args, **kwargs)
 
+	def iterrender(self, /, *args, **kwargs):
+		"""
+		Render the template and return an iterator over the output.
+
+		The output is produced in chunks of (about) :attr:`chunksize`
+		characters. Rendering happens in a separate thread that waits for the
+		consumer, so even for large output only a few chunks are kept in memory.
+		This is useful for streaming large pages, e.g. as the result of a WSGI
+		application.
+
+		``args`` and ``kwargs`` contain the top level positional and keyword
+		arguments available to the template code. Positional arguments will
+		only be supported if the template has a signature.
+		"""
+		return _iterchunks(lambda stream: self.ul4_render(Context(None, stream), *args, **kwargs), self.chunksize)
+
+	def iterrender_with_globals(self, args, kwargs, globals):
+		"""
+		Render the template and return an iterator over the output (like
+		:meth:`iterrender` does).
+
+		``args`` and ``kwargs`` contain the top level positional and keyword
+		arguments available to the template code. ``globals`` contains global
+		variables. Positional arguments will only be supported if the template
+		has a signature.
+		"""
+		return _iterchunks(lambda stream: self.ul4_render(Context(globals, stream), *args, **kwargs), self.chunksize)
+
+	def _rendermanyitem(self, globals, kwargs):
+		# Render one item for :meth:`render_many`
+		try:
+			return self.ul4_renders(Context(globals), **kwargs)
+		except Exception as exc:
+			return exc
+
+	def _rendermanythread(self, globals, batch):
+		return [self._rendermanyitem(globals, kwargs) for kwargs in batch]
+
+	def render_many(self, iterable, /, workers=None, executor="process", chunksize=1, globals=None):
+		"""
+		Render the template for each item in ``iterable`` in parallel and
+		return an iterator over the results.
+
+		Each item of ``iterable`` must be a dictionary containing the keyword
+		arguments for rendering the template. The results will be produced in
+		the order of ``iterable``. Each result is either the output of the
+		template (as a string) or the exception that was raised when rendering
+		the template for this item, so one failing item doesn't abort the
+		complete batch.
+
+		``workers`` is the number of worker processes or threads (the default
+		is the one used by :mod:`concurrent.futures`).
+
+		``executor`` can be ``"process"`` (use a
+		:class:`~concurrent.futures.ProcessPoolExecutor`) or ``"thread"`` (use
+		a :class:`~concurrent.futures.ThreadPoolExecutor`). For worker
+		processes the template is passed to each worker once (as an UL4ON dump)
+		and the keyword arguments and results must be picklable. As the
+		``__cause__`` chain of an exception gets lost when it is pickled, the
+		template locations are added to the exception as notes.
+
+		``chunksize`` is the number of items that will be passed to a worker at
+		once. ``globals`` contains global variables.
+
+		``iterable`` is consumed lazily and only a limited number of items are
+		in flight at any time, so arbitrarily long iterables can be used.
+		"""
+		if executor == "process":
+			pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=_rendermanyinit, initargs=(self.dumps(), self.backend, globals))
+			func = _rendermanyprocess
+		elif executor == "thread":
+			pool = concurrent.futures.ThreadPoolExecutor(workers)
+			func = functools.partial(self._rendermanythread, globals)
+		else:
+			raise ValueError(f"executor {executor!r} unknown")
+		return self._rendermany(pool, func, iterable, chunksize, 2 * (workers or os.cpu_count() or 1))
+
+	@staticmethod
+	def _rendermany(pool, func, iterable, chunksize, window):
+		# Submit batches of ``chunksize`` items to ``pool`` (but at most
+		# ``window`` batches at once) and produce the results in order
+		pending = collections.deque()
+		try:
+			iterator = iter(iterable)
+			while True:
+				batch = list(itertools.islice(iterator, chunksize))
+				if not batch:
+					break
+				pending.append(pool.submit(func, batch))
+				if len(pending) >= window:
+					yield from pending.popleft().result()
+			while pending:
+				yield from pending.popleft().result()
+		finally:
+			pool.shutdown(wait=True, cancel_futures=True)
+
 	def _callbound(self, context):
 		# Helper method used by :meth:`__call__` and :meth:`TemplateClosure.__call__`
 		# where arguments have already been bound
+		self._enterlimits(context)
+		profiler = context.profiler
+		if profiler is not None:
+			token = profiler._enter(profiler._templates, self)
+		oldslots = context.slots
+		context.slots = self._makeslots(context)
 		try:
-			with context.replacestream(NullStream()): # Ignore all output
-				super().eval(context) # Bypass ``self.eval()`` which simply stores the object as a local variable
-		except ReturnException as exc:
-			return exc.value
+			if self._backend == "python":
+				with context.replacestream(NullStream()): # Ignore all output
+					return self._pyfunction()(context)
+			try:
+				with context.replacestream(NullStream()): # Ignore all output
+					super().eval(context) # Bypass ``self.eval()`` which simply stores the object as a local variable
+			except ReturnException as exc:
+				return exc.value
+			except Exception as exc:
+				if _errortracking == "lazy":
+					_locateevalframes(exc)
+				raise
+		finally:
+			context.slots = oldslots
+			context.depth -= 1
+			if profiler is not None:
+				profiler._leave(token)
+
+	def _callcached(self, context, args):
+		# Helper method used by :meth:`__call__` and :meth:`TemplateClosure.__call__`
+		# that uses the cache if the template is memoized
+		cache = self._resultcache
+		key = cache._key(context, "call", args) if cache is not None else None
+		if key is None:
+			return self._callbound(context)
+		result = cache._get(key)
+		if result is _unset:
+			result = self._callbound(context)
+			cache._put(key, result)
+		return result
 
 	@withcontext
 	def ul4_call(self, context, /, *args, **kwargs):
@@ -5566,7 +7136,7 @@ class Template(BlockAST):
 		"""
 		vars = _makevars(self.signature, args, kwargs)
 		with context.replacevars(vars):
-			return self._callbound(context)
+			return self._callcached(context, vars)
 
 	def __call__(self, /, *args, **kwargs):
 		"""
@@ -5589,6 +7159,151 @@ class Template(BlockAST):
 		"""
 		return self.ul4_call(Context(globals), *args, **kwargs)
 
+	# Builtins that return a different result each time they are called
+	_impurebuiltins = frozenset({"now", "utcnow", "today", "random", "randrange", "randchoice"})
+
+	# Methods of lists, dictionaries and sets that modify the object
+	_modifyingmethods = frozenset({"append", "insert", "pop", "clear", "update", "add"})
+
+	def memoize(self, maxsize=128):
+		"""
+		Cache the results of rendering and calling the template.
+
+		This is useful for templates that are pure functions of their arguments
+		(e.g. templates that format a date or render a badge) and get rendered
+		or called often with the same arguments. The result is cached under the
+		arguments passed to the template, so all arguments must be hashable
+		(otherwise the template is rendered or called normally). At most
+		``maxsize`` results are kept (the least recently used results are
+		dropped first). If ``maxsize`` is :const:`None` the cache is unbounded.
+
+		This can be used for locally defined templates too, i.e. the
+		:class:`Template` objects for ``<?def?>`` tags in :attr:`content`.
+
+		Only templates that depend on nothing but their arguments can be
+		memoized, so :exc:`ValueError` will be raised if the template has no
+		signature, if it uses global variables, variables of its parent
+		template or builtins like ``now()`` or ``random()``, or if it might
+		modify its arguments (e.g. via ``<?code x.y = z?>`` or
+		``<?code x.append(y)?>``).
+
+		The cache (a :class:`ResultCache` object) is available as
+		:attr:`resultcache`. Note that results of calls will be shared between
+		calls, so they shouldn't be modified.
+		"""
+		self._checkfrozen()
+		builtins = self._checkmemoize()
+		self._resultcache = ResultCache(maxsize, builtins)
+
+	def unmemoize(self):
+		"""
+		Stop caching the results of rendering and calling the template.
+		"""
+		self._checkfrozen()
+		self._resultcache = None
+
+	@property
+	def resultcache(self):
+		"""
+		The :class:`ResultCache` object if the template is memoized (see
+		:meth:`memoize`) or :const:`None` otherwise.
+		"""
+		return self._resultcache
+
+	def _checkmemoize(self):
+		# Check that the template only depends on its arguments and return the
+		# names of the builtins it uses (raise :exc:`ValueError` otherwise)
+		if not Context.builtins:
+			Context.add_builtins()
+		name = self.fullname
+		if self.signature is None:
+			raise ValueError(f"can't memoize template {name!r}: template has no signature")
+
+		def isconst(node):
+			# Does the literal ``node`` consist of nothing but constants?
+			return all(isinstance(path[-1], (ConstAST, ListAST, SetAST, DictAST, SeqItemAST, DictItemAST)) for path in node.walkpaths())
+
+		nodes = []
+		locals = set() # Names of all local variables (including parameters)
+		new = set() # Names of local variables that are only assigned new objects built from constants
+		shallow = set() # Names of local variables that might be assigned new containers whose items might be objects passed in
+		old = set() # Names of local variables that might reference objects passed in
+		if self.parenttemplate is not None:
+			locals.add(self.name) # Locally defined templates can call themselves
+		for path in self.walkpaths():
+			node = path[-1]
+			nodes.append(node)
+			if isinstance(node, Template):
+				signature = node.signature
+				if isinstance(signature, SignatureAST):
+					paramnames = []
+					for (paramname, paramtype, default) in signature.params:
+						paramnames.append(paramname)
+						if default is not None:
+							nodes.extend(path[-1] for path in default.walkpaths())
+				else:
+					paramnames = signature.parameters if signature is not None else ()
+				locals.update(paramnames)
+				old.update(paramnames)
+				if node is not self:
+					locals.add(node.name)
+			elif isinstance(node, (ForBlockAST, ListComprehensionAST, SetComprehensionAST, DictComprehensionAST, GeneratorExpressionAST)):
+				for var in _unnestvar(node.varname):
+					if isinstance(var, VarAST):
+						locals.add(var.name)
+						old.add(var.name)
+			elif isinstance(node, SetVarAST) and isinstance(node.lvalue, VarAST):
+				locals.add(node.lvalue.name)
+				if isinstance(node.value, (ConstAST, ListAST, SetAST, DictAST)) and isconst(node.value):
+					new.add(node.lvalue.name)
+				elif isinstance(node.value, (ListAST, SetAST, DictAST, ListComprehensionAST, SetComprehensionAST, DictComprehensionAST)):
+					shallow.add(node.lvalue.name)
+				else:
+					old.add(node.lvalue.name)
+			elif isinstance(node, SetVarAST):
+				for var in _unnestvar(node.lvalue):
+					if isinstance(var, VarAST):
+						locals.add(var.name)
+						old.add(var.name)
+
+		def checkmodify(node):
+			# ``node`` will be modified, so it must be an object created by the template
+			nested = False
+			while isinstance(node, (AttrAST, ItemAST)):
+				node = node.obj if isinstance(node, AttrAST) else node.obj1
+				nested = True
+			if isinstance(node, VarAST) and node.name not in old:
+				if nested:
+					# Objects inside a new container might have been passed in, unless the container was built from constants only
+					if node.name in new and node.name not in shallow:
+						return
+				elif node.name in new or node.name in shallow:
+					return
+			raise ValueError(f"can't memoize template {name!r}: template might modify its arguments")
+
+		builtins = set()
+		for node in nodes:
+			if isinstance(node, VarAST):
+				if node.name in locals:
+					continue
+				elif node.name in self._impurebuiltins:
+					raise ValueError(f"can't memoize template {name!r}: template uses {node.name}()")
+				elif node.name not in Context.builtins:
+					raise ValueError(f"can't memoize template {name!r}: template uses non-local variable {node.name!r}")
+				builtins.add(node.name)
+			elif isinstance(node, ChangeVarAST):
+				for var in _unnestvar(node.lvalue):
+					# Augmented assignments modify lists in place
+					if not isinstance(var, VarAST) or not isinstance(node, SetVarAST):
+						checkmodify(var)
+			elif isinstance(node, CallAST):
+				obj = node.obj
+				if isinstance(obj, AttrAST) and obj.attrname in self._modifyingmethods:
+					checkmodify(obj.obj)
+				elif isinstance(obj, VarAST) and obj.name == "setattr" and node.args:
+					checkmodify(node.args[0].value)
+		return frozenset(builtins)
+
 	def jssource(self):
 		"""
 		Return the template as the source code of a Javascript function.
@@ -5820,10 +7535,16 @@ class Template(BlockAST):
 			yield from line
 
 	def _parser(self, tag, error):
-		from ll import UL4Lexer, UL4Parser
 		source = tag.code
 		if not source:
 			raise ValueError(error)
+		if self.parser == "ul4parse":
+			from ll import ul4parse
+			return ul4parse.Parser(tag)
+		elif self.parser != "antlr":
+			raise ValueError(f"parser {self.parser!r} unknown")
+		import antlr3
+		from ll import UL4Lexer, UL4Parser
 		stream = antlr3.ANTLRStringStream(source)
 		lexer = UL4Lexer.UL4Lexer(stream)
 		lexer.tag = tag
@@ -5837,6 +7558,8 @@ class Template(BlockAST):
 		Compile the template source code ``source`` into an AST.
 		"""
 		self._fullsource = source
+		self._pyfunc = None
+		self._slotnames = _unset
 
 		if source is None:
 			return
@@ -5881,7 +7604,7 @@ class Template(BlockAST):
 			render.args = call.args
 			if tag.tag == "renderblock":
 				# We create the sub template without source so there won't be any compilation done ...
-				render.content = Template(None, name="content", whitespace=self.whitespace)
+				render.content = Template(None, name="content", whitespace=self.whitespace, backend=self.backend, optimize=self.optimize)
 				# ... but then we have to fix the ``fullsource`` and ``startpos`` attributes ourselves
 				render.content._fullsource = self._fullsource
 				# The stop position will be updated by :meth:`RenderBlock.finish`.
@@ -6009,7 +7732,7 @@ class Template(BlockAST):
 					blockstack[-1].append(ContinueAST(templatestack[-1], tag.startpos))
 				elif tag.tag == "def":
 					(name, signature) = parsedef(tag)
-					block = Template(None, name=name, whitespace=self.whitespace, signature=signature)
+					block = Template(None, name=name, whitespace=self.whitespace, signature=signature, backend=self.backend, optimize=self.optimize)
 					block.template = block
 					block.parenttemplate = templatestack[-1]
 					tag.template = block
@@ -6047,6 +7770,9 @@ class Template(BlockAST):
 			_decorateexception(exc, blockstack[-1])
 			raise exc
 
+		if self.optimize:
+			self._optimize()
+
 	# @_handleeval
 	def eval(self, context):
 		signature = self.signature
@@ -6207,6 +7933,542 @@ class SignatureAST(CodeAST):
 				state = 0
 
 
+###
+### Cache for compiled templates
+###
+
+class TemplateCache:
+	"""
+	A cache for compiled :class:`Template` objects.
+
+	Templates are looked up by their source, name, namespace, whitespace mode,
+	signature and backend. The cache keeps at most ``maxsize`` templates whose sources
+	are at most ``maxbytes`` bytes (UTF-8 encoded) in total (:const:`None`
+	means unlimited). When one of the limits is exceeded, the least recently
+	used templates are discarded.
+
+	If ``directory`` is not :const:`None`, the UL4ON dumps of compiled
+	templates will also be stored in this directory, so that other processes
+	can load the templates from there instead of compiling them again.
+
+	Templates returned by the cache are shared, so they are readonly: Setting
+	or deleting attributes (like :attr:`~Template.name`,
+	:attr:`~Template.backend` or :attr:`~Template.content`) or calling
+	:meth:`~Template.memoize` or :meth:`~Template.unmemoize` on them (or on
+	their locally defined templates) raises a :exc:`TypeError`, and the
+	content of the templates (and of all blocks in them) is a tuple.
+
+	The attributes ``hits``, ``diskhits``, ``misses`` and ``evictions`` count
+	the lookups that found the template in memory, the lookups that loaded the
+	template from disk, the lookups that had to compile the template and the
+	templates that have been discarded.
+	"""
+
+	def __init__(self, maxsize=256, maxbytes=None, directory=None):
+		self.maxsize = maxsize
+		self.maxbytes = maxbytes
+		self.directory = directory
+		self.bytes = 0
+		self.hits = 0
+		self.diskhits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._templates = collections.OrderedDict() # Maps keys to (template, size) tuples
+		self._lock = threading.Lock()
+
+	def __repr__(self):
+		return f"<{self.__class__.__module__}.{self.__class__.__qualname__} size={len(self._templates):,} bytes={self.bytes:,} hits={self.hits:,} diskhits={self.diskhits:,} misses={self.misses:,} evictions={self.evictions:,} at {id(self):#x}>"
+
+	def __len__(self):
+		return len(self._templates)
+
+	def template(self, source, name=None, *, namespace=None, whitespace="keep", signature=None, backend="ast", optimize=False):
+		"""
+		Return a compiled :class:`Template` object for ``source``.
+
+		The arguments have the same meaning as for :class:`Template`.
+		"""
+		key = (source, name, namespace, whitespace, signature, optimize, backend)
+		try:
+			hash(key)
+		except TypeError:
+			# Templates with unhashable signatures can't be cached
+			return Template(source, name, namespace=namespace, whitespace=whitespace, signature=signature, backend=backend, optimize=optimize)
+
+		with self._lock:
+			try:
+				(template, size) = self._templates[key]
+			except KeyError:
+				pass
+			else:
+				self._templates.move_to_end(key)
+				self.hits += 1
+				return template
+
+		# Compile the template outside of the lock, so that other threads are not blocked
+		filename = self._filename(key)
+		template = self._load(filename)
+		if template is None:
+			template = Template(source, name, namespace=namespace, whitespace=whitespace, signature=signature, backend=backend, optimize=optimize)
+			self._save(filename, template)
+			fromdisk = False
+		else:
+			template.backend = backend # The backend is not part of the dump
+			if optimize:
+				# The dump contains the optimized AST, but precomputed constants are not part of it
+				template.optimize = True
+				template._optimize()
+			fromdisk = True
+		template._freeze()
+
+		size = len(source.encode("utf-8"))
+		with self._lock:
+			if fromdisk:
+				self.diskhits += 1
+			else:
+				self.misses += 1
+			# Another thread might have added the template in the meantime
+			old = self._templates.pop(key, None)
+			if old is not None:
+				self.bytes -= old[1]
+			self._templates[key] = (template, size)
+			self.bytes += size
+			while self._templates and ((self.maxsize is not None and len(self._templates) > self.maxsize) or (self.maxbytes is not None and self.bytes > self.maxbytes)):
+				(oldtemplate, oldsize) = self._templates.popitem(last=False)[1]
+				self.bytes -= oldsize
+				self.evictions += 1
+		return template
+
+	def clear(self):
+		"""
+		Remove all templates from the in-memory cache and reset the statistics.
+		"""
+		with self._lock:
+			self._templates.clear()
+			self.bytes = self.hits = self.diskhits = self.misses = self.evictions = 0
+
+	def _filename(self, key):
+		# Only templates with string signatures have a stable key that we can use across processes
+		signature = key[4]
+		if self.directory is None or not (signature is None or isinstance(signature, str)):
+			return None
+		# The backend is not part of the dump, so the file can be shared between backends
+		digest = hashlib.sha256(repr((Template.version, *key[:6])).encode("utf-8")).hexdigest()
+		return os.path.join(self.directory, f"{digest}.ul4on")
+
+	def _load(self, filename):
+		if filename is not None:
+			try:
+				with open(filename, "r", encoding="utf-8") as f:
+					return Template.load(f)
+			except Exception:
+				pass # If the file is missing or unusable, we'll compile the template again
+		return None
+
+	def _save(self, filename, template):
+		if filename is not None:
+			tempname = None
+			try:
+				os.makedirs(self.directory, exist_ok=True)
+				# Write to a temporary file first, so that other processes never see a partial dump
+				with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False) as f:
+					tempname = f.name
+					template.dump(f)
+				os.replace(tempname, filename)
+				tempname = None
+			except OSError:
+				pass # The disk cache is only an optimization
+			finally:
+				# Don't leave a partial dump behind if writing or renaming failed
+				if tempname is not None:
+					with contextlib.suppress(OSError):
+						os.remove(tempname)
+
+
+templatecache = TemplateCache()
+
+
+###
+### Compiling templates to Python code (used by the ``"python"`` backend)
+###
+
+def _pygetvar(vars, name):
+	try:
+		return vars[name]
+	except KeyError:
+		return UndefinedVariable(name)
+
+
+def _pymodifyattr(obj, attrname, operator, value):
+	t = _type(obj)
+	t.setattr(obj, attrname, operator(t.getattr(obj, attrname), value))
+
+
+def _pyunpack(lvalue, value):
+	return [value for (lvalue, value) in _unpackvar(lvalue, value)]
+
+
+def _pymakeargs(*items):
+	# Items are ``(name, value)`` tuples where ``name`` is :const:`None` for
+	# positional arguments and ``"*"`` or ``"**"`` for unpacking arguments
+	args = []
+	kwargs = {}
+	for (name, value) in items:
+		if name is None:
+			args.append(value)
+		elif name == "*":
+			args.extend(value)
+		elif name == "**":
+			if hasattr(value, "keys"):
+				value = [(key, value[key]) for key in value]
+			for (key, itemvalue) in value:
+				if key in kwargs:
+					raise SyntaxError(f"duplicate keyword argument {key!r}")
+				kwargs[key] = itemvalue
+		else:
+			if name in kwargs:
+				raise SyntaxError(f"duplicate keyword argument {name!r}")
+			kwargs[name] = value
+	return (args, kwargs)
+
+
+class _PythonSource:
+	"""
+	Generates the Python source code for a :class:`Template` and creates the
+	Python function that the ``"python"`` backend uses for rendering and
+	calling the template.
+
+	Each AST node generates the code for itself via :meth:`AST._pyexpr`,
+	:meth:`AST._pystmt`, :meth:`AST._pyset` and :meth:`AST._pymodify`.
+	Locally defined templates (and the content of ``<?renderblock?>`` tags)
+	are compiled separately, when they are used for the first time.
+
+	The code for an AST node is wrapped in markers that are removed when the
+	line is output. This gives us the column range of each node, so the
+	location of an exception can be determined from the traceback afterwards
+	and rendering doesn't have to do any bookkeeping.
+	"""
+
+	_marker = re.compile("\x01(\\d+)\x02|\x03")
+
+	def __init__(self, template):
+		self.template = template
+		self.filename = f"<ul4 {template.fullname or 'template'} {id(self):#x}>"
+		self.nodes = [] # AST nodes used by the code (as ``_n0``, ``_n1``, etc.)
+		self.consts = [] # Other objects used by the code (as ``_c0``, ``_c1``, etc.)
+		self._nodeindexes = {}
+		self._constindexes = {}
+		self._functions = [] # The lines of all functions as (level, code, spans) tuples
+		self._lines = None # The lines of the function we're currently generating
+		self._level = 0
+		self._loops = [] # Do the loops we're in have to handle flow control exceptions?
+		self._counter = 0
+		self._spans = {} # Maps line numbers to lists of (startcol, stopcol, node index) tuples
+		self._source = None
+		# Do we use slots for local variables?
+		# (This also sets the scope of the variables used by :class:`VarAST` nodes)
+		self._slots = template._resolve() is not None
+
+	def node(self, node):
+		"""
+		Return the name under which the AST node ``node`` is available in the
+		generated code.
+		"""
+		return f"_n{self._nodeindex(node)}"
+
+	def _nodeindex(self, node):
+		try:
+			return self._nodeindexes[id(node)]
+		except KeyError:
+			index = self._nodeindexes[id(node)] = len(self.nodes)
+			self.nodes.append(node)
+			return index
+
+	def const(self, value):
+		"""
+		Return Python source code for the constant ``value``.
+		"""
+		if value is None or type(value) in (bool, int, str) or (type(value) is float and math.isfinite(value)):
+			code = ascii(value)
+			return f"({code})" if code.startswith("-") else code
+		try:
+			key = (type(value), value)
+			hash(key)
+		except TypeError:
+			key = id(value)
+		try:
+			index = self._constindexes[key]
+		except KeyError:
+			index = self._constindexes[key] = len(self.consts)
+			self.consts.append(value)
+		return f"_c{index}"
+
+	def temp(self):
+		"""
+		Return the name of a new local variable.
+		"""
+		self._counter += 1
+		return f"_t{self._counter}"
+
+	def mark(self, node, code):
+		"""
+		Return ``code`` wrapped in markers for the AST node ``node``.
+		"""
+		return f"\x01{self._nodeindex(node)}\x02{code}\x03"
+
+	def expr(self, node):
+		"""
+		Return Python source code for evaluating the expression ``node``.
+		"""
+		return self.mark(node, node._pyexpr(self))
+
+	def item(self, node):
+		"""
+		Return Python source code for an item in a list, set or dict display.
+		"""
+		if isinstance(node, UnpackSeqItemAST):
+			return f"*{self.expr(node)}"
+		elif isinstance(node, UnpackDictItemAST):
+			return f"**{self.expr(node)}"
+		return self.expr(node)
+
+	def line(self, code):
+		"""
+		Output the line ``code`` (which might contain markers) at the current
+		indentation level.
+		"""
+		spans = []
+		stack = []
+		parts = []
+		length = 0
+		pos = 0
+		for match in self._marker.finditer(code):
+			parts.append(code[pos:match.start()])
+			length += match.start() - pos
+			pos = match.end()
+			if match.group(1) is not None:
+				stack.append((int(match.group(1)), length))
+			else:
+				(index, start) = stack.pop()
+				spans.append((start, length, index))
+		parts.append(code[pos:])
+		self._lines.append((self._level, "".join(parts), spans))
+
+	def indent(self):
+		self._level += 1
+
+	def dedent(self):
+		self._level -= 1
+
+	def stmts(self, nodes):
+		"""
+		Output the statements for the AST nodes ``nodes``.
+		"""
+		count = len(self._lines)
+		for node in nodes:
+			node._pystmt(self)
+		if len(self._lines) == count:
+			self.line("pass")
+
+	def inloop(self):
+		return bool(self._loops)
+
+	def renderblock(self):
+		"""
+		Signal that flow control exceptions must be handled by the current
+		loop.
+		"""
+		if self._loops:
+			self._loops[-1] = True
+
+	def step(self, node):
+		"""
+		Output the code for counting a step of the loop ``node`` (and checking
+		the limits of the context).
+		"""
+		self.line(self.mark(node, "context._step()"))
+
+	def loop(self, nodes):
+		"""
+		Output the statements for the AST nodes ``nodes`` as the body of a loop.
+		"""
+		lines = self._lines
+		self._lines = []
+		self._loops.append(False)
+		self.stmts(nodes)
+		handleexceptions = self._loops.pop()
+		(body, self._lines) = (self._lines, lines)
+		if handleexceptions:
+			# ``<?break?>`` and ``<?continue?>`` in the content of a ``<?renderblock?>`` raise exceptions
+			self.line("try:")
+			self._lines.extend((level+1, code, spans) for (level, code, spans) in body)
+			self.line("except _BreakException:")
+			self.line("\tbreak")
+			self.line("except _ContinueException:")
+			self.line("\tpass")
+		else:
+			self._lines.extend(body)
+
+	def unpack(self, node, lvalue, value):
+		"""
+		Output the code for unpacking ``value`` for assignment to ``lvalue``
+		(which might be a nested sequence of AST nodes) and produce
+		(lvalue, code) pairs.
+		"""
+		if isinstance(lvalue, AST):
+			yield (lvalue, value)
+		else:
+			values = self.temp()
+			self.line(self.mark(node, f"{values} = _pyunpack({self.const(lvalue)}, {value})"))
+			for (i, lvalue) in enumerate(_unnestvar(lvalue)):
+				yield (lvalue, f"{values}[{i}]")
+
+	def assign(self, node, lvalue, value):
+		"""
+		Output the code for assigning ``value`` to ``lvalue``.
+		"""
+		for (lvalue, value) in self.unpack(node, lvalue, value):
+			lvalue._pyset(self, value)
+
+	def scopes(self):
+		"""
+		Output the code for the local variables referencing the slots, the global
+		and the builtin variables (if the template uses slots).
+		"""
+		if self._slots:
+			self.line("_s = context.slots")
+			self.line("_g = context.globals")
+			self.line("_b = context.builtins")
+
+	@contextlib.contextmanager
+	def _function(self, header):
+		oldstate = (self._lines, self._level, self._loops)
+		self._lines = []
+		self._level = 0
+		self._loops = []
+		self._functions.append(self._lines)
+		self.line(header)
+		self.indent()
+		self.line("try:")
+		self.indent()
+		yield
+		self.dedent()
+		self.line("except (_BreakException, _ContinueException):")
+		self.line("\traise")
+		self.line("except Exception as _exc:")
+		self.line("\t_locate(_exc)")
+		self.line("\traise")
+		(self._lines, self._level, self._loops) = oldstate
+
+	def comprehension(self, node, init, add):
+		"""
+		Output a function for the comprehension ``node`` and return the code for
+		calling it. ``init`` is the code for the initial result (or :const:`None`
+		for a generator expression) and the function ``add`` must output the
+		code for adding the item to the result (``_r``).
+		"""
+		self._counter += 1
+		name = f"_f{self._counter}"
+		with self._function(f"def {name}(context, _v):"):
+			self.scopes()
+			# Evaluate the container before opening a new scope (like :meth:`eval` does)
+			self.line(f"_c = {self.expr(node.container)}")
+			if init is not None:
+				self.line(f"_r = {init}")
+			level = self._level
+			self.line("with context.chainvars():") # Don't let loop variables leak into the surrounding scope
+			self.indent()
+			self.line(self.mark(node, "for _i in _c:"))
+			self.indent()
+			self.step(node)
+			self.assign(node, node.varname, "_i")
+			if node.condition is not None:
+				self.line(f"if {self.expr(node.condition)}:")
+				self.indent()
+			add()
+			self._level = level
+			if init is not None:
+				self.line("return _r")
+		return f"{name}(context, _v)"
+
+	def source(self):
+		"""
+		Return the Python source code for the template.
+		"""
+		if self._source is None:
+			with self._function("def _template(context):"):
+				self.line("_v = context.vars")
+				self.scopes()
+				self.line("_w = context.write")
+				self.stmts(self.template.content)
+			lines = []
+			for function in self._functions:
+				for (level, code, spans) in function:
+					lines.append("\t" * level + code)
+					if spans:
+						self._spans[len(lines)] = [(level+start, level+stop, index) for (start, stop, index) in spans]
+				lines.append("")
+			self._source = "\n".join(lines)
+		return self._source
+
+	def function(self):
+		"""
+		Compile the source code and return the Python function for the template.
+		"""
+		code = compile(self.source(), self.filename, "exec")
+		namespace = dict(
+			_locate=self.locate,
+			_BreakException=BreakException,
+			_ContinueException=ContinueException,
+			NullStream=NullStream,
+			_str=_str,
+			_xmlescape=_xmlescape,
+			_getattr=_getattr,
+			_setattr=_setattr,
+			_pygetvar=_pygetvar,
+			_unset=_unset,
+			_pymodifyattr=_pymodifyattr,
+			_pyunpack=_pyunpack,
+			_pymakeargs=_pymakeargs,
+		)
+		for (i, node) in enumerate(self.nodes):
+			namespace[f"_n{i}"] = node
+		for (i, const) in enumerate(self.consts):
+			namespace[f"_c{i}"] = const
+		exec(code, namespace)
+		return namespace["_template"]
+
+	def locate(self, exc):
+		"""
+		Attach the location of the AST node that raised the exception ``exc``.
+		"""
+		# Find the innermost frame executing our code
+		found = None
+		tb = exc.__traceback__
+		while tb is not None:
+			if tb.tb_frame.f_code.co_filename == self.filename:
+				found = tb
+			tb = tb.tb_next
+		if found is None:
+			return
+		positions = next(itertools.islice(found.tb_frame.f_code.co_positions(), found.tb_lasti//2, None), None)
+		if positions is None:
+			return
+		(lineno, endlineno, startcol, stopcol) = positions
+		spans = self._spans.get(lineno)
+		if not spans:
+			return
+		# Use the innermost node containing the failing instruction, or the outermost node on the line
+		best = None
+		if startcol is not None and endlineno == lineno:
+			for span in spans:
+				if span[0] <= startcol and stopcol <= span[1] and (best is None or span[1]-span[0] < best[1]-best[0]):
+					best = span
+		if best is None:
+			best = max(spans, key=lambda span: span[1]-span[0])
+		_decorateexception(exc, self.nodes[best[2]])
+
+
 ###
 ### Various versions of undefined objects
 ###
@@ -6605,34 +8867,34 @@ class TemplateClosure(BlockAST):
 
 	@withcontext
 	def ul4_render(self, context, /, *args, **kwargs):
-		vars = _makevars(self.signature, args, kwargs)
-		vars = collections.ChainMap(vars, self.vars)
+		args = _makevars(self.signature, args, kwargs)
+		vars = collections.ChainMap(args, self.vars)
 		with context.replacevars(vars):
-			# Call :meth:`_renderbound` to bypass binding the arguments again
+			# Call :meth:`_rendercached` to bypass binding the arguments again
 			# (which wouldn't work anyway as ``self.template.signature`` is an :class:`AST` object)
-			self.template._renderbound(context)
+			self.template._rendercached(context, args)
 
 	# This will be exposed to UL4 as ``renders``
 	@withcontext
 	def ul4_renders(self, context, /, *args, **kwargs):
-		vars = _makevars(self.signature, args, kwargs)
-		vars = collections.ChainMap(vars, self.vars)
+		args = _makevars(self.signature, args, kwargs)
+		vars = collections.ChainMap(args, self.vars)
 		stream = io.StringIO()
 		with context.replacestream(stream):
 			with context.replacevars(vars):
-				# Call :meth:`_renderbound` to bypass binding the arguments again
+				# Call :meth:`_rendercached` to bypass binding the arguments again
 				# (which wouldn't work anyway as ``self.template.signature`` is an :class:`AST` object)
-				self.template._renderbound(context)
+				self.template._rendercached(context, args)
 		return stream.getvalue()
 
 	@withcontext
 	def ul4_call(self, context, /, *args, **kwargs):
-		vars = _makevars(self.signature, args, kwargs)
-		vars = collections.ChainMap(vars, self.vars)
+		args = _makevars(self.signature, args, kwargs)
+		vars = collections.ChainMap(args, self.vars)
 		with context.replacevars(vars):
-			# Call :meth:`_callbound` to bypass binding the arguments again
+			# Call :meth:`_callcached` to bypass binding the arguments again
 			# (which wouldn't work anyway as ``self.template.signature`` is an :class:`AST` object)
-			return self.template._callbound(context)
+			return self.template._callcached(context, args)
 
 	def __getattr__(self, name):
 		if name == "renders":
@@ -6765,3 +9027,97 @@ class BoundTemplate:
 	@withcontext
 	def ul4_call(self, context, /, *args, **kwargs):
 		return self.template.ul4_call(context, *(self.object,) + args, **kwargs)
+
+
+class ResultCache:
+	"""
+	A cache for the results of rendering and calling a memoized template (see
+	:meth:`Template.memoize`).
+
+	The cache keeps at most :attr:`maxsize` results (or an unlimited number if
+	:attr:`maxsize` is :const:`None`) and drops the least recently used results
+	first. The attributes :attr:`hits`, :attr:`misses` and :attr:`evictions`
+	count cache hits, cache misses and dropped results.
+	"""
+
+	def __init__(self, maxsize=128, builtins=frozenset()):
+		if maxsize is not None and maxsize < 0:
+			raise ValueError(f"maxsize must be >= 0 or None, not {maxsize!r}")
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self._builtins = builtins # Names of the builtins the template uses
+		self._results = collections.OrderedDict()
+		self._lock = threading.Lock()
+
+	def __repr__(self):
+		return f"<{self.__class__.__module__}.{self.__class__.__qualname__} maxsize={self.maxsize!r} size={len(self._results):,} hits={self.hits:,} misses={self.misses:,} at {id(self):#x}>"
+
+	def __len__(self):
+		return len(self._results)
+
+	def clear(self):
+		"""
+		Drop all cached results.
+		"""
+		with self._lock:
+			self._results.clear()
+
+	@classmethod
+	def _valuekey(cls, value):
+		# Return the part of the cache key for the argument value ``value``.
+		# This includes the type of ``value`` and (for tuples and frozensets)
+		# the types of all items, so that e.g. ``(1, 1.0)`` and ``(1.0, 1)`` get
+		# different keys. Floats and decimals that are equal but are formatted
+		# differently (like ``0.0`` and ``-0.0`` or ``Decimal("1.0")`` and
+		# ``Decimal("1.00")``) get different keys too.
+		if isinstance(value, tuple):
+			return (type(value), tuple(cls._valuekey(item) for item in value))
+		elif isinstance(value, frozenset):
+			return (type(value), frozenset(cls._valuekey(item) for item in value))
+		elif isinstance(value, float):
+			return (type(value), value, math.copysign(1.0, value))
+		elif isinstance(value, decimal.Decimal):
+			return (type(value), str(value))
+		return (type(value), value)
+
+	def _key(self, context, mode, args):
+		# Return the key for the result of rendering (``mode == "render"``) or
+		# calling (``mode == "call"``) the template with the arguments ``args``
+		# in ``context`` (or :const:`None` if the result can't be cached)
+		if self._builtins and not self._builtins.isdisjoint(context.globals):
+			# Global variables hide builtins
+			return None
+		# Include the types, as equal values of different types might produce different output
+		key = (mode, tuple(context.indents) if mode == "render" else None, *((name, self._valuekey(value)) for (name, value) in args.items()))
+		try:
+			hash(key)
+		except TypeError:
+			return None
+		return key
+
+	def _get(self, key):
+		with self._lock:
+			try:
+				result = self._results[key]
+			except KeyError:
+				self.misses += 1
+				return _unset
+			self._results.move_to_end(key)
+			self.hits += 1
+			return result
+
+	def _put(self, key, result):
+		if self.maxsize == 0:
+			return
+		with self._lock:
+			self._results[key] = result
+			self._results.move_to_end(key)
+			if self.maxsize is not None:
+				while len(self._results) > self.maxsize:
+					self._results.popitem(last=False)
+					self.evictions += 1
+
+
+set_errortracking(os.environ.get("LL_UL4_ERRORTRACKING", "eager"))
@@ -383,6 +383,71 @@ those created by previous dumps.
 	information about back references.
 
 
+Binary UL4ON
+------------
+
+Besides the text format :mod:`!ll.ul4on` supports a binary variant of UL4ON
+(via :func:`dumpb` and :func:`loadb` or by passing ``binary=True`` to
+:class:`Encoder` and :class:`Decoder`). It uses the same typecodes and the same
+semantics for backreferences and persistent objects, but integers are stored
+as variable length integers, floats as eight byte IEEE 754 numbers and strings
+as UTF-8 encoded bytes prefixed with their length. There is no whitespace
+between items::
+
+	>>> ul4on.dumpb([42, 'foo', 'foo'])
+	b'LiTS\x03foo^\x01]'
+	>>> ul4on.loadb(b'LiTS\x03foo^\x01]')
+	[42, 'foo', 'foo']
+
+Producing and parsing binary dumps is faster than for text dumps, so this
+is useful for big dumps that are only ever processed by Python.
+
+
+Incremental loading
+-------------------
+
+For huge dumps where only parts of the data are needed, :func:`iterevents`
+produces parser events instead of creating the complete object::
+
+	>>> dump = ul4on.dumps({'records': [{'id': 1}, {'id': 2}]})
+	>>> list(ul4on.iterevents(io.StringIO(dump)))
+	[('startdict', None), ('key', 'records'), ('startlist', None), ('startdict', None), ('key', 'id'), ('value', 1), ('enddict', None), ('startdict', None), ('key', 'id'), ('value', 2), ('enddict', None), ('endlist', None), ('enddict', None)]
+
+and :func:`iterload_items` creates the items of one list in the dump one at a
+time::
+
+	>>> for record in ul4on.iterload_items(io.StringIO(dump), ['records']):
+	...     print(record)
+	...
+	{'id': 1}
+	{'id': 2}
+
+
+Loading files
+-------------
+
+:func:`loadfile` loads a dump from a file. The file is memory mapped and
+parsed directly from the mapped buffer (so the content of the file never has
+to be copied into one big Python string). With ``lazy=True`` :func:`loadfile`
+returns a :class:`LazyDict` if the top level object is a dictionary: The keys
+are loaded immediately, but each value is only loaded when it's accessed for
+the first time::
+
+	>>> d = ul4on.loadfile('templates.ul4on', lazy=True)
+	>>> list(d)
+	['main', 'header', 'footer']
+	>>> d['header']
+	<ll.ul4c.Template name='header' ...>
+
+This is useful for big read-only dumps (like template libraries or lookup
+tables), where a process usually only needs a small part of the data.
+
+A lazy :class:`Decoder` also lets objects defer loading parts of their
+content (see :meth:`Decoder.loadlazy`). :class:`ll.ul4c.Template` uses this
+to load the content of locally defined templates only when they are rendered
+or inspected.
+
+
 Module documentation
 --------------------
 '''
@@ -390,7 +455,7 @@ Module documentation
 from typing import *
 from typing import TextIO
 
-import datetime, collections, io
+import os, datetime, collections, io, struct, re, weakref, mmap, bisect, threading
 from collections import abc
 
 
@@ -421,6 +486,58 @@ def register(name : str):
 from ll import ul4c
 
 
+# Helper functions for the binary variant of UL4ON
+
+_float = struct.Struct(">d")
+
+
+# Placeholder in the backreference table of a :class:`Decoder` for lists,
+# sets and dictionaries that have not been created by
+# :meth:`Decoder.iterevents` or :meth:`Decoder.iterload_items`
+_streamed = object()
+
+
+# Placeholder in the backreference table of a :class:`Decoder` for objects
+# that have been skipped by :meth:`Decoder.loadlazy` and haven't been loaded yet
+_unloaded = object()
+
+
+# Regular expressions used by the text variant of the :class:`Decoder`
+_nonspace = re.compile("\\S")
+_token = re.compile("\\S*")
+_strings = {
+	"'": re.compile("[^'\\\\]*(?:\\\\.[^'\\\\]*)*'", re.S),
+	'"': re.compile('[^"\\\\]*(?:\\\\.[^"\\\\]*)*"', re.S),
+}
+
+# The same for text dumps in UTF-8 encoded bytes (see :func:`loadfile`)
+_nonspaceb = re.compile(b"\\S")
+_tokenb = re.compile(b"\\S*")
+
+
+# Used by :meth:`Decoder._skippy`: The number of items for typecodes of
+# objects with a fixed number of items and the terminator and the number of
+# items before the content for typecodes of objects with variable content
+_skipsizes = {"c": 4, "z": 7, "x": 3, "r": 2, "t": 3, "m": 1}
+_skipterminators = {"l": ("]", 0), "y": ("}", 0), "d": ("}", 0), "e": ("}", 0), "o": (")", 1), "p": (")", 2)}
+
+
+def _varint(value:int) -> bytes:
+	# Encode the non-negative integer ``value`` as an LEB128 variable length integer
+	buffer = bytearray()
+	while value >= 0x80:
+		buffer.append((value & 0x7f) | 0x80)
+		value >>= 7
+	buffer.append(value)
+	return bytes(buffer)
+
+
+def _zigzag(value:int) -> bytes:
+	# Encode the integer ``value`` as a zigzag encoded variable length integer
+	# (i.e. small negative numbers will have a short encoding too)
+	return _varint(value << 1 if value >= 0 else ((-value) << 1) - 1)
+
+
 class Encoder:
 	"""
 	An :class:`Encoder` is used for serializing an object into an UL4ON dump.
@@ -431,16 +548,52 @@ class Encoder:
 	ul4_type = ul4c.InstantiableType("ul4on", "Encoder", "An Encoder is used for serializing an object into an UL4ON dump.")
 	ul4_attrs = {"dumps"}
 
-	def __init__(self, indent:str=None):
+	def __init__(self, indent:str=None, binary:bool=False, dedupstrings:bool=False, scalarbackrefs:bool=True, maxbackrefs:Optional[int]=None):
 		"""
 		Create an encoder for serializing objects.
 
 		When ``indent`` is not :const:`None`, it is used as an indentation string
 		for pretty printing the output.
+
+		If ``binary`` is true, the encoder produces the binary variant of UL4ON
+		(and the stream must be a binary stream). Indentation is not supported
+		in this case.
+
+		Usually objects that have been dumped before are output as backreferences
+		if they are the same object (i.e. have the same :func:`id`). The
+		following options change that:
+
+		``dedupstrings``
+			If true, strings will be output as backreferences if they are equal
+			to a string dumped before.
+
+		``scalarbackrefs``
+			If false, no backreferences will be used for strings, colors, dates,
+			timestamps, slices, timedeltas and monthdeltas.
+
+		``maxbackrefs``
+			If not :const:`None`, at most ``maxbackrefs`` objects will be
+			available for backreferences. Objects dumped after that are always
+			output completely. Note that this means that recursive data
+			structures that are dumped after that point can't be dumped.
+
+		Since the encoder has to keep all objects that are available for
+		backreferences alive, ``scalarbackrefs`` and ``maxbackrefs`` can be
+		used to limit the memory usage of encoders that are used for a long time.
 		"""
+		if binary and indent:
+			raise ValueError("indentation is not supported for binary UL4ON")
+		if dedupstrings and not scalarbackrefs:
+			raise ValueError("dedupstrings requires scalarbackrefs")
+		if maxbackrefs is not None and maxbackrefs < 0:
+			raise ValueError(f"maxbackrefs must be a non-negative integer or None, got {maxbackrefs!r}")
 		self.stream = None # type: Optional[TextIO]
 		self._level = 0
 		self.indent = indent
+		self.binary = binary
+		self.dedupstrings = dedupstrings
+		self.scalarbackrefs = scalarbackrefs
+		self.maxbackrefs = maxbackrefs
 		self._lastwaslf = False
 		# Remember whether we have dumped something into the stream (so we have to write separator whitespace/indentation) or not
 		self._first = True
@@ -448,13 +601,37 @@ class Encoder:
 		self._objects = [] # type: List[Any]
 		# Maps object ids to their position in ``_objects``
 		self._id2index = {} # type: Dict[int, int]
-
-	def _record(self, obj:Any) -> None:
-		# Record that we've written this object and in which position
-		self._id2index[id(obj)] = len(self._objects)
+		# Maps strings to their position in ``_objects`` (if ``dedupstrings`` is true)
+		self._str2index = {} if dedupstrings else None # type: Optional[Dict[str, int]]
+
+	def _record(self, obj:Any, scalar:bool=False) -> bool:
+		# Record that we've written this object and in which position (if the
+		# object should be available for backreferences). Return whether the
+		# object has been recorded (i.e. whether the uppercase typecode must be
+		# used).
+		if scalar and not self.scalarbackrefs:
+			return False
+		if self.maxbackrefs is not None and len(self._objects) >= self.maxbackrefs:
+			return False
+		if self._str2index is not None and type(obj) is str:
+			self._str2index[obj] = len(self._objects)
+		else:
+			self._id2index[id(obj)] = len(self._objects)
 		self._objects.append(obj)
+		return True
+
+	def _backref(self, index:int) -> None:
+		if self.binary:
+			self.stream.write(b"^" + _varint(index))
+		else:
+			self._line(f"^{index}")
 
 	def _line(self, line:str, *items:Any):
+		if self.binary:
+			self.stream.write(line.encode("ascii"))
+			for item in items:
+				self.dump(item)
+			return
 		if self.indent:
 			self.stream.write(self.indent*self._level)
 		else:
@@ -478,7 +655,7 @@ class Encoder:
 		Serialize ``obj`` and return the resulting dump as a string.
 		"""
 
-		self.stream = io.StringIO()
+		self.stream = io.BytesIO() if self.binary else io.StringIO()
 		self._level = 0
 		self._lastwaslf = False
 		self._first = True
@@ -503,93 +680,198 @@ class Encoder:
 			self._lastwaslf = False
 			self._first = True
 
+		if _ul4on is not None and not self.indent:
+			# Use the C implementation
+			_ul4on.dump(self, obj)
 		# Have we written this object already?
-		if id(obj) in self._id2index:
+		elif id(obj) in self._id2index:
 			# Yes: Store a backreference to the object
-			index = self._id2index[id(obj)]
-			self._line(f"^{index}")
+			self._backref(self._id2index[id(obj)])
 		else:
-			from ll import color, misc
 			# No: Write the object itself
-			# We're not using backreferences if the object itself has a shorter dump
-			if obj is None:
-				self._line("n")
-			elif isinstance(obj, bool):
-				self._line("bT" if obj else "bF")
-			elif isinstance(obj, int):
-				self._line(f"i{obj}")
-			elif isinstance(obj, float):
-				self._line(f"f{obj!r}")
-			elif isinstance(obj, str):
-				self._record(obj)
-				dump = repr(obj).replace("<", "\\x3c") # Prevent XSS (when the value is embedded literally in a ``<script>`` tag)
-				self._line(f"S{dump}")
-			elif isinstance(obj, slice):
-				self._record(obj)
-				self._line("R", obj.start, obj.stop)
-			elif isinstance(obj, color.Color):
-				self._record(obj)
-				self._line("C", obj.r(), obj.g(), obj.b(), obj.a())
-			elif isinstance(obj, datetime.datetime):
-				self._record(obj)
-				self._line("Z", obj.year, obj.month, obj.day, obj.hour, obj.minute, obj.second, obj.microsecond)
-			elif isinstance(obj, datetime.date):
-				self._record(obj)
-				self._line("X", obj.year, obj.month, obj.day)
-			elif isinstance(obj, datetime.timedelta):
-				self._record(obj)
-				self._line("T", obj.days, obj.seconds, obj.microseconds)
-			elif isinstance(obj, misc.monthdelta):
-				self._record(obj)
-				self._line("M", obj.months())
-			elif isinstance(obj, abc.Sequence):
-				self._record(obj)
-				self._line("L")
-				self._level += 1
-				for item in obj:
-					self.dump(item)
-				self._level -= 1
-				self._line("]")
-			elif isinstance(obj, (dict, collections.OrderedDict)):
-				self._record(obj)
-				self._line("E")
-				self._level += 1
-				for (key, item) in obj.items():
-					self.dump(key)
-					self.dump(item)
-				self._level -= 1
-				self._line("}")
-			elif isinstance(obj, abc.Mapping):
-				self._record(obj)
-				self._line("D")
-				self._level += 1
-				for (key, item) in obj.items():
-					self.dump(key)
-					self.dump(item)
-				self._level -= 1
-				self._line("}")
-			elif isinstance(obj, abc.Set):
-				self._record(obj)
-				self._line("Y")
-				self._level += 1
-				for item in obj:
-					self.dump(item)
-				self._level -= 1
-				self._line("}")
-			else:
-				ul4onid = getattr(obj , "ul4onid", None)
-				self._record(obj)
-				if ul4onid is not None:
-					self._line("P", obj.ul4onname, obj.ul4onid)
-				else:
-					self._line("O", obj.ul4onname)
-				self._level += 1
-				obj.ul4ondump(self)
-				self._level -= 1
-				self._line(")")
+			cls = type(obj)
+			try:
+				encoder = _encodercache[cls]
+			except KeyError:
+				encoder = _encoderfor(cls)
+			encoder(self, obj)
 		if stream is not None:
 			self.stream = None
 
+	# Methods for dumping the object types supported by UL4ON (the object has
+	# not been dumped before, i.e. this isn't a backreference)
+	# We're not using backreferences if the object itself has a shorter dump
+
+	def _dump_none(self, obj:None) -> None:
+		self._line("n")
+
+	def _dump_bool(self, obj:bool) -> None:
+		self._line("bT" if obj else "bF")
+
+	def _dump_int(self, obj:int) -> None:
+		if self.binary:
+			self.stream.write(b"i" + _zigzag(obj))
+		else:
+			self._line(f"i{obj}")
+
+	def _dump_float(self, obj:float) -> None:
+		if self.binary:
+			self.stream.write(b"f" + _float.pack(obj))
+		else:
+			self._line(f"f{obj!r}")
+
+	def _dump_str(self, obj:str) -> None:
+		if self._str2index is not None and obj in self._str2index:
+			self._backref(self._str2index[obj])
+			return
+		typecode = "S" if self._record(obj, True) else "s"
+		if self.binary:
+			dump = obj.encode("utf-8", "surrogatepass")
+			self.stream.write(typecode.encode("ascii") + _varint(len(dump)) + dump)
+		else:
+			dump = repr(obj).replace("<", "\\x3c") # Prevent XSS (when the value is embedded literally in a ``<script>`` tag)
+			self._line(f"{typecode}{dump}")
+
+	def _dump_slice(self, obj:slice) -> None:
+		self._line("R" if self._record(obj, True) else "r", obj.start, obj.stop)
+
+	def _dump_color(self, obj:"color.Color") -> None:
+		self._line("C" if self._record(obj, True) else "c", obj.r(), obj.g(), obj.b(), obj.a())
+
+	def _dump_datetime(self, obj:datetime.datetime) -> None:
+		self._line("Z" if self._record(obj, True) else "z", obj.year, obj.month, obj.day, obj.hour, obj.minute, obj.second, obj.microsecond)
+
+	def _dump_date(self, obj:datetime.date) -> None:
+		self._line("X" if self._record(obj, True) else "x", obj.year, obj.month, obj.day)
+
+	def _dump_timedelta(self, obj:datetime.timedelta) -> None:
+		self._line("T" if self._record(obj, True) else "t", obj.days, obj.seconds, obj.microseconds)
+
+	def _dump_monthdelta(self, obj:"misc.monthdelta") -> None:
+		self._line("M" if self._record(obj, True) else "m", obj.months())
+
+	def _dump_list(self, obj:Sequence) -> None:
+		self._line("L" if self._record(obj) else "l")
+		self._level += 1
+		for item in obj:
+			self.dump(item)
+		self._level -= 1
+		self._line("]")
+
+	def _dump_dict(self, obj:dict) -> None:
+		self._line("E" if self._record(obj) else "e")
+		self._level += 1
+		for (key, item) in obj.items():
+			self.dump(key)
+			self.dump(item)
+		self._level -= 1
+		self._line("}")
+
+	def _dump_mapping(self, obj:Mapping) -> None:
+		self._line("D" if self._record(obj) else "d")
+		self._level += 1
+		for (key, item) in obj.items():
+			self.dump(key)
+			self.dump(item)
+		self._level -= 1
+		self._line("}")
+
+	def _dump_set(self, obj:AbstractSet) -> None:
+		self._line("Y" if self._record(obj) else "y")
+		self._level += 1
+		for item in obj:
+			self.dump(item)
+		self._level -= 1
+		self._line("}")
+
+	def _dump_object(self, obj:Any) -> None:
+		ul4onid = getattr(obj , "ul4onid", None)
+		recorded = self._record(obj)
+		if ul4onid is not None:
+			self._line("P" if recorded else "p", obj.ul4onname, obj.ul4onid)
+		else:
+			self._line("O" if recorded else "o", obj.ul4onname)
+		self._level += 1
+		obj.ul4ondump(self)
+		self._level -= 1
+		self._line(")")
+
+
+# Maps types to the function used for dumping objects of exactly this type
+# (the functions will be called with the :class:`Encoder` and the object)
+_encoders = {
+	type(None): Encoder._dump_none,
+	bool: Encoder._dump_bool,
+	int: Encoder._dump_int,
+	float: Encoder._dump_float,
+	str: Encoder._dump_str,
+	slice: Encoder._dump_slice,
+	datetime.datetime: Encoder._dump_datetime,
+	datetime.date: Encoder._dump_date,
+	datetime.timedelta: Encoder._dump_timedelta,
+	list: Encoder._dump_list,
+	tuple: Encoder._dump_list,
+	dict: Encoder._dump_dict,
+	set: Encoder._dump_set,
+	frozenset: Encoder._dump_set,
+}
+
+# Cache for the encoders for all types we've seen (including subclasses of the
+# types in ``_encoders`` and types that are only registered with the ABCs)
+_encodercache = dict(_encoders)
+
+
+def _encoderfor(cls:type) -> Callable[[Encoder, Any], None]:
+	# Find the encoder for objects of type ``cls`` (this is only called when
+	# ``cls`` isn't in ``_encodercache``)
+	from ll import color, misc
+	# Those can't be put into ``_encoders`` on import because of circular imports
+	_encoders.setdefault(color.Color, Encoder._dump_color)
+	_encoders.setdefault(misc.monthdelta, Encoder._dump_monthdelta)
+	for base in cls.__mro__:
+		if base in _encoders:
+			encoder = _encoders[base]
+			break
+	else:
+		if issubclass(cls, abc.Sequence):
+			encoder = Encoder._dump_list
+		elif issubclass(cls, abc.Mapping):
+			encoder = Encoder._dump_mapping
+		elif issubclass(cls, abc.Set):
+			encoder = Encoder._dump_set
+		else:
+			encoder = Encoder._dump_object
+	_encodercache[cls] = encoder
+	return encoder
+
+
+def register_encoder(cls:type, encoder:Union[type, Callable[[Encoder, Any], None]]) -> None:
+	"""
+	Register a fast encoder for objects of type ``cls`` (and its subclasses).
+
+	:class:`Encoder` looks up how to dump an object by its exact type first and
+	falls back to checking base classes and the abstract base classes from
+	:mod:`collections.abc` only once per type. Registering an encoder bypasses
+	these checks.
+
+	``encoder`` can be another type, then objects of type ``cls`` will be
+	dumped like objects of this type, for example::
+
+		ul4on.register_encoder(MyList, list)
+
+	Otherwise ``encoder`` must be a callable that will be called with the
+	:class:`Encoder` and the object and must dump exactly one object (usually
+	by calling :meth:`Encoder.dump`). Note that in this case the object itself
+	will not be available for backreferences::
+
+		ul4on.register_encoder(Point, lambda encoder, obj: encoder.dump([obj.x, obj.y]))
+	"""
+	if isinstance(encoder, type):
+		encoder = _encodercache.get(encoder) or _encoderfor(encoder)
+	_encoders[cls] = encoder
+	_encodercache.clear()
+	_encodercache.update(_encoders)
+
 
 class Decoder:
 	"""
@@ -601,7 +883,10 @@ class Decoder:
 	ul4_type = ul4c.InstantiableType("ul4on", "Decoder", "A Decoder is used for deserializing an UL4ON dump.")
 	ul4_attrs = {"loads", "reset"}
 
-	def __init__(self, registry:Optional[Dict[str, Callable[..., Any]]]=None):
+	# The size of the blocks read from the input stream
+	bufsize = 64*1024
+
+	def __init__(self, registry:Optional[Dict[str, Callable[..., Any]]]=None, binary:bool=False, cache:str="dict", maxsize:Optional[int]=None, lazy:bool=False):
 		"""
 		Create a decoder for deserializing objects from an UL4ON dump.
 
@@ -609,12 +894,81 @@ class Decoder:
 		type names to callables that create new empty instances of those types.
 		Any type not found in ``registry`` will be looked up in the global
 		registry (see :func:`register`).
+
+		If ``binary`` is true, the decoder expects the binary variant of UL4ON
+		(and the stream must be a binary stream).
+
+		``cache`` specifies how persistent objects are cached:
+
+		``"dict"``
+			All persistent objects are kept (this is the default).
+
+		``"weak"``
+			Only weak references to persistent objects are kept, i.e. persistent
+			objects are forgotten once they are no longer used elsewhere.
+
+		``"lru"``
+			At most ``maxsize`` persistent objects are kept. When more objects
+			are loaded the least recently used ones are forgotten.
+
+		When a forgotten persistent object is encountered again, a new object
+		will be created. The attributes :attr:`hits`, :attr:`misses` and
+		:attr:`evictions` count how often persistent objects have been found in
+		the cache, how often they had to be created and how often objects have
+		been removed from the cache.
+
+		If ``lazy`` is true, objects may defer loading parts of their content
+		until they are needed (see :meth:`loadlazy`). :class:`ll.ul4c.Template`
+		does this for the content of locally defined templates and
+		:meth:`loadfile` does it for the values of a dictionary.
 		"""
+		if cache == "lru":
+			if maxsize is None or maxsize < 1:
+				raise ValueError(f"maxsize must be a positive integer for the 'lru' cache, got {maxsize!r}")
+		elif cache in ("dict", "weak"):
+			if maxsize is not None:
+				raise ValueError("maxsize is only supported for the 'lru' cache")
+		else:
+			raise ValueError(f"unknown cache {cache!r}, expected 'dict', 'weak' or 'lru'")
+		self.binary = binary
+		self.cache = cache
+		self.maxsize = maxsize
+		self.lazy = lazy
+		self.hits = 0
+		self.misses = 0
+		# Number of evictions for the ``"lru"`` cache
+		self._evictions = 0
+		# Number of objects added to the ``"weak"`` cache minus the ones removed
+		# via :meth:`forget_persistent_object`
+		self._weakadded = 0
 		self.stream = None # type: Optional[TextIO]
-		# Next character to be read by :meth:`_nextchar`
-		self._bufferedchar = None # type: Optional[str]
+		# The input is read in blocks into ``_buffer``, ``_pos`` is the position
+		# of the next character to be read in ``_buffer`` and ``_offset`` is the
+		# position of ``_buffer[0]`` in the input
+		self._buffer = b"" if binary else ""
+		self._pos = 0
+		self._offset = 0
+		# The stream that ``_buffer`` has been read from (:const:`None` if
+		# there's no more input available)
+		self._source = None
+		# Is ``_buffer`` a UTF-8 encoded text dump in a bytes-like object?
+		self._utf8 = False
+		# If not :const:`None`, the input from this position on must be kept
+		# in the buffer (used by :meth:`loadlazy`)
+		self._keep = None # type: Optional[int]
 		self._objects = [] # type: List[Any]
-		self._persistent_objects = {} # type: Dict[Tuple[str, str], Any]
+		# The :class:`LazyValue` objects that haven't been loaded yet (sorted by
+		# the position of their objects in ``_objects``)
+		self._lazyvalues = [] # type: List[LazyValue]
+		# Serializes loading :class:`LazyValue` objects (which might happen in
+		# multiple threads, e.g. when rendering templates)
+		self._lazylock = threading.RLock()
+		if cache == "weak":
+			self._persistent_objects = weakref.WeakValueDictionary() # type: MutableMapping[Tuple[str, str], Any]
+		elif cache == "lru":
+			self._persistent_objects = collections.OrderedDict()
+		else:
+			self._persistent_objects = {}
 		# Used for "interning" dictionary keys
 		self._keycache = {} # type: Dict[str, str]
 		self.registry = registry
@@ -626,7 +980,16 @@ class Decoder:
 		Deserialize the object in the string ``dump`` and return it.
 		"""
 
-		return self.load(io.StringIO(dump))
+		self._buffer = dump
+		self._pos = 0
+		self._offset = 0
+		self._source = None
+		self._utf8 = False
+		self._stack = []
+		try:
+			return self._load()
+		finally:
+			self._stack = None
 
 	def load(self, stream:Optional[TextIO]=None) -> Any:
 		"""
@@ -637,28 +1000,353 @@ class Decoder:
 		Passing :const:`None` for ``stream`` may only be done by objects that
 		call :meth:`!load` to implement UL4ON deserialization in their
 		own :meth:`ul4onload` method.
+
+		The stream is read in blocks of :attr:`bufsize` characters (or bytes),
+		so more input than the dump of the object might be consumed. However
+		calling :meth:`!load` again with the same stream continues after the
+		object.
 		"""
-		if stream is not None:
-			self.stream = stream
-			self._stack = []
-			self._bufferedchar = None
+		if stream is None:
+			return self._load()
+		self._begin(stream)
+		try:
+			return self._load()
+		finally:
+			self.stream = None
+			self._stack = None
+
+	def _loadonce(self, stream:TextIO) -> Any:
+		# Load an object from ``stream`` like :meth:`load`. As the decoder won't
+		# be used with this stream again, the input that has been read but not
+		# consumed is given back to the stream (if it is seekable), so that the
+		# stream is positioned directly after the object. This is used by
+		# :func:`load` and :meth:`ll.ul4c.Template.load`.
+		try:
+			start = stream.tell() if stream.seekable() else None
+		except (AttributeError, OSError):
+			start = None
+		value = self.load(stream)
+		if start is not None and self._pos < len(self._buffer):
+			if self.binary:
+				stream.seek(self._pos - len(self._buffer), io.SEEK_CUR)
+			elif isinstance(stream, io.StringIO):
+				stream.seek(start + self._tell())
+			else:
+				# Positions in other text streams are opaque, so read the dump again
+				stream.seek(start)
+				size = self._tell()
+				while size:
+					data = stream.read(min(size, self.bufsize))
+					if not data:
+						break
+					size -= len(data)
+		return value
+
+	def loadfile(self, path:Union[str, os.PathLike]) -> Any:
+		"""
+		Deserialize the object in the file ``path`` and return it.
+
+		The file is memory mapped and the dump is parsed directly from the mapped
+		buffer. Text dumps must be UTF-8 encoded.
+
+		If the decoder is lazy and the object in the file is a dictionary, a
+		:class:`LazyDict` will be returned that loads the values of the
+		dictionary only when they are accessed. (The file stays mapped as long
+		as there are parts of the dump that haven't been loaded yet.)
+		"""
+		with open(path, "rb") as f:
+			if not os.fstat(f.fileno()).st_size:
+				raise EOFError()
+			buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		self._beginbuffer(buffer)
+		try:
+			if self.lazy:
+				typecode = self._nextchar()
+				self._pos -= 1 # Push back the typecode
+				if typecode in "dDeE":
+					return LazyDict(self)
+			return self._load()
+		finally:
+			self._endbuffer()
+
+	def loadlazy(self) -> "LazyValue":
+		"""
+		Skip the next object in the input and return a :class:`LazyValue` that
+		loads the object when its :meth:`~LazyValue.load` method is called.
+
+		This can be used by :meth:`ul4onload` implementations for parts of an
+		object that might never be needed (if :attr:`lazy` is true). Skipping an
+		object is much faster than loading it, but (if the input is a stream)
+		the dump of the object has to be kept in memory until it is loaded.
+
+		Objects in the skipped part of the dump that are referenced by
+		backreferences after that part will be loaded when the backreference
+		is encountered.
+		"""
+		keep = self._keep
+		offset = self._tell()
+		if keep is None:
+			self._keep = offset
+		start = len(self._objects)
+		try:
+			self._skip()
+			if self._offset or self._source is not None:
+				# The buffer doesn't contain the complete input, so copy the dump
+				data = self._buffer[offset-self._offset:self._pos]
+				pos = 0
+			else:
+				data = self._buffer
+				pos = offset
+				offset = 0
+		finally:
+			self._keep = keep
+		value = LazyValue(self, data, pos, offset, start, len(self._objects))
+		bisect.insort(self._lazyvalues, value, key=_lazystart)
+		return value
+
+	def iterevents(self, stream:TextIO) -> Generator[Tuple[str, Any], None, None]:
+		"""
+		Read one object from the stream ``stream`` and generate parser events
+		for it instead of returning the complete object.
+
+		The generator produces ``(event, value)`` tuples. ``event`` is one of:
+
+		``"startlist"``, ``"endlist"``, ``"startset"``, ``"endset"``, ``"startdict"``, ``"enddict"``
+			The start or end of a list, set or dictionary. ``value`` is
+			:const:`None`. Those container objects will not be created.
+
+		``"key"``
+			A dictionary key (``value`` is the key). The events for the value
+			follow.
+
+		``"value"``
+			Any other object (``value`` is the object). This includes objects that
+			use :meth:`ul4onload` and persistent objects (which will be loaded
+			completely) as well as backreferences to anything that isn't a
+			container.
+
+		``"backref"``
+			A backreference to a list, set or dictionary that has been reported
+			via events before. ``value`` is the position of the object in the
+			backreference table.
+		"""
+		self._begin(stream)
+		try:
+			yield from self._iterevents()
+		finally:
+			self.stream = None
+			self._stack = None
+
+	def iterload_items(self, stream:TextIO, path:Sequence=(), keepbackrefs:bool=False) -> Generator[Any, None, None]:
+		"""
+		Read one object from the stream ``stream`` and generate the items of the
+		list at the path ``path`` inside this object one at a time.
+
+		``path`` is a sequence of dictionary keys and list indexes that leads
+		from the top level object to the list, e.g. for the dump of
+		``{"records": [...]}`` ``path`` would be ``["records"]``. Everything
+		outside of this list is skipped (without creating any list, set or
+		dictionary objects), so memory usage doesn't depend on the size of the
+		dump.
+
+		Backreferences to strings and other objects work as usual (and so do
+		persistent objects), but lists, sets and dictionaries from the skipped
+		parts of the dump are never created and those from the items are
+		dropped from the backreference table once the item has been produced,
+		so backreferences to them raise a :exc:`ValueError`.
+
+		If ``keepbackrefs`` is true, all backreferences work (except those to
+		the lists and dictionaries on the path itself): Objects from the skipped
+		parts of the dump will be loaded when a backreference to them is
+		encountered (as for :meth:`loadlazy`) and the lists, sets and
+		dictionaries from the items are kept in the backreference table.
+		However this means that the dump of skipped parts that contain such
+		objects and all items are kept in memory, so memory usage grows with
+		the size of the dump (about as much as for :meth:`load`). Dumps written
+		by an :class:`Encoder` with ``maxbackrefs`` limit the number of objects
+		that are kept.
+		"""
+		self._begin(stream)
+		try:
+			yield from self._iterload_items(list(path), keepbackrefs)
+		finally:
+			self.stream = None
+			self._stack = None
+
+	def _begin(self, stream:TextIO) -> None:
+		if stream is not self._source:
+			self._buffer = b"" if self.binary else ""
+			self._pos = 0
+			self._offset = 0
+			self._source = stream
+			self._utf8 = False
+		self.stream = stream
+		self._stack = []
+
+	def _beginbuffer(self, buffer:Union[bytes, mmap.mmap]) -> None:
+		# Use the bytes-like object ``buffer`` as the complete input
+		self._buffer = buffer
+		self._pos = 0
+		self._offset = 0
+		self._source = None
+		self._utf8 = not self.binary
+		self.stream = None
+		self._stack = []
+
+	def _endbuffer(self) -> None:
+		# Release the buffer passed to :meth:`_beginbuffer`
+		# (:class:`LazyValue` objects might still reference it, so it's not
+		# closed explicitly)
+		self._buffer = b"" if self.binary else ""
+		self._pos = 0
+		self._utf8 = False
+		self._stack = None
+
+	def _iterevents(self) -> Generator[Tuple[str, Any], None, None]:
+		typecode = self._nextchar()
+		if typecode == "^":
+			position = self._readvarint() if self.binary else self._readint()
+			value = self._objects[position]
+			if value is _streamed:
+				yield ("backref", position)
+			else:
+				yield ("value", value)
+		elif typecode in "lLyY":
+			(name, terminator) = ("list", "]") if typecode in "lL" else ("set", "}")
+			self._stack.append(name)
+			if typecode in "LY":
+				self._loading(_streamed)
+			yield (f"start{name}", None)
+			while True:
+				typecode = self._nextchar()
+				if typecode == terminator:
+					break
+				self._pos -= 1 # Push back the typecode
+				yield from self._iterevents()
+			self._stack.pop()
+			yield (f"end{name}", None)
+		elif typecode in "dDeE":
+			self._stack.append("dict" if typecode in "dD" else "odict")
+			if typecode in "DE":
+				self._loading(_streamed)
+			yield ("startdict", None)
+			while True:
+				typecode = self._nextchar()
+				if typecode == "}":
+					break
+				self._pos -= 1 # Push back the typecode
+				key = self._loadkey()
+				yield ("key", key)
+				yield from self._iterevents()
+			self._stack.pop()
+			yield ("enddict", None)
+		else:
+			self._pos -= 1 # Push back the typecode
+			yield ("value", self._load())
+
+	def _iterload_items(self, path:List, keepbackrefs:bool) -> Generator[Any, None, None]:
+		typecode = self._nextchar()
+		if path:
+			if typecode in "lL":
+				(terminator, index) = ("]", 0)
+				self._stack.append("list")
+				if typecode == "L":
+					self._loading(_streamed)
+			elif typecode in "dDeE":
+				terminator = "}"
+				self._stack.append("dict" if typecode in "dD" else "odict")
+				if typecode in "DE":
+					self._loading(_streamed)
+			else:
+				raise TypeError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): can't look up {path[0]!r} in object with typecode {typecode!r}")
+			found = False
+			while True:
+				typecode = self._nextchar()
+				if typecode == terminator:
+					break
+				self._pos -= 1 # Push back the typecode
+				if terminator == "]":
+					key = index
+					index += 1
+				else:
+					key = self._loadkey()
+				if not found and key == path[0]:
+					found = True
+					yield from self._iterload_items(path[1:], keepbackrefs)
+				elif keepbackrefs:
+					# Skip the value without materializing it. Objects in it that
+					# are available for backreferences will be loaded when a
+					# backreference to them is encountered.
+					value = self.loadlazy()
+					if value._start == value._stop:
+						# Nothing in the value can be referenced, so we don't have
+						# to keep its dump (it's the last :class:`LazyValue`)
+						self._lazyvalues.pop()
+				else:
+					# Skip the value without materializing it
+					for event in self._iterevents():
+						pass
+			self._stack.pop()
+			if not found:
+				raise KeyError(path[0])
+		else:
+			if typecode not in "lL":
+				raise TypeError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): expected list, got typecode {typecode!r}")
+			self._stack.append("list")
+			if typecode == "L":
+				self._loading(_streamed)
+			while True:
+				typecode = self._nextchar()
+				if typecode == "]":
+					break
+				self._pos -= 1 # Push back the typecode
+				start = len(self._objects)
+				yield self._load()
+				if not keepbackrefs:
+					# Drop the containers from the item, so that they can be freed
+					for (i, obj) in enumerate(self._objects[start:], start):
+						if isinstance(obj, (list, set, dict)):
+							self._objects[i] = _streamed
+			self._stack.pop()
 
+	def _loadkey(self) -> Any:
+		# Load a dictionary key (and intern it if it's a string)
+		key = self._load()
+		if isinstance(key, str):
+			if key in self._keycache:
+				key = self._keycache[key]
+			else:
+				self._keycache[key] = key
+		return key
+
+	def _load(self) -> Any:
+		if _ul4on is not None:
+			# Use the C implementation (which calls :meth:`_loadpy` for
+			# everything it doesn't handle itself)
+			return _ul4on.load(self)
+		return self._loadpy()
+
+	def _loadpy(self) -> Any:
 		typecode = self._nextchar()
 		if typecode == "^":
-			position = self._readint()
+			position = self._readvarint() if self.binary else self._readint()
 			value = self._objects[position]
+			if value is _streamed:
+				raise ValueError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): backreference to streamed object at position {position}")
+			elif value is _unloaded:
+				value = self._loadposition(position)
 		elif typecode in "nN":
 			if typecode == "N":
 				self._loading(None)
 			value = None
 		elif typecode in "bB":
-			value = self.stream.read(1)
-			if value == "T":
+			value = self._read(1)
+			if value in ("T", b"T"):
 				value = True
-			elif value == "F":
+			elif value in ("F", b"F"):
 				value = False
 			else:
-				raise ValueError(f"broken UL4ON stream at position {self.stream.tell():,}: expected 'T' or 'F' for bool; got {value!r}")
+				raise ValueError(f"broken UL4ON stream at position {self._tell():,}: expected 'T' or 'F' for bool; got {value!r}")
 			if typecode == "B":
 				self._loading(value)
 		elif typecode in "iI":
@@ -666,83 +1354,67 @@ class Decoder:
 			if typecode == "I":
 				self._loading(value)
 		elif typecode in "fF":
-			chars = []
-			while True:
-				c = self.stream.read(1)
-				if c and not c.isspace():
-					chars.append(c)
-				else:
-					value = float("".join(chars))
-					break
+			if self.binary:
+				value = _float.unpack(self._readbytes(8))[0]
+			else:
+				value = float(self._readtoken())
 			if typecode == "F":
 				self._loading(value)
+		elif typecode in "sS" and self.binary:
+			value = self._readbytes(self._readvarint()).decode("utf-8", "surrogatepass")
+			if typecode == "S":
+				self._loading(value)
 		elif typecode in "sS":
-			delimiter = self.stream.read(1)
-			if not delimiter:
-				raise EOFError()
-			buffer = io.StringIO()
-			while True:
-				c = self.stream.read(1)
-				if not c:
-					raise EOFError()
-				if c == delimiter:
-					value = buffer.getvalue().encode("ascii", "backslashreplace").decode("unicode_escape")
-					break
-				buffer.write(c)
-				if c == "\\":
-					c2 = self.stream.read(1)
-					if not c2:
-						raise EOFError()
-					buffer.write(c2)
+			value = self._readstr()
 			if typecode == "S":
 				self._loading(value)
 		elif typecode in "cC":
 			from ll import color
 			if typecode == "C":
 				oldpos = self._beginfakeloading()
-			r = self.load()
-			g = self.load()
-			b = self.load()
-			a = self.load()
+			r = self._load()
+			g = self._load()
+			b = self._load()
+			a = self._load()
 			value = color.Color(r, g, b, a)
 			if typecode == "C":
 				self._endfakeloading(oldpos, value)
 		elif typecode in "zZ":
 			if typecode == "Z":
 				oldpos = self._beginfakeloading()
-			year = self.load()
-			month = self.load()
-			day = self.load()
-			hour = self.load()
-			minute = self.load()
-			second = self.load()
-			microsecond = self.load()
+			year = self._load()
+			month = self._load()
+			day = self._load()
+			hour = self._load()
+			minute = self._load()
+			second = self._load()
+			microsecond = self._load()
 			value = datetime.datetime(year, month, day, hour, minute, second, microsecond)
 			if typecode == "Z":
 				self._endfakeloading(oldpos, value)
 		elif typecode in "xX":
 			if typecode == "X":
 				oldpos = self._beginfakeloading()
-			year = self.load()
-			month = self.load()
-			day = self.load()
+			year = self._load()
+			month = self._load()
+			day = self._load()
 			value = datetime.date(year, month, day)
 			if typecode == "X":
 				self._endfakeloading(oldpos, value)
 		elif typecode in "rR":
 			if typecode == "R":
 				oldpos = self._beginfakeloading()
-			start = self.load()
-			stop = self.load()
+			start = self._load()
+			stop = self._load()
 			value = slice(start, stop)
 			if typecode == "R":
 				self._endfakeloading(oldpos, value)
 		elif typecode in "tT":
 			if typecode == "T":
 				oldpos = self._beginfakeloading()
-			days = self.load()
-			seconds = self.load()
-			microseconds = self.load()
+			days = self._load()
+			seconds = self._load()
+			microseconds = self._load()
 			value = datetime.timedelta(days, seconds, microseconds)
 			if typecode == "T":
 				self._endfakeloading(oldpos, value)
@@ -750,7 +1422,7 @@ class Decoder:
 			from ll import misc
 			if typecode == "M":
 				oldpos = self._beginfakeloading()
-			months = self.load()
+			months = self._load()
 			value = misc.monthdelta(months)
 			if typecode == "M":
 				self._endfakeloading(oldpos, value)
@@ -765,8 +1437,8 @@ class Decoder:
 					self._stack.pop()
 					break
 				else:
-					self._bufferedchar = typecode
-					item = self.load()
+					self._pos -= 1 # Push back the typecode
+					item = self._load()
 					value.append(item)
 		elif typecode in "dDeE":
 			self._stack.append("dict" if typecode in "dD" else "odict")
@@ -779,14 +1451,9 @@ class Decoder:
 					self._stack.pop()
 					break
 				else:
-					self._bufferedchar = typecode
-					key = self.load()
-					if isinstance(key, str):
-						if key in self._keycache:
-							key = self._keycache[key]
-						else:
-							self._keycache[key] = key
-					item = self.load()
+					self._pos -= 1 # Push back the typecode
+					key = self._loadkey()
+					item = self._load()
 					value[key] = item
 		elif typecode in "yY":
 			self._stack.append("set")
@@ -799,13 +1466,13 @@ class Decoder:
 					self._stack.pop()
 					break
 				else:
-					self._bufferedchar = typecode
-					item = self.load()
+					self._pos -= 1 # Push back the typecode
+					item = self._load()
 					value.add(item)
 		elif typecode in "oO":
 			if typecode == "O":
 				oldpos = self._beginfakeloading()
-			name = self.load()
+			name = self._load()
 			self._stack.append(name)
 			cls = None
 			if self.registry is not None:
@@ -813,48 +1480,103 @@ class Decoder:
 			if cls is None:
 				cls = _registry.get(name)
 			if cls is None:
-				raise TypeError(f"broken UL4ON stream at position {self.stream.tell():,} (path {self._path()}): can't decode object of type {name!r}")
+				raise TypeError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): can't decode object of type {name!r}")
 			value = cls()
 			if typecode == "O":
 				self._endfakeloading(oldpos, value)
 			value.ul4onload(self)
 			typecode = self._nextchar()
 			if typecode != ")":
-				raise ValueError(f"broken UL4ON stream at position {self.stream.tell():,} (path {self._path()}): object terminator ')' expected, got {typecode!r}")
+				raise ValueError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): object terminator ')' expected, got {typecode!r}")
 			self._stack.pop()
 		elif typecode in "pP":
 			if typecode == "P":
 				oldpos = self._beginfakeloading()
-			name = self.load()
-			id = self.load()
+			name = self._load()
+			id = self._load()
 			self._stack.append(f"{name}={id}")
 			try:
 				value = self._persistent_objects[(name, id)]
 			except KeyError:
+				self.misses += 1
 				cls = None
 				if self.registry is not None:
 					cls = self.registry.get(name)
 				if cls is None:
 					cls = _registry.get(name)
 				if cls is None:
-					raise TypeError(f"broken UL4ON stream at position {self.stream.tell():,} (path {self._path()}): can't decode object of type {name!r} with id {id!r}") from None
+					raise TypeError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): can't decode object of type {name!r} with id {id!r}") from None
 				value = cls(id)
-				self._persistent_objects[(name, id)] = value
+				self._storepersistent((name, id), value)
+			else:
+				self.hits += 1
+				if self.maxsize is not None:
+					self._persistent_objects.move_to_end((name, id))
 			if typecode == "P":
 				self._endfakeloading(oldpos, value)
 			value.ul4onload(self)
 			typecode = self._nextchar()
 			if typecode != ")":
-				raise ValueError(f"broken UL4ON stream at position {self.stream.tell():,} (path {self._path()}): object terminator ')' expected, got {typecode!r}")
+				raise ValueError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): object terminator ')' expected, got {typecode!r}")
 			self._stack.pop()
 		else:
-			raise ValueError(f"broken UL4ON stream at position {self.stream.tell():,} (path {self._path()}): unknown typecode {typecode!r}")
+			raise ValueError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): unknown typecode {typecode!r}")
 
-		if stream is not None:
-			self.stream = None
-			self._stack = None
 		return value
 
+	def _skip(self) -> None:
+		if _ul4on is not None:
+			# Use the C implementation (which calls :meth:`_skippy` for
+			# everything it doesn't handle itself)
+			_ul4on.skip(self)
+		else:
+			self._skippy()
+
+	def _skippy(self) -> None:
+		# Skip the next object without creating it. For every object that would
+		# be available for backreferences a placeholder is recorded, so that
+		# backreferences after the skipped object still work.
+		typecode = self._nextchar()
+		if "A" <= typecode <= "Z":
+			self._loading(_unloaded)
+		typecode = typecode.lower()
+		if typecode == "^":
+			if self.binary:
+				self._readvarint()
+			else:
+				self._readtoken()
+		elif typecode == "n":
+			pass
+		elif typecode == "b":
+			self._readbytes(1)
+		elif typecode == "i":
+			self._readint()
+		elif typecode == "f":
+			if self.binary:
+				self._readbytes(8)
+			else:
+				self._readtoken()
+		elif typecode == "s":
+			if self.binary:
+				self._readbytes(self._readvarint())
+			else:
+				self._readstr()
+		elif typecode in _skipsizes:
+			for i in range(_skipsizes[typecode]):
+				self._skip()
+		elif typecode in _skipterminators:
+			(terminator, size) = _skipterminators[typecode]
+			for i in range(size):
+				self._skip()
+			while True:
+				typecode = self._nextchar()
+				if typecode == terminator:
+					break
+				self._pos -= 1 # Push back the typecode
+				self._skip()
+		else:
+			raise ValueError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): unknown typecode {typecode!r}")
+
 	def loadcontent(self) -> Generator[Any, None, None]:
 		"""
 		Load the content of an object until the "object terminator" is encountered.
@@ -872,7 +1594,7 @@ class Decoder:
 			# We always "push back" the typecode we've read so that :meth:`load`
 			# can treat all cases (i.e. whether :meth:`ul4onload` uses :meth:`load`
 			# :meth:`loadcontent` or  :meth:`loadcontentitems`) the same way.
-			self._bufferedchar = typecode
+			self._pos -= 1
 			if typecode == ")":
 				break
 			yield self.load()
@@ -890,7 +1612,7 @@ class Decoder:
 			# We always "push back" the typecode we've read so that :meth:`load`
 			# can treat all cases (i.e. whether :meth:`ul4onload` uses :meth:`load`
 			# :meth:`loadcontent` or  :meth:`loadcontentitems`) the same way.
-			self._bufferedchar = typecode
+			self._pos -= 1
 			if typecode == ")":
 				break
 			key = self.load()
@@ -904,13 +1626,19 @@ class Decoder:
 
 		However the cache for persistent objects will not be cleared.
 		"""
-		self._objects.clear()
+		if self._lazyvalues:
+			# :class:`LazyValue` objects that haven't been loaded yet still need
+			# the old backreferences
+			self._objects = []
+			self._lazyvalues = []
+		else:
+			self._objects.clear()
 
 	def store_persistent_object(self, object) -> None:
 		"""
 		Add a persistent object to the cache of persistent objects.
 		"""
-		self._persistent_objects[(object.ul4onname, object.ul4onid)] = object
+		self._storepersistent((object.ul4onname, object.ul4onid), object)
 
 	def forget_persistent_object(self, object) -> None:
 		"""
@@ -920,6 +1648,20 @@ class Decoder:
 			del self._persistent_objects[(object.ul4onname, object.ul4onid)]
 		except KeyError:
 			pass
+		else:
+			if self.cache == "weak":
+				self._weakadded -= 1
+
+	@property
+	def evictions(self) -> int:
+		"""
+		The number of persistent objects that have been removed from the cache
+		(because of the ``maxsize`` of the ``"lru"`` cache or because they have
+		been garbage collected for the ``"weak"`` cache).
+		"""
+		if self.cache == "weak":
+			return self._weakadded - len(self._persistent_objects)
+		return self._evictions
 
 	def persistent_object(self, name:str, id:str) -> Any:
 		"""
@@ -935,31 +1677,162 @@ class Decoder:
 		"""
 		return self._persistent_objects.values()
 
-	def _readint(self) -> int:
-		buffer = io.StringIO()
+	def _storepersistent(self, key:Tuple[str, str], value:Any) -> None:
+		objects = self._persistent_objects
+		if self.cache == "weak":
+			if key not in objects:
+				self._weakadded += 1
+			objects[key] = value
+		elif self.maxsize is not None:
+			objects[key] = value
+			objects.move_to_end(key)
+			while len(objects) > self.maxsize:
+				objects.popitem(last=False)
+				self._evictions += 1
+		else:
+			objects[key] = value
+
+	def _tell(self) -> int:
+		return self._offset + self._pos
+
+	def _loadposition(self, position:int) -> Any:
+		# Load the :class:`LazyValue` that contains the object at ``position`` in
+		# the backreference table and return this object
+		lazyvalues = self._lazyvalues
+		index = bisect.bisect_right(lazyvalues, position, key=_lazystart) - 1
+		if index < 0 or position >= lazyvalues[index]._stop:
+			raise ValueError(f"broken UL4ON stream at position {self._tell():,} (path {self._path()}): backreference to unknown object at position {position}")
+		lazyvalues[index].load()
+		return self._objects[position]
+
+	def _fill(self) -> bool:
+		# Read the next block from the input into the buffer (dropping the part
+		# that has already been consumed). Return whether there was more input.
+		if self._source is None:
+			return False
+		# Read at least as much as we have, so that tokens spanning many blocks
+		# don't require rescanning the buffer over and over again
+		data = self._source.read(max(self.bufsize, len(self._buffer) - self._pos))
+		if not data:
+			self._source = None
+			return False
+		drop = self._pos if self._keep is None else min(self._pos, self._keep - self._offset)
+		self._offset += drop
+		self._buffer = self._buffer[drop:] + data
+		self._pos -= drop
+		return True
+
+	def _read(self, size:int) -> AnyStr:
+		# Read up to ``size`` characters (or bytes)
+		while len(self._buffer) - self._pos < size and self._fill():
+			pass
+		data = self._buffer[self._pos:self._pos+size]
+		self._pos += len(data)
+		return data
+
+	def _readbytes(self, size:int) -> bytes:
+		data = self._read(size)
+		if len(data) != size:
+			raise EOFError()
+		return data
+
+	def _readvarint(self) -> int:
+		value = 0
+		shift = 0
 		while True:
-			c = self.stream.read(1)
-			if c and not c.isspace():
-				buffer.write(c)
+			if self._pos >= len(self._buffer) and not self._fill():
+				raise EOFError()
+			byte = self._buffer[self._pos]
+			self._pos += 1
+			value |= (byte & 0x7f) << shift
+			if byte < 0x80:
+				return value
+			shift += 7
+
+	def _readtoken(self) -> AnyStr:
+		# Read all characters up to the next whitespace (or the end of the input)
+		# (as bytes for UTF-8 encoded text dumps, but :func:`int` and
+		# :func:`float` accept those too)
+		token = _tokenb if self._utf8 else _token
+		while True:
+			buffer = self._buffer
+			end = token.match(buffer, self._pos).end()
+			if end < len(buffer) or not self._fill():
+				token = buffer[self._pos:end]
+				self._pos = end
+				return token
+
+	def _readstr(self) -> str:
+		# Read a quoted string (the delimiter is the next character)
+		delimiter = self._read(1)
+		if not delimiter:
+			raise EOFError()
+		try:
+			pattern = _strings[delimiter]
+		except KeyError:
+			d = re.escape(delimiter)
+			if self._utf8:
+				pattern = re.compile(b"[^" + d + b"\\\\]*(?:\\\\.[^" + d + b"\\\\]*)*" + d, re.S)
 			else:
-				return int(buffer.getvalue())
+				pattern = re.compile(f"[^{d}\\\\]*(?:\\\\.[^{d}\\\\]*)*{d}", re.S)
+			_strings[delimiter] = pattern
+		while True:
+			match = pattern.match(self._buffer, self._pos)
+			if match is not None:
+				break
+			if not self._fill():
+				raise EOFError()
+		self._pos = match.end()
+		value = match.group()[:-1]
+		if self._utf8:
+			value = value.decode("utf-8")
+		if "\\" in value:
+			value = value.encode("ascii", "backslashreplace").decode("unicode_escape")
+		return value
+
+	def _readint(self) -> int:
+		if self.binary:
+			value = self._readvarint()
+			return value >> 1 if not (value & 1) else -((value + 1) >> 1)
+		return int(self._readtoken())
 
 	def _loading(self, obj) -> None:
 		self._objects.append(obj)
 
 	def _nextchar(self) -> str:
-		if self._bufferedchar is not None:
-			result = self._bufferedchar
-			self._bufferedchar = None
-			return result
-		else:
-			while True:
-				nextchar = self.stream.read(1)
-				if nextchar:
-					if not nextchar.isspace():
-						return nextchar
-				else:
-					raise EOFError()
+		if self.binary:
+			# There's no whitespace between items in binary UL4ON
+			if self._pos >= len(self._buffer) and not self._fill():
+				raise EOFError()
+			nextchar = chr(self._buffer[self._pos])
+			self._pos += 1
+			return nextchar
+		if self._utf8:
+			match = _nonspaceb.search(self._buffer, self._pos)
+			if match is None:
+				self._pos = len(self._buffer)
+				raise EOFError()
+			self._pos = match.end()
+			return chr(self._buffer[match.start()])
+		# Fast path: items are usually separated by a single space
+		buffer = self._buffer
+		pos = self._pos
+		if pos + 1 < len(buffer):
+			nextchar = buffer[pos]
+			if nextchar == " ":
+				pos += 1
+				nextchar = buffer[pos]
+			if not nextchar.isspace():
+				self._pos = pos + 1
+				return nextchar
+		while True:
+			match = _nonspace.search(self._buffer, self._pos)
+			if match is not None:
+				self._pos = match.end()
+				return match.group()
+			self._pos = len(self._buffer)
+			if not self._fill():
+				raise EOFError()
 
 	def _path(self) -> str:
 		return "/".join(self._stack)
@@ -983,6 +1856,128 @@ class Decoder:
 		self._objects[oldpos] = value
 
 
+class LazyValue:
+	"""
+	An object in an UL4ON dump whose loading has been deferred via
+	:meth:`Decoder.loadlazy`.
+	"""
+
+	def __init__(self, decoder:Decoder, data:AnyStr, pos:int, offset:int, start:int, stop:int):
+		self._decoder = decoder
+		# The dump of the object starts at ``data[pos]`` (and ``offset`` is the
+		# position of ``data[0]`` in the input)
+		self._data = data
+		self._pos = pos
+		self._offset = offset
+		# The backreference table and the list of :class:`LazyValue` objects of
+		# the decoder at the time the object has been skipped, and the slice of
+		# the backreference table that belongs to the objects in the dump
+		self._objects = decoder._objects
+		self._lazyvalues = decoder._lazyvalues
+		self._start = start
+		self._stop = stop
+		self._loaded = False
+		self._value = None
+
+	def __repr__(self) -> str:
+		state = "loaded" if self._loaded else "unloaded"
+		return f"<{self.__class__.__module__}.{self.__class__.__qualname__} object ({state}) at {id(self):#x}>"
+
+	def load(self) -> Any:
+		"""
+		Load the object and return it. (Subsequent calls return the same object.)
+		"""
+		with self._decoder._lazylock:
+			if not self._loaded:
+				self._load()
+		return self._value
+
+	def _load(self) -> None:
+		decoder = self._decoder
+		objects = self._objects
+		start = self._start
+		# Load the object with the backreference table as it was at the start of
+		# the object and put the table back together afterwards
+		tail = objects[start:]
+		del objects[start:]
+		state = (decoder._buffer, decoder._pos, decoder._offset, decoder._source, decoder._utf8, decoder._keep, decoder.stream, decoder._stack, decoder._objects, decoder._lazyvalues)
+		decoder._buffer = self._data
+		decoder._pos = self._pos
+		decoder._offset = self._offset
+		decoder._source = None
+		decoder._utf8 = not decoder.binary and not isinstance(self._data, str)
+		decoder._keep = None
+		decoder.stream = None
+		decoder._stack = []
+		decoder._objects = objects
+		decoder._lazyvalues = self._lazyvalues
+		try:
+			value = decoder._load()
+			loaded = objects[start:]
+		finally:
+			del objects[start:]
+			objects.extend(tail)
+			(decoder._buffer, decoder._pos, decoder._offset, decoder._source, decoder._utf8, decoder._keep, decoder.stream, decoder._stack, decoder._objects, decoder._lazyvalues) = state
+		if len(loaded) != self._stop - start:
+			raise ValueError(f"broken UL4ON stream at position {self._offset+self._pos:,}: expected {self._stop-start:,} objects for backreferences, got {len(loaded):,}")
+		objects[start:self._stop] = loaded
+		self._lazyvalues.remove(self)
+		self._data = None
+		self._value = value
+		self._loaded = True
+
+
+def _lazystart(value:LazyValue) -> int:
+	return value._start
+
+
+class LazyDict(abc.Mapping):
+	"""
+	A read-only mapping for the dictionary in a file loaded via
+	:func:`loadfile` or :meth:`Decoder.loadfile` with a lazy decoder.
+
+	The keys are loaded when the file is opened, but each value is only loaded
+	when it is accessed for the first time (via :meth:`Decoder.loadlazy`).
+	"""
+
+	def __init__(self, decoder:Decoder):
+		# The values (:class:`LazyValue` objects for values that haven't been
+		# loaded yet)
+		self._values = {} # type: Dict[Any, Any]
+
+		typecode = decoder._nextchar()
+		if typecode not in "dDeE":
+			raise TypeError(f"broken UL4ON stream at position {decoder._tell():,}: expected dict, got typecode {typecode!r}")
+		if typecode in "DE":
+			decoder._loading(self)
+		while True:
+			typecode = decoder._nextchar()
+			if typecode == "}":
+				break
+			decoder._pos -= 1 # Push back the typecode
+			key = decoder._loadkey()
+			self._values[key] = decoder.loadlazy()
+
+	def __repr__(self) -> str:
+		unloaded = sum(isinstance(value, LazyValue) for value in self._values.values())
+		return f"<{self.__class__.__module__}.{self.__class__.__qualname__} object with {len(self._values):,} items ({unloaded:,} unloaded) at {id(self):#x}>"
+
+	def __len__(self) -> int:
+		return len(self._values)
+
+	def __iter__(self) -> Iterator[Any]:
+		return iter(self._values)
+
+	def __contains__(self, key:Any) -> bool:
+		return key in self._values
+
+	def __getitem__(self, key:Any) -> Any:
+		value = self._values[key]
+		if isinstance(value, LazyValue):
+			value = self._values[key] = value.load()
+		return value
+
+
 def dumps(obj:Any, /, indent:Optional[str]=None) -> str:
 	"""
 	Serialize ``obj`` as an UL4ON formatted string.
@@ -1001,14 +1996,29 @@ def dump(obj:Any, /, stream:TextIO, indent:Optional[str]=None) -> None:
 	Encoder(indent=indent).dump(obj, stream)
 
 
+def dumpb(obj:Any, /) -> bytes:
+	"""
+	Serialize ``obj`` as a binary UL4ON dump.
+	"""
+	stream = io.BytesIO()
+	Encoder(binary=True).dump(obj, stream)
+	return stream.getvalue()
+
+
 def load(stream:TextIO, /, registry:Optional[Dict[str, Callable[..., Any]]]=None) -> Any:
 	"""
 	Deserialize ``stream`` (which must be file-like object with a :meth:`read`
 	method containing an UL4ON formatted object) to a Python object.
 
 	For the meaning of ``registry`` see :meth:`Decoder.__init__`.
+
+	If ``stream`` is seekable, it will be positioned directly after the
+	object afterwards. Otherwise more input than the dump of the object might
+	have been consumed (as the input is read in blocks), so loading multiple
+	objects from a stream that isn't seekable requires using the same
+	:class:`Decoder` for all of them.
 	"""
-	return Decoder(registry).load(stream)
+	return Decoder(registry)._loadonce(stream)
 
 
 def loads(dump:str, /, registry:Optional[Dict[str, Callable[..., Any]]]=None) -> Any:
@@ -1021,6 +2031,51 @@ def loads(dump:str, /, registry:Optional[Dict[str, Callable[..., Any]]]=None) ->
 	return Decoder(registry).loads(dump)
 
 
+def loadb(dump:bytes, /, registry:Optional[Dict[str, Callable[..., Any]]]=None) -> Any:
+	"""
+	Deserialize ``dump`` (which must be a :class:`bytes` object containing a
+	binary UL4ON dump) to a Python object.
+
+	For the meaning of ``registry`` see :meth:`Decoder.__init__`.
+	"""
+	return Decoder(registry, binary=True).loads(dump)
+
+
+def loadfile(path:Union[str, os.PathLike], /, registry:Optional[Dict[str, Callable[..., Any]]]=None, binary:bool=False, lazy:bool=False) -> Any:
+	"""
+	Deserialize the UL4ON dump in the file ``path`` (which must be UTF-8
+	encoded for text dumps or contain a binary dump if ``binary`` is true) to
+	a Python object.
+
+	For the meaning of ``registry`` and ``lazy`` see :meth:`Decoder.__init__`
+	and :meth:`Decoder.loadfile`.
+	"""
+	return Decoder(registry, binary=binary, lazy=lazy).loadfile(path)
+
+
+def iterevents(stream:TextIO, /, registry:Optional[Dict[str, Callable[..., Any]]]=None) -> Generator[Tuple[str, Any], None, None]:
+	"""
+	Generate parser events for the UL4ON formatted object in the stream
+	``stream``.
+
+	For the events see :meth:`Decoder.iterevents`. For the meaning of
+	``registry`` see :meth:`Decoder.__init__`.
+	"""
+	return Decoder(registry).iterevents(stream)
+
+
+def iterload_items(stream:TextIO, /, path:Sequence=(), registry:Optional[Dict[str, Callable[..., Any]]]=None, keepbackrefs:bool=False) -> Generator[Any, None, None]:
+	"""
+	Generate the items of the list at the path ``path`` inside the UL4ON
+	formatted object in the stream ``stream`` one at a time.
+
+	For the meaning of ``path`` and ``keepbackrefs`` see
+	:meth:`Decoder.iterload_items`. For the meaning of ``registry`` see
+	:meth:`Decoder.__init__`.
+	"""
+	return Decoder(registry).iterload_items(stream, path, keepbackrefs)
+
+
 def loadclob(clob, /, bufsize:int=1024*1024, registry:Optional[Dict[str, Callable[..., Any]]]=None) -> Any:
 	"""
 	Deserialize ``clob`` (which must be an :mod:`oracledb` ``CLOB`` variable
@@ -1053,3 +2108,26 @@ class StreamBuffer:
 			result = self.buffer + newdata[:needsize]
 			self.buffer = newdata[needsize:]
 			return result
+
+
+# Use the C implementation of the hot paths of :meth:`Encoder.dump` and
+# :meth:`Decoder.load` if available
+try:
+	from ll import _ul4on
+except ImportError:
+	_ul4on = None
+else:
+	_ul4on.init(
+		_streamed,
+		_unloaded,
+		_encodercache,
+		_encoderfor,
+		Encoder._dump_none,
+		Encoder._dump_bool,
+		Encoder._dump_int,
+		Encoder._dump_float,
+		Encoder._dump_str,
+		Encoder._dump_list,
+		Encoder._dump_dict,
+		Encoder._dump_set,
+	)
@@ -0,0 +1,564 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3, always_allow_keywords=True
+
+## Copyright 2009-2026 by LivingLogic AG, Bayreuth/Germany
+## Copyright 2009-2026 by Walter Dörwald
+##
+## All Rights Reserved
+##
+## See ll/xist/__init__.py for the license
+
+
+"""
+This module contains a hand-written recursive descent parser for the code
+inside UL4 template tags.
+
+It implements the same grammar as the ANTLR grammar in :file:`UL4.g` and
+produces the same AST objects (from :mod:`ll.ul4c`), but doesn't require the
+ANTLR runtime and is considerably faster (especially when compiled with
+Cython).
+
+Normally this module is not used directly, :class:`ll.ul4c.Template` uses it
+internally. Setting the class attribute :attr:`ll.ul4c.Template.parser` to
+``"antlr"`` switches back to the parser generated by ANTLR.
+"""
+
+
+import re, ast, datetime
+
+from ll import ul4c, color
+
+
+__docformat__ = "reStructuredText"
+
+
+_esc = r"""\\(?:[abtnfr"'\\]|x[0-9a-fA-F]{2}|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8})"""
+
+_tokens = re.compile(
+	rf"""
+	(?P<ws>[ \t\r\n]+)|
+	(?P<string3>\"\"\"(?:{_esc}|[^\\])*?\"\"\"|'''(?:{_esc}|[^\\])*?''')|
+	(?P<string>"(?:{_esc}|[^\\"\r\n])*"|'(?:{_esc}|[^\\'\r\n])*')|
+	(?P<datetime>@\(\d{{4}}-\d{{2}}-\d{{2}}T(?:\d{{2}}:\d{{2}}(?::\d{{2}}(?:\.\d{{6}})?)?)?\))|
+	(?P<date>@\(\d{{4}}-\d{{2}}-\d{{2}}\))|
+	(?P<color>\#(?:[0-9a-fA-F]{{8}}|[0-9a-fA-F]{{6}}|[0-9a-fA-F]{{3,4}}))|
+	(?P<float>\d+\.\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+)|
+	(?P<int>0[bB][01]+|0[oO][0-7]+|0[xX][0-9a-fA-F]+|\d+)|
+	(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)|
+	(?P<op>//=|<<=|>>=|\*\*|//|<<|>>|==|!=|<=|>=|\+=|-=|\*=|/=|%=|&=|\^=|\|=|[()\[\]{{}},:.=+\-*/%<>&^|~])|
+	(?P<error>.)
+	""",
+	re.VERBOSE | re.ASCII | re.DOTALL,
+)
+
+_keywords = {"for", "in", "if", "else", "not", "is", "and", "or", "None", "True", "False"}
+
+# Binary operators handled by :meth:`Parser._binary`: map the operator token to
+# the precedence (higher binds tighter) and the AST class.
+_binops = {
+	"*": (7, ul4c.MulAST),
+	"/": (7, ul4c.TrueDivAST),
+	"//": (7, ul4c.FloorDivAST),
+	"%": (7, ul4c.ModAST),
+	"+": (6, ul4c.AddAST),
+	"-": (6, ul4c.SubAST),
+	"<<": (5, ul4c.ShiftLeftAST),
+	">>": (5, ul4c.ShiftRightAST),
+	"&": (4, ul4c.BitAndAST),
+	"^": (3, ul4c.BitXOrAST),
+	"|": (2, ul4c.BitOrAST),
+	"==": (1, ul4c.EQAST),
+	"!=": (1, ul4c.NEAST),
+	"<": (1, ul4c.LTAST),
+	"<=": (1, ul4c.LEAST),
+	">": (1, ul4c.GTAST),
+	">=": (1, ul4c.GEAST),
+	"in": (1, ul4c.ContainsAST),
+	"is": (1, ul4c.IsAST),
+}
+
+# Augmented assignment operators for the ``<?code?>`` tag
+_changevars = {
+	"+=": ul4c.AddVarAST,
+	"-=": ul4c.SubVarAST,
+	"*=": ul4c.MulVarAST,
+	"/=": ul4c.TrueDivVarAST,
+	"//=": ul4c.FloorDivVarAST,
+	"%=": ul4c.ModVarAST,
+	"<<=": ul4c.ShiftLeftVarAST,
+	">>=": ul4c.ShiftRightVarAST,
+	"&=": ul4c.BitAndVarAST,
+	"^=": ul4c.BitXOrVarAST,
+	"|=": ul4c.BitOrVarAST,
+}
+
+
+def _tokenize(code, offset):
+	"""
+	Split the source code ``code`` of a tag into tokens.
+
+	Return a list of tokens. Each token is a tuple with the token type (for
+	operators and keywords this is the text of the token itself), the text of
+	the token and the start and stop position of the token in the template
+	source (``offset`` is the offset of ``code`` in the template source).
+
+	The last token is always an ``"eof"`` token.
+	"""
+	tokens = []
+	for match in _tokens.finditer(code):
+		kind = match.lastgroup
+		if kind == "ws":
+			continue
+		text = match.group()
+		if kind == "op":
+			kind = text
+		elif kind == "name":
+			if text in _keywords:
+				kind = text
+		elif kind == "error":
+			if text in "\"'":
+				raise SyntaxError("unterminated string")
+			raise SyntaxError(f"unexpected character {text!r}")
+		tokens.append((kind, text, offset + match.start(), offset + match.end()))
+	pos = offset + len(code)
+	tokens.append(("eof", "", pos, pos))
+	return tokens
+
+
+class Parser:
+	"""
+	A :class:`!Parser` parses the code of one template tag. ``tag`` is the
+	:class:`~ll.ul4c.Tag` object.
+
+	Depending on the tag type one of the methods :meth:`expression`,
+	:meth:`statement`, :meth:`for_` or :meth:`definition` should be called
+	to get the resulting AST.
+	"""
+
+	def __init__(self, tag):
+		self.tag = tag
+		self.template = tag.template
+		self.tokens = _tokenize(tag.code, tag.codepos.start)
+		self.index = 0
+
+	def _peek(self, offset=0):
+		# Return the type of the current (or a following) token
+		return self.tokens[min(self.index + offset, len(self.tokens)-1)][0]
+
+	def _next(self):
+		token = self.tokens[self.index]
+		if token[0] != "eof":
+			self.index += 1
+		return token
+
+	def _error(self, expected):
+		token = self.tokens[self.index]
+		got = "end of code" if token[0] == "eof" else repr(token[1])
+		raise SyntaxError(f"expected {expected}, got {got}")
+
+	def _expect(self, kind):
+		if self.tokens[self.index][0] != kind:
+			self._error("end of code" if kind == "eof" else "name" if kind == "name" else repr(kind))
+		return self._next()
+
+	def _atom(self):
+		(kind, text, start, stop) = self.tokens[self.index]
+		pos = slice(start, stop)
+		if kind == "name":
+			self.index += 1
+			return ul4c.VarAST(self.template, pos, text)
+		elif kind == "int":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, int(text, 0))
+		elif kind == "float":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, float(text))
+		elif kind == "string":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, ast.literal_eval(text))
+		elif kind == "string3":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, ast.literal_eval(text.replace("\r", "\\r")))
+		elif kind == "date":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, datetime.date(*map(int, [f for f in ul4c._datesplitter.split(text[2:-1]) if f])))
+		elif kind == "datetime":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, datetime.datetime(*map(int, [f for f in ul4c._datesplitter.split(text[2:-1]) if f])))
+		elif kind == "color":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, color.Color.fromrepr(text))
+		elif kind == "None":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, None)
+		elif kind == "True":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, True)
+		elif kind == "False":
+			self.index += 1
+			return ul4c.ConstAST(self.template, pos, False)
+		elif kind == "[":
+			return self._list()
+		elif kind == "{":
+			return self._setordict()
+		elif kind == "(":
+			self.index += 1
+			node = self._exprarg()
+			close = self._expect(")")
+			node.startpos = slice(start, close[3])
+			return node
+		else:
+			self._error("expression")
+
+	def _comprehension(self):
+		# Parse the ``for ... in ... if ...`` part of a comprehension.
+		# Return the loop variable(s), the container and the condition
+		# (or :const:`None`)
+		self._expect("for")
+		varname = self._nestedlvalue()
+		self._expect("in")
+		container = self._expr_if()
+		condition = None
+		if self._peek() == "if":
+			self.index += 1
+			condition = self._expr_if()
+		return (varname, container, condition)
+
+	def _seqitem(self):
+		if self._peek() == "*":
+			star = self._next()
+			value = self._expr_if()
+			return ul4c.UnpackSeqItemAST(self.template, slice(star[2], value._startpos.stop), value)
+		value = self._expr_if()
+		return ul4c.SeqItemAST(self.template, value._startpos, value)
+
+	def _dictitem(self):
+		if self._peek() == "**":
+			star = self._next()
+			item = self._expr_if()
+			return ul4c.UnpackDictItemAST(self.template, slice(star[2], item._startpos.stop), item)
+		key = self._expr_if()
+		self._expect(":")
+		value = self._expr_if()
+		return ul4c.DictItemAST(self.template, slice(key._startpos.start, value._startpos.stop), key, value)
+
+	def _items(self, node, close, item):
+		# Parse the remaining items of a list/set/dict literal (after the first
+		# one) and the closing bracket.
+		while self._peek() == ",":
+			self.index += 1
+			if self._peek() == close:
+				break
+			node.items.append(item())
+		close = self._expect(close)
+		node.startpos = slice(node._startpos.start, close[3])
+		return node
+
+	def _list(self):
+		start = self._next()[2]
+		if self._peek() == "]":
+			return ul4c.ListAST(self.template, slice(start, self._next()[3]))
+		if self._peek() == "*":
+			first = self._seqitem()
+		else:
+			item = self._expr_if()
+			if self._peek() == "for":
+				(varname, container, condition) = self._comprehension()
+				close = self._expect("]")
+				return ul4c.ListComprehensionAST(self.template, slice(start, close[3]), item, varname, container, condition)
+			first = ul4c.SeqItemAST(self.template, item._startpos, item)
+		node = ul4c.ListAST(self.template, slice(start, None), first)
+		return self._items(node, "]", self._seqitem)
+
+	def _setordict(self):
+		start = self._next()[2]
+		kind = self._peek()
+		if kind == "}":
+			return ul4c.DictAST(self.template, slice(start, self._next()[3]))
+		elif kind == "/":
+			self.index += 1
+			return ul4c.SetAST(self.template, slice(start, self._expect("}")[3]))
+		elif kind == "*":
+			node = ul4c.SetAST(self.template, slice(start, None), self._seqitem())
+			return self._items(node, "}", self._seqitem)
+		elif kind == "**":
+			node = ul4c.DictAST(self.template, slice(start, None), self._dictitem())
+			return self._items(node, "}", self._dictitem)
+		key = self._expr_if()
+		if self._peek() == ":":
+			self.index += 1
+			value = self._expr_if()
+			if self._peek() == "for":
+				(varname, container, condition) = self._comprehension()
+				close = self._expect("}")
+				return ul4c.DictComprehensionAST(self.template, slice(start, close[3]), key, value, varname, container, condition)
+			node = ul4c.DictAST(self.template, slice(start, None), ul4c.DictItemAST(self.template, slice(key._startpos.start, value._startpos.stop), key, value))
+			return self._items(node, "}", self._dictitem)
+		elif self._peek() == "for":
+			(varname, container, condition) = self._comprehension()
+			close = self._expect("}")
+			return ul4c.SetComprehensionAST(self.template, slice(start, close[3]), key, varname, container, condition)
+		node = ul4c.SetAST(self.template, slice(start, None), ul4c.SeqItemAST(self.template, key._startpos, key))
+		return self._items(node, "}", self._seqitem)
+
+	def _nestedlvalue(self):
+		if self._peek() != "(":
+			return self._expr_subscript()
+		# This might be an parenthesized expression or a tuple of lvalues
+		index = self.index
+		try:
+			return self._expr_subscript()
+		except SyntaxError:
+			self.index = index
+		self.index += 1
+		lvalue = [self._nestedlvalue()]
+		self._expect(",")
+		while self._peek() != ")":
+			lvalue.append(self._nestedlvalue())
+			if self._peek() != ",":
+				break
+			self.index += 1
+		self._expect(")")
+		return tuple(lvalue)
+
+	def _slice(self, index1):
+		colon = self._expect(":")
+		start = colon[2] if index1 is None else index1._startpos.start
+		stop = colon[3]
+		index2 = None
+		if self._peek() != "]":
+			index2 = self._expr_if()
+			stop = index2._startpos.stop
+		return ul4c.SliceAST(self.template, slice(start, stop), index1, index2)
+
+	def _argument(self):
+		kind = self._peek()
+		if kind == "*":
+			star = self._next()
+			item = self._exprarg()
+			return ul4c.UnpackListArgumentAST(self.template, slice(star[2], item._startpos.stop), item)
+		elif kind == "**":
+			star = self._next()
+			item = self._exprarg()
+			return ul4c.UnpackDictArgumentAST(self.template, slice(star[2], item._startpos.stop), item)
+		elif kind == "name" and self._peek(1) == "=":
+			name = self._next()
+			self.index += 1
+			value = self._exprarg()
+			return ul4c.KeywordArgumentAST(self.template, slice(name[2], value._startpos.stop), name[1], value)
+		value = self._exprarg()
+		return ul4c.PositionalArgumentAST(self.template, value._startpos, value)
+
+	def _expr_subscript(self):
+		node = self._atom()
+		while True:
+			kind = self._peek()
+			if kind == ".":
+				# Attribute access
+				self.index += 1
+				name = self._expect("name")
+				node = ul4c.AttrAST(self.template, slice(node._startpos.start, name[3]), node, name[1])
+			elif kind == "(":
+				# Function/method call
+				self.index += 1
+				node = ul4c.CallAST(self.template, slice(node._startpos.start, None), node)
+				while self._peek() != ")":
+					self._argument().append(node)
+					if self._peek() != ",":
+						break
+					self.index += 1
+				close = self._expect(")")
+				node.startpos = slice(node._startpos.start, close[3])
+			elif kind == "[":
+				# Item/slice access
+				self.index += 1
+				if self._peek() == ":":
+					index = self._slice(None)
+				else:
+					index = self._expr_if()
+					if self._peek() == ":":
+						index = self._slice(index)
+				close = self._expect("]")
+				node = ul4c.ItemAST(self.template, slice(node._startpos.start, close[3]), node, index)
+			else:
+				return node
+
+	def _expr_unary(self):
+		kind = self._peek()
+		if kind == "-":
+			minus = self._next()
+			obj = self._expr_unary()
+			return ul4c.NegAST.make(self.template, slice(minus[2], obj._startpos.stop), obj)
+		elif kind == "~":
+			bitnot = self._next()
+			obj = self._expr_unary()
+			return ul4c.BitNotAST.make(self.template, slice(bitnot[2], obj._startpos.stop), obj)
+		return self._expr_subscript()
+
+	def _binary(self, minprec):
+		# Parse binary operators (from comparisons up to multiplication) via
+		# precedence climbing. All of them are left associative.
+		node = self._expr_unary()
+		while True:
+			kind = self._peek()
+			if kind == "not":
+				if self._peek(1) != "in":
+					return node
+				(prec, cls, skip) = (1, ul4c.NotContainsAST, 2)
+			elif kind == "is" and self._peek(1) == "not":
+				(prec, cls, skip) = (1, ul4c.IsNotAST, 2)
+			else:
+				try:
+					(prec, cls) = _binops[kind]
+				except KeyError:
+					return node
+				skip = 1
+			if prec < minprec:
+				return node
+			self.index += skip
+			obj2 = self._binary(prec + 1)
+			node = cls.make(self.template, slice(node._startpos.start, obj2._startpos.stop), node, obj2)
+
+	def _expr_not(self):
+		if self._peek() == "not":
+			not_ = self._next()
+			obj = self._expr_not()
+			return ul4c.NotAST.make(self.template, slice(not_[2], obj._startpos.stop), obj)
+		return self._binary(1)
+
+	def _expr_and(self):
+		node = self._expr_not()
+		while self._peek() == "and":
+			self.index += 1
+			obj2 = self._expr_not()
+			node = ul4c.AndAST(self.template, slice(node._startpos.start, obj2._startpos.stop), node, obj2)
+		return node
+
+	def _expr_or(self):
+		node = self._expr_and()
+		while self._peek() == "or":
+			self.index += 1
+			obj2 = self._expr_and()
+			node = ul4c.OrAST(self.template, slice(node._startpos.start, obj2._startpos.stop), node, obj2)
+		return node
+
+	def _expr_if(self):
+		node = self._expr_or()
+		if self._peek() == "if":
+			# Without an ``else`` this ``if`` belongs to a surrounding comprehension
+			index = self.index
+			self.index += 1
+			objcond = self._expr_or()
+			if self._peek() != "else":
+				self.index = index
+				return node
+			self.index += 1
+			objelse = self._expr_or()
+			node = ul4c.IfAST.make(self.template, slice(node._startpos.start, objelse._startpos.stop), node, objcond, objelse)
+		return node
+
+	def _exprarg(self):
+		# An expression or a generator expression
+		node = self._expr_if()
+		if self._peek() == "for":
+			(varname, container, condition) = self._comprehension()
+			stop = (container if condition is None else condition)._startpos.stop
+			node = ul4c.GeneratorExpressionAST(self.template, slice(node._startpos.start, stop), node, varname, container, condition)
+		return node
+
+	def _signature(self):
+		paren = self._expect("(")
+		node = ul4c.SignatureAST(self.template, slice(paren[2], None))
+		state = 0 # 0: parameters without defaults, 1: parameters with defaults, 2: after ``*``, 3: after ``**``
+		while self._peek() != ")":
+			kind = self._peek()
+			if kind == "**":
+				if state == 3:
+					raise SyntaxError("** parameter may appear only once")
+				self.index += 1
+				node.params.append((self._expect("name")[1], "**", None))
+				state = 3
+			elif kind == "*":
+				if state >= 2:
+					raise SyntaxError("* parameter may appear only once and must come before ** parameter")
+				self.index += 1
+				node.params.append((self._expect("name")[1], "*", None))
+				state = 2
+			else:
+				if state >= 2:
+					raise SyntaxError("parameters must come before * and ** parameters")
+				name = self._expect("name")[1]
+				if self._peek() == "=":
+					self.index += 1
+					node.params.append((name, "pk=", self._exprarg()))
+					state = 1
+				elif state == 1:
+					raise SyntaxError("parameter without a default follows parameter with a default")
+				else:
+					node.params.append((name, "pk", None))
+			if self._peek() != ",":
+				break
+			self.index += 1
+		close = self._expect(")")
+		node.startpos = slice(node._startpos.start, close[3])
+		return node
+
+	def expression(self):
+		"""
+		Parse an expression (for ``<?print?>``, ``<?if?>``, ``<?render?>``
+		etc.) and return the AST.
+		"""
+		node = self._exprarg()
+		self._expect("eof")
+		return node
+
+	def for_(self):
+		"""
+		Parse the code of a ``<?for?>`` tag and return the
+		:class:`~ll.ul4c.ForBlockAST` object.
+		"""
+		varname = self._nestedlvalue()
+		self._expect("in")
+		container = self._expr_if()
+		self._expect("eof")
+		return ul4c.ForBlockAST(self.template, self.tag._startpos, None, varname, container)
+
+	def statement(self):
+		"""
+		Parse the code of a ``<?code?>`` tag, i.e. an assignment, an augmented
+		assignment or an expression.
+		"""
+		try:
+			lvalue = self._nestedlvalue()
+		except SyntaxError:
+			pass
+		else:
+			kind = self._peek()
+			if kind == "=":
+				self.index += 1
+				value = self._expr_if()
+				self._expect("eof")
+				return ul4c.SetVarAST(self.template, self.tag._startpos, lvalue, value)
+			elif kind in _changevars and not isinstance(lvalue, tuple):
+				self.index += 1
+				value = self._expr_if()
+				self._expect("eof")
+				return _changevars[kind](self.template, self.tag._startpos, lvalue, value)
+		self.index = 0
+		return self.expression()
+
+	def definition(self):
+		"""
+		Parse the code of a ``<?def?>`` or ``<?ul4?>`` tag.
+
+		Return a tuple with the name (or :const:`None`) and the
+		:class:`~ll.ul4c.SignatureAST` (or :const:`None`).
+		"""
+		name = None
+		signature = None
+		if self._peek() == "name":
+			name = self._next()[1]
+		if self._peek() == "(":
+			signature = self._signature()
+		self._expect("eof")
+		return (name, signature)
@@ -2093,7 +2093,7 @@ class AST(Repr):
 		``vars`` contains the "root" variables that can be referenced in
 		the vSQL expression.
 		"""
-		template = ul4c.Template(f"<?return {source}?>")
+		template = ul4c.templatecache.template(f"<?return {source}?>")
 		expr = template.content[-1].obj
 		return cls.fromul4(expr, **vars)
 
@@ -74,8 +74,8 @@ can be produced by source objects:
 		creating the source object.
 
 	``"bytes"``
-		This event is produced by source objects  (and :class:`Transcoder` objects).
-		The event data is a byte string.
+		This event is produced by source objects  (and :class:`Transcoder` and
+		:class:`Publish` objects). The event data is a byte string.
 
 	``"str"``
 		The event data is a string. This event is produced by :class:`Decoder`
@@ -203,11 +203,17 @@ following events are used:
 		An entity reference. The event data is an instance of
 		:class:`ll.xist.xsc.Entity`.
 
-For consuming event streams there are three functions:
+A :class:`Publish` object consumes these events and publishes the nodes as
+``"bytes"`` events again (without building the complete tree).
+
+For consuming event streams there are four functions:
 
 	:func:`events`
 		This generator simply outputs the events.
 
+	:func:`write`
+		This function writes the ``"bytes"`` events to a stream.
+
 	:func:`tree`
 		This function builds an XML tree from the events and returns it.
 
@@ -1467,6 +1473,181 @@ class Tidy:
 			yield from self._asxist(doc)
 
 
+class Publish:
+	"""
+	A :class:`Publish` object is used at the end of a parsing pipeline to
+	publish the XIST nodes produced by a :class:`Node` object while the input is
+	still being parsed. It consumes the node events and produces ``"bytes"``
+	events, so a document can be re-serialized without building the complete
+	tree first::
+
+		>>> from ll.xist import xsc, parse
+		>>> from ll.xist.ns import html
+		>>> list(parse.events(
+		... 	parse.String(b"<a href='http://www.python.org/'>Python</a>"),
+		... 	parse.Expat(),
+		... 	parse.NS(html),
+		... 	parse.Node(pool=xsc.Pool(html)),
+		... 	parse.Publish(prefixes={html: None}),
+		... ))
+		[('bytes', b'<a xmlns="http://www.w3.org/1999/xhtml" href="http://www.python.org/">'),
+		 ('bytes', b'Python'),
+		 ('bytes', b'</a>')]
+
+	Elements are not appended to their parent element, so the memory used only
+	depends on the nesting depth of the document. The exception are the nodes
+	matched by ``selector``: These are collected completely and passed to the
+	callable ``convert``, which must return the node that should be published
+	instead (or :const:`None` to drop the node). This can be used to filter
+	or transform large documents::
+
+		>>> with open("links.html", "wb") as f:
+		... 	parse.write(
+		... 		f,
+		... 		parse.URL("http://www.python.org/"),
+		... 		parse.Tidy(),
+		... 		parse.NS(html),
+		... 		parse.Node(pool=xsc.Pool(html)),
+		... 		parse.Publish(selector=html.script, convert=lambda node: None),
+		... 	)
+
+	Elements whose class implements its own publishing logic (i.e. overwrites
+	:meth:`~ll.xist.xsc.Node.publish`) will be collected completely too.
+
+	As the namespaces used in the document are not known in advance, ``xmlns``
+	attributes are published on the outermost element that requires them.
+	"""
+
+	def __init__(self, selector=None, convert=None, base=None, allowschemerelurls=False, **publishargs):
+		"""
+		Create a :class:`Publish` object.
+
+		``selector`` (if not :const:`None`) specifies which nodes should be
+		passed to ``convert`` (see :mod:`ll.xist.xfind` for possible selectors).
+		``selector`` will only be matched against nodes outside of other nodes
+		that have been matched, and for elements it is checked when the element
+		is entered (i.e. before the element has any content).
+
+		``convert`` (if not :const:`None`) must be a callable that will be
+		called with each node matched by ``selector`` and returns the node to be
+		published (the result will be converted with :func:`ll.xist.xsc.tonode`,
+		so e.g. :const:`None` drops the node).
+
+		``base`` and ``allowschemerelurls`` have the same meaning as for
+		:meth:`ll.xist.xsc.Publisher.iterbytes`.
+
+		All other keyword arguments will be passed to the
+		:class:`~ll.xist.xsc.Publisher` that is used for publishing (which will
+		always declare namespaces lazily, i.e. ``lazyxmlns`` is true).
+		"""
+		self.selector = xfind.selector(selector) if selector is not None else None
+		self.convert = convert
+		self.base = base
+		self.allowschemerelurls = allowschemerelurls
+		self.publisher = xsc.Publisher(lazyxmlns=True, **publishargs)
+
+	def __repr__(self):
+		return f"<{self.__class__.__module__}.{self.__class__.__qualname__} object encoding={self.publisher.encoding!r} at {id(self):#x}>"
+
+	def _publishstarttag(self, node):
+		# Publish the start tag of the element ``node`` (which has content).
+		# Return the resulting bytes and the end tag (which we have to remember,
+		# as the prefix for the namespace might change in the meantime).
+		publisher = self.publisher
+		publisher._enterxmlns(node.walknodes(xsc.Element, xsc.Attr, entercontent=False, enterattrs=True))
+		name = node._publishname(publisher)
+		start = f"<{name}"
+		if publisher._publishxmlns:
+			start += publisher._xmlnsattrs()
+		data = [publisher.encode(start)]
+		if node._attrs is not None:
+			data.extend(node._attrs.publish(publisher))
+		data.append(publisher.encode(">"))
+		return (b"".join(data), f"</{name}>")
+
+	def __call__(self, input):
+		publisher = self.publisher
+		selector = self.selector
+		convert = self.convert
+		publisher._beginpublish(self.base, self.allowschemerelurls)
+		path = [xsc.Frag()] # The "open" elements
+		ends = [] # The end tags of the "open" elements that have been published incrementally
+		collect = None # If this is not :const:`None` we're collecting the content of the element ``path[collect]``
+		convertcollected = False # Has the collected element been matched by ``selector``?
+		pending = None # An element whose start tag hasn't been published yet (because we don't know yet whether it has content)
+
+		for (evtype, node) in input:
+			if collect is not None:
+				if evtype == "enterelementnode":
+					path[-1].append(node)
+					path.append(node)
+				elif evtype == "leaveelementnode":
+					path.pop()
+					if len(path) == collect:
+						collect = None
+						if convertcollected and convert is not None:
+							node = xsc.tonode(convert(node))
+						for data in publisher._iterpublish(node):
+							if data:
+								yield ("bytes", data)
+				elif evtype in {"textnode", "commentnode", "procinstnode", "entitynode", "xmldeclnode", "doctypenode"}:
+					path[-1].append(node)
+				else:
+					raise UnknownEventError(self, (evtype, node))
+				continue
+
+			if pending is not None:
+				if evtype == "leaveelementnode" and node is pending:
+					# The element is empty, so we can publish it completely
+					pending = None
+					path.pop()
+					for data in publisher._iterpublish(node):
+						if data:
+							yield ("bytes", data)
+					continue
+				(data, end) = self._publishstarttag(pending)
+				ends.append(end)
+				pending = None
+				if data:
+					yield ("bytes", data)
+
+			if evtype == "enterelementnode":
+				path.append(node)
+				if selector is not None and path in selector:
+					collect = len(path) - 1
+					convertcollected = True
+				else:
+					try:
+						kind = xsc._publishkinds[type(node)]
+					except KeyError:
+						kind = xsc._publishkind(type(node))
+					if kind == "element":
+						pending = node
+					else:
+						collect = len(path) - 1
+						convertcollected = False
+			elif evtype == "leaveelementnode":
+				path.pop()
+				data = publisher.encode(ends.pop())
+				publisher._leavexmlns()
+				if data:
+					yield ("bytes", data)
+			elif evtype in {"textnode", "commentnode", "procinstnode", "entitynode", "xmldeclnode", "doctypenode"}:
+				if selector is not None:
+					path.append(node)
+					if path in selector and convert is not None:
+						node = xsc.tonode(convert(node))
+					path.pop()
+				for data in publisher._iterpublish(node):
+					if data:
+						yield ("bytes", data)
+			else:
+				raise UnknownEventError(self, (evtype, node))
+		data = publisher._endpublish()
+		if data:
+			yield ("bytes", data)
+
+
 ###
 ### Consumers: Functions that consume an event stream
 ###
@@ -1493,6 +1674,33 @@ def events(*pipeline):
 	return output
 
 
+def write(stream, *pipeline):
+	"""
+	Write the data of all ``"bytes"`` events produced by the pipeline objects in
+	``pipeline`` to the file-like object ``stream`` (which must provide a
+	:meth:`!write` method). All other events are ignored.
+
+	Together with a :class:`Publish` object at the end of the pipeline this can
+	be used to re-serialize a document while it is being parsed::
+
+		>>> from ll.xist import xsc, parse
+		>>> from ll.xist.ns import html
+		>>> import sys
+		>>> parse.write(
+		... 	sys.stdout.buffer,
+		... 	parse.String(b"<a href='http://www.python.org/'>Python</a>"),
+		... 	parse.Expat(),
+		... 	parse.NS(html),
+		... 	parse.Node(pool=xsc.Pool(html)),
+		... 	parse.Publish(),
+		... )
+		<a href="http://www.python.org/">Python</a>
+	"""
+	for (evtype, data) in events(*pipeline):
+		if evtype == "bytes":
+			stream.write(data)
+
+
 def tree(*pipeline, validate=False):
 	"""
 	Return a tree of XIST nodes from the event stream ``pipeline``.
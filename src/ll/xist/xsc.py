@@ -522,13 +522,128 @@ class Converter:
 ### Publisher for serializing XML trees to strings
 ###
 
+_publishkinds = {}
+
+
+def _publishkind(cls):
+	# Return how :meth:`Publisher._iterpublish` can publish instances of the
+	# node class ``cls`` itself (or :const:`None` if the :meth:`publish` method
+	# must be called, because ``cls`` implements its own publishing logic)
+	kind = None
+	if issubclass(cls, Element):
+		if (
+			cls.publish is Element.publish and
+			cls._publishfull is Element._publishfull and
+			cls._publishstarttag is Element._publishstarttag and
+			cls._publishendtag is Element._publishendtag and
+			cls._publishname is Element._publishname and
+			cls.Attrs.publish is Attrs.publish and
+			cls.Attrs.values is Attrs.values
+		):
+			kind = "element"
+	elif issubclass(cls, Attr):
+		if cls._publishname is Attr._publishname:
+			if cls.publish is Attr.publish:
+				if cls._publishattrvalue is Attr._publishattrvalue:
+					kind = "attr"
+				elif cls._publishattrvalue is URLAttr._publishattrvalue:
+					kind = "urlattr"
+			elif cls.publish is BoolAttr.publish:
+				kind = "boolattr"
+	elif issubclass(cls, Text):
+		if cls.publish is Text.publish:
+			kind = "text"
+	elif issubclass(cls, Frag):
+		if cls.publish is Frag.publish:
+			kind = "frag"
+	elif issubclass(cls, Comment):
+		if cls.publish is Comment.publish:
+			kind = "comment"
+	elif issubclass(cls, DocType):
+		if cls.publish is DocType.publish:
+			kind = "doctype"
+	elif issubclass(cls, ProcInst):
+		if cls.publish is ProcInst.publish:
+			kind = "procinst"
+	elif issubclass(cls, Entity):
+		if cls.publish is Entity.publish:
+			kind = "entity"
+	_publishkinds[cls] = kind
+	return kind
+
+
+def _customnodes(nodes):
+	# Yield the elements and attributes from ``nodes`` that will be published by
+	# calling their :meth:`publish` method (descending into fragments and into
+	# the content of those elements). Such elements might publish their markup
+	# without calling :meth:`Element._publishstarttag`, so if namespaces are
+	# declared lazily, the enclosing element has to declare their namespaces.
+	for node in nodes:
+		try:
+			kind = _publishkinds[type(node)]
+		except KeyError:
+			kind = _publishkind(type(node))
+		if kind is None and isinstance(node, Element):
+			yield from node.walknodes(Element, Attr, entercontent=False, enterattrs=True)
+			yield from _customnodes(node.content)
+		elif isinstance(node, Frag):
+			yield from _customnodes(node)
+
+
+def _clearpublishtagcache(cls):
+	# Clear the cached tags of the element or attribute class ``cls`` and of
+	# all its subclasses (as those might inherit the changed attribute)
+	cls._publishtagcache.clear()
+	for subclass in cls.__subclasses__():
+		_clearpublishtagcache(subclass)
+
+
+def _elementtags(xmlname, prefix, model, xhtml):
+	# Return the strings that :meth:`Publisher._iterpublish` outputs for an
+	# element with the name ``xmlname``, the namespace prefix ``prefix`` and the
+	# content model ``model``: The beginning of the start tag, the end tag and
+	# what follows the attributes if the element is empty. Return :const:`None`
+	# if the name contains non-ASCII characters (which must be encoded strictly).
+	name = xmlname if prefix is None else f"{prefix}:{xmlname}"
+	if not name.isascii():
+		return None
+	if xhtml in (0, 1):
+		if model is not None and model.empty:
+			empty = " />" if xhtml == 1 else ">"
+		else:
+			empty = f"></{name}>"
+	elif xhtml == 2:
+		empty = "/>"
+	else:
+		empty = ""
+	return (f"<{name}", f"</{name}>", empty)
+
+
+def _attrtags(xmlname, prefix, xhtml):
+	# Return the strings that :meth:`Publisher._iterpublish` outputs for an
+	# attribute with the name ``xmlname`` and the namespace prefix ``prefix``:
+	# The beginning of the attribute (up to the opening quote) and the complete
+	# attribute for boolean attributes. Return :const:`None` if the name contains
+	# non-ASCII characters.
+	name = xmlname if prefix is None else f"{prefix}:{xmlname}"
+	if not name.isascii():
+		return None
+	return (f' {name}="', f' {name}="{name}"' if xhtml > 0 else f" {name}")
+
+
 class Publisher:
 	"""
 	A :class:`Publisher` object is used for serializing an XIST tree into a byte
 	sequence.
+
+	Nodes that don't overwrite any of the publishing methods are published
+	without calling their :meth:`~Node.publish` method. The resulting text is
+	collected and encoded in chunks of (at most) :attr:`chunksize` fragments.
 	"""
 
-	def __init__(self, encoding=None, xhtml=1, validate=False, prefixes={}, prefixdefault=False, hidexmlns=(), showxmlns=()):
+	chunksize = 1000
+
+	def __init__(self, encoding=None, xhtml=1, validate=False, prefixes={}, prefixdefault=False, hidexmlns=(), showxmlns=(), lazyxmlns=False):
 		"""
 		Create a publisher. Arguments have the following meaning:
 
@@ -590,6 +705,22 @@ class Publisher:
 			``showxmlns`` can be a list or set that contains namespace names
 			for which ``xmlns`` attributes *will* be published, even if there are
 			no elements from this namespace in the tree.
+
+		``lazyxmlns`` : bool
+			If false (the default), the complete tree will be traversed before
+			publishing to determine all namespaces used in the tree. The ``xmlns``
+			attributes for all of them will be published on the root element (and
+			publishing a :class:`Frag` with multiple root elements will raise a
+			:exc:`MultipleRootsError`).
+
+			If true, namespace prefixes will be determined when an element or
+			attribute from the namespace is published for the first time, and
+			``xmlns`` attributes will be published on the outermost element that
+			requires them (and hasn't inherited the namespace declaration from one
+			of its ancestors). This avoids the extra traversal, so the output
+			starts immediately. (Namespaces from ``showxmlns`` will be declared on
+			every root element.) Namespaces of elements that implement their own
+			:meth:`~Node.publish` method will be declared by the enclosing element.
 		"""
 		self.base = None
 		self.allowschemerelurls = False
@@ -601,6 +732,7 @@ class Publisher:
 		self.prefixdefault = prefixdefault
 		self.hidexmlns = {nsname(xmlns) for xmlns in hidexmlns}
 		self.showxmlns = {nsname(xmlns) for xmlns in showxmlns}
+		self.lazyxmlns = lazyxmlns
 		self._ns2prefix = {}
 		self._prefix2ns = {}
 
@@ -767,28 +899,41 @@ class Publisher:
 		if self.validate:
 			for warning in node.validate(True, [node]):
 				warnings.warn(warning)
-		self._ns2prefix.clear()
-		self._prefix2ns.clear()
-		# iterate through every node in the tree
-		for n in node.walknodes(Element, Attr, enterattrs=True):
-			self.getobjectprefix(n)
-		# Add the prefixes forced by ``self.showxmlns``
-		for xmlns in self.showxmlns:
-			self.getnamespaceprefix(xmlns)
-
-		# Do we have to publish xmlns attributes?
-		self._publishxmlns = False
-		if self._ns2prefix:
-			# Determine if we have multiple roots
-			if isinstance(node, Frag):
-				count = 0
-				for child in node:
-					if isinstance(child, Element) and child.xmlns not in self.hidexmlns:
-						count += 1
-				if count > 1:
-					raise MultipleRootsError()
-			self._publishxmlns = True
+		self._beginpublish(base, allowschemerelurls)
+		# If ``self.lazyxmlns`` is true, the namespaces will be declared during publishing
+		if not self.lazyxmlns:
+			# iterate through every node in the tree
+			for n in node.walknodes(Element, Attr, enterattrs=True):
+				self.getobjectprefix(n)
+			# Add the prefixes forced by ``self.showxmlns``
+			for xmlns in self.showxmlns:
+				self.getnamespaceprefix(xmlns)
+
+			# Do we have to publish xmlns attributes?
+			if self._ns2prefix:
+				# Determine if we have multiple roots
+				if isinstance(node, Frag):
+					count = 0
+					for child in node:
+						if isinstance(child, Element) and child.xmlns not in self.hidexmlns:
+							count += 1
+					if count > 1:
+						raise MultipleRootsError()
+				self._publishxmlns = {xmlns: prefix for (xmlns, prefix) in self._ns2prefix.items() if xmlns not in self.hidexmlns}
+
+		self.node = node
 
+		for part in self._iterpublish(self.node):
+			if part:
+				yield part
+		rest = self._endpublish()
+		if rest:
+			yield rest
+
+	def _beginpublish(self, base, allowschemerelurls):
+		# Prepare the publisher for output. This is used by :meth:`iterbytes`
+		# and by :class:`ll.xist.parse.Publish` (which publishes the nodes from a
+		# parsing pipeline incrementally)
 		self.inattr = 0
 		self.__textfilters = [ misc.xmlescape_text ]
 
@@ -796,27 +941,283 @@ class Publisher:
 
 		self.base = url_.URL(base)
 		self.allowschemerelurls = allowschemerelurls
-		self.node = node
+
+		self._ns2prefix.clear()
+		self._prefix2ns.clear()
+		# The xmlns attributes the next element has to publish
+		self._publishxmlns = {}
+		# The xmlns attributes published by each "open" element (if namespaces are declared lazily)
+		self._xmlnsscopes = []
+		# The names of the "open" elements published via :meth:`Element._publishstarttag` (if namespaces are declared lazily)
+		self._xmlnsnames = []
+		# All namespace declarations that are currently in scope (as ``(xmlns, prefix)`` tuples)
+		self._xmlnsinscope = set()
+		# Namespaces that don't require a new declaration in the current scope
+		self._xmlnsready = set()
 
 		self.encoder = codecs.getincrementalencoder("xml")(encoding=self.encoding)
 
-		for part in self.node.publish(self):
-			if part:
-				yield part
+	def _endpublish(self):
+		# Finish output and reset the publisher. Returns the bytes that the
+		# encoder still had buffered.
 		rest = self.encoder.encode("", True) # finish encoding and flush buffers
-		if rest:
-			yield rest
 
 		self.inattr = 0
 		self.__textfilters = [ misc.xmlescape_text ]
 
 		self.__errors = [ "xmlcharrefreplace" ]
 
-		self._publishxmlns = False
+		self._publishxmlns = {}
+		self._xmlnsscopes = []
+		self._xmlnsnames = []
+		self._xmlnsinscope = set()
+		self._xmlnsready = set()
 		self._ns2prefix.clear()
 		self._prefix2ns.clear()
 
 		self.encoder = None
+		return rest
+
+	def _xmlnsattrs(self):
+		# Return the xmlns attributes the next element has to publish (and
+		# reset them, so the next element won't create the attributes again)
+		result = "".join(
+			f' xmlns="{xmlns}"' if prefix is None else f' xmlns:{prefix}="{xmlns}"'
+			for (xmlns, prefix) in sorted(self._publishxmlns.items(), key=lambda item: item[1] or "")
+		)
+		self._publishxmlns = {}
+		return result
+
+	def _enterxmlns(self, nodes):
+		# Register the namespace prefixes for the elements and attributes in
+		# ``nodes`` and determine which xmlns attributes the next element has to
+		# publish, because they are not declared by one of the enclosing elements
+		# yet. This is used if ``self.lazyxmlns`` is true and for publishing
+		# incrementally, where the namespaces are not known in advance. Each call
+		# must be paired with a call to :meth:`_leavexmlns` after the element has
+		# been published.
+		namespaces = set()
+		for node in nodes:
+			xmlns = node.xmlns
+			if xmlns is not None:
+				self.getobjectprefix(node)
+				namespaces.add(xmlns)
+		# Add the prefixes forced by ``self.showxmlns`` to each root element
+		if not self._xmlnsscopes:
+			for xmlns in self.showxmlns:
+				self.getnamespaceprefix(xmlns)
+				namespaces.add(xmlns)
+		declarations = {}
+		for xmlns in namespaces:
+			if xmlns in self._ns2prefix and xmlns not in self.hidexmlns:
+				prefix = self._ns2prefix[xmlns]
+				if (xmlns, prefix) not in self._xmlnsinscope:
+					declarations[xmlns] = prefix
+		if declarations:
+			self._xmlnsinscope.update(declarations.items())
+			# A prefix might have changed
+			self._xmlnsready.clear()
+		self._xmlnsready.update(namespaces)
+		self._xmlnsscopes.append(declarations)
+		# Keep declarations that haven't been published yet (because the
+		# enclosing call didn't publish a start tag)
+		self._publishxmlns = {**self._publishxmlns, **declarations} if self._publishxmlns else declarations
+
+	def _leavexmlns(self):
+		# Drop the namespace declarations made by the last call to :meth:`_enterxmlns`
+		self._publishxmlns = {}
+		declarations = self._xmlnsscopes.pop()
+		if declarations:
+			self._xmlnsinscope.difference_update(declarations.items())
+			self._xmlnsready.clear()
+
+	def _iterpublish(self, node):
+		# Publish ``node`` and yield the resulting byte strings. The result is the
+		# same as ``node.publish(self)``, but nodes whose class doesn't overwrite
+		# any of the publishing methods are handled here directly: The tree is
+		# traversed without creating a generator for each node, and the output is
+		# collected as string fragments that get encoded in chunks (with the
+		# error handling that :meth:`encodetext` uses; markup that contains
+		# non-ASCII characters is still encoded strictly). Nodes with a custom
+		# :meth:`publish` method are published by calling it.
+		encoder = self.encoder
+		ns2prefix = self._ns2prefix
+		xhtml = self.xhtml
+		lazyxmlns = self.lazyxmlns
+		xmlnsscopes = self._xmlnsscopes
+		xmlnsready = self._xmlnsready
+		chunksize = self.chunksize
+		xmlescape_text = misc.xmlescape_text
+		xmlescape_attr = misc.xmlescape_attr
+		kinds = _publishkinds
+		parts = [] # String fragments that haven't been encoded yet
+		append = parts.append
+		output = [] # Encoded byte strings that haven't been output yet
+
+		def flush():
+			if parts:
+				encoder.errors = "xmlcharrefreplace"
+				output.append(encoder.encode("".join(parts)))
+				encoder.errors = "strict"
+				parts.clear()
+
+		def markup(string):
+			if string.isascii():
+				append(string)
+			else:
+				flush()
+				output.append(encoder.encode(string))
+
+		stack = [iter((node,))] # Iterators for the content of the "open" nodes
+		ends = [None] # The end tags for those nodes
+		leaves = [] # Whether the "open" elements have called :meth:`_enterxmlns` (if ``lazyxmlns`` is true)
+		while stack:
+			for child in stack[-1]:
+				if len(parts) > chunksize:
+					flush()
+				if output:
+					yield from output
+					output.clear()
+				try:
+					kind = kinds[type(child)]
+				except KeyError:
+					kind = _publishkind(type(child))
+				if kind == "text":
+					append(xmlescape_text(child._content))
+				elif kind == "element":
+					if lazyxmlns:
+						# Declare the namespaces of the element, its global attributes and
+						# the content with custom publishing (if they aren't declared yet)
+						xmlns = child.xmlns
+						nodes = [child]
+						if child._attrs is not None:
+							nodes.extend(attr for attr in dict.values(child._attrs) if attr and attr.xmlns is not None)
+						if child._content:
+							nodes.extend(_customnodes(child._content))
+						scoped = len(nodes) > 1 or not xmlnsscopes or (xmlns is not None and xmlns not in xmlnsready)
+						if scoped:
+							self._enterxmlns(nodes)
+					xmlns = child.xmlns
+					prefix = ns2prefix.get(xmlns) if xmlns is not None else None
+					cls = type(child)
+					if cls is Element:
+						# Plain elements have their own name
+						tags = _elementtags(child.xmlname, prefix, child.model, xhtml)
+					else:
+						try:
+							tags = cls._publishtagcache[(prefix, xhtml)]
+						except KeyError:
+							tags = cls._publishtags(prefix, xhtml)
+					if tags is None:
+						flush()
+						yield from output
+						output.clear()
+						# :meth:`_publishstarttag` publishes the namespace declarations that are still pending
+						yield from child.publish(self)
+						if lazyxmlns and scoped:
+							self._leavexmlns()
+						continue
+					append(tags[0])
+					# we're the first element to be published (or the outermost element using a namespace), so we have to create the xmlns attributes
+					if self._publishxmlns:
+						markup(self._xmlnsattrs())
+					# This is what ``Attrs.values()`` does (but avoids the ``Attrs.__getattribute__()`` overhead)
+					for attr in dict.values(child._attrs) if child._attrs is not None else ():
+						if not attr:
+							continue
+						try:
+							attrkind = kinds[type(attr)]
+						except KeyError:
+							attrkind = _publishkind(type(attr))
+						if attrkind is not None:
+							# Only attributes containing nothing but text can be handled here
+							value = ""
+							for attrchild in attr:
+								if type(attrchild) is not Text:
+									attrkind = None
+									break
+								value += attrchild._content
+						if attrkind is not None:
+							xmlns = attr.xmlns
+							if xmlns is None:
+								prefix = None
+							elif xmlns == xml_xmlns:
+								prefix = "xml"
+							else:
+								prefix = ns2prefix.get(xmlns)
+							cls = type(attr)
+							if cls is Attr:
+								# Plain attributes have their own name
+								attrtags = _attrtags(attr.xmlname, prefix, xhtml)
+							else:
+								try:
+									attrtags = cls._publishtagcache[(prefix, xhtml)]
+								except KeyError:
+									attrtags = cls._publishtags(prefix, xhtml)
+							if attrtags is None:
+								attrkind = None
+						if attrkind == "boolattr":
+							append(attrtags[1])
+						elif attrkind is not None:
+							if attrkind == "urlattr":
+								value = str(url_.URL(value).relative(self.base, self.allowschemerelurls))
+							append(attrtags[0])
+							append(xmlescape_attr(value))
+							append('"')
+						else:
+							flush()
+							yield from output
+							output.clear()
+							yield from attr.publish(self)
+					if child._content:
+						append(">")
+						stack.append(iter(child._content))
+						ends.append(tags[1])
+						if lazyxmlns:
+							leaves.append(scoped)
+						break
+					else:
+						append(tags[2])
+						if lazyxmlns and scoped:
+							self._leavexmlns()
+				elif kind == "frag":
+					stack.append(iter(child))
+					ends.append(None)
+					break
+				elif kind == "comment":
+					content = child.content
+					if "--" in content or content.endswith("-"):
+						warnings.warn(IllegalCommentContentWarning(child))
+					markup(f"<!--{content}-->")
+				elif kind == "doctype":
+					markup(f"<!DOCTYPE {child.content}>")
+				elif kind == "procinst":
+					content = child.content
+					if "?>" in content:
+						raise IllegalProcInstFormatError(child)
+					markup(f"<?{child.xmlname} {content}?>")
+				elif kind == "entity":
+					markup(f"&{child.xmlname};")
+				else:
+					flush()
+					yield from output
+					output.clear()
+					# Inside an element published here the element has declared the namespaces already
+					if lazyxmlns and not leaves:
+						self._enterxmlns(_customnodes((child,)))
+						yield from child.publish(self)
+						self._leavexmlns()
+					else:
+						yield from child.publish(self)
+			else:
+				stack.pop()
+				end = ends.pop()
+				if end is not None:
+					append(end)
+					if lazyxmlns and leaves.pop():
+						self._leavexmlns()
+		flush()
+		yield from output
 
 	def bytes(self, node, base=None, allowschemerelurls=False):
 		"""
@@ -1038,6 +1439,11 @@ class Node(object, metaclass=_Node_Meta):
 	overwrite :meth:`convert` or :meth:`publish`.
 	"""
 
+	# No instance attributes here, so that :class:`CharacterData` and
+	# :class:`Element` can use slots (subclasses without ``__slots__`` get an
+	# instance dictionary as usual)
+	__slots__ = ()
+
 	# location of this node in the XML file (will be hidden in derived classes,
 	# but is specified here, so that no special tests are required. In derived
 	# classes this will be set by the parser)
@@ -1514,10 +1920,12 @@ class CharacterData(Node):
 	(Provides nearly the same functionality as :class:`UserString`,
 	but omits a few methods.)
 	"""
-	__slots__ = ("_content",)
+	__slots__ = ("__dict__", "__weakref__", "_content", "startloc", "endloc")
 
 	def __init__(self, *content):
 		self._content = "".join(str(x) for x in content)
+		self.startloc = None
+		self.endloc = None
 
 	def __repr__(self):
 		if self.startloc is not None:
@@ -1541,6 +1949,8 @@ class CharacterData(Node):
 
 	def __setstate__(self, content):
 		self._content = content
+		self.startloc = None
+		self.endloc = None
 
 	class content(misc.propclass):
 		"""
@@ -2290,10 +2700,30 @@ class _Attr_Meta(type(Frag)):
 			if values is not None:
 				dict["values"] = tuple(str(entry) for entry in values)
 		self = super(_Attr_Meta, cls).__new__(cls, name, bases, dict)
+		self._publishtagcache = {}
 		if self.xmlns is not None:
 			threadlocalpool.pool.register(self)
 		return self
 
+	def __setattr__(self, name, value):
+		super().__setattr__(name, value)
+		if name == "xmlname":
+			_clearpublishtagcache(self)
+
+	def __delattr__(self, name):
+		super().__delattr__(name)
+		if name == "xmlname":
+			_clearpublishtagcache(self)
+
+	def _publishtags(self, prefix, xhtml):
+		# Return the cached result of :func:`_attrtags` for this attribute class
+		key = (prefix, xhtml)
+		try:
+			return self._publishtagcache[key]
+		except KeyError:
+			tags = self._publishtagcache[key] = _attrtags(self.xmlname, prefix, xhtml)
+			return tags
+
 	def __repr__(self):
 		if self.xmlname != self.__name__:
 			xmlname = f" xmlname={self.xmlname!r}"
@@ -3099,10 +3529,30 @@ class _Element_Meta(type(Node)):
 			from ll.xist import sims
 			dict["model"] = sims.Any() if dict["model"] else sims.Empty()
 		self = super(_Element_Meta, cls).__new__(cls, name, bases, dict)
+		self._publishtagcache = {}
 		if dict.get("register") is not None:
 			threadlocalpool.pool.register(self)
 		return self
 
+	def __setattr__(self, name, value):
+		super().__setattr__(name, value)
+		if name in {"xmlname", "model"}:
+			_clearpublishtagcache(self)
+
+	def __delattr__(self, name):
+		super().__delattr__(name)
+		if name in {"xmlname", "model"}:
+			_clearpublishtagcache(self)
+
+	def _publishtags(self, prefix, xhtml):
+		# Return the cached result of :func:`_elementtags` for this element class
+		key = (prefix, xhtml)
+		try:
+			return self._publishtagcache[key]
+		except KeyError:
+			tags = self._publishtagcache[key] = _elementtags(self.xmlname, prefix, self.model, xhtml)
+			return tags
+
 	def __repr__(self):
 		if self.xmlname != self.__name__:
 			xmlname = f" xmlname={self.xmlname!r}"
@@ -3147,6 +3597,8 @@ class Element(Node, metaclass=_Element_Meta):
 		specify the real XML name. Otherwise the XML name will be the Python name.
 	"""
 
+	__slots__ = ("__dict__", "__weakref__", "_content", "_attrs", "startloc", "endloc")
+
 	model = None
 	register = None
 
@@ -3166,8 +3618,37 @@ class Element(Node, metaclass=_Element_Meta):
 				attrargs.append(child)
 			else:
 				contentargs.append(child)
-		self.content = Frag(*contentargs)
-		self.attrs = self.Attrs(*attrargs, **attrs)
+		# Empty content and attributes will be created on first access
+		self._content = Frag(*contentargs) if contentargs else None
+		self._attrs = self.Attrs(*attrargs, **attrs) if attrargs or attrs or self.Attrs._defaultattrs else None
+		self.startloc = None
+		self.endloc = None
+
+	class content(misc.propclass):
+		"""
+		The content of the element as a :class:`Frag` object.
+		"""
+		def __get__(self):
+			content = self._content
+			if content is None:
+				content = self._content = Frag()
+			return content
+
+		def __set__(self, content):
+			self._content = content
+
+	class attrs(misc.propclass):
+		"""
+		The attributes of the element as an :class:`Attrs` object.
+		"""
+		def __get__(self):
+			attrs = self._attrs
+			if attrs is None:
+				attrs = self._attrs = self.Attrs()
+			return attrs
+
+		def __set__(self, attrs):
+			self._attrs = attrs
 
 	def __repr__(self):
 		if self.xmlns is not None:
@@ -3180,14 +3661,14 @@ class Element(Node, metaclass=_Element_Meta):
 		else:
 			xmlname = ""
 
-		lc = len(self.content)
+		lc = len(self)
 		if lc == 0:
 			childcount = "no children"
 		elif lc == 1:
 			childcount = "1 child"
 		else:
 			childcount = f"{lc:,} children"
-		la = len(self.attrs)
+		la = len(self._attrs) if self._attrs is not None else 0
 		if la == 0:
 			attrcount = "no attrs"
 		elif la == 1:
@@ -3237,6 +3718,8 @@ class Element(Node, metaclass=_Element_Meta):
 		(content, attrs) = data
 		self.content = content
 		self.attrs = self.Attrs()
+		self.startloc = None
+		self.endloc = None
 		for (key, value) in attrs.items():
 			obj = importlib.import_module(value[0])
 			for name in value[1].split("."):
@@ -3289,9 +3772,15 @@ class Element(Node, metaclass=_Element_Meta):
 			yield UndeclaredNodeWarning(self)
 		if self.model is not None:
 			yield from self.model.validate(path)
-		yield from self.attrs.validate(recursive, path)
-		if recursive:
-			yield from self.content.validate(recursive, path)
+		if self._attrs is not None:
+			yield from self._attrs.validate(recursive, path)
+		else:
+			# No attributes, so only required attributes can be a problem
+			for attr in self.Attrs.declaredattrs():
+				if attr.required:
+					yield RequiredAttrMissingWarning(self.Attrs, attr)
+		if recursive and self._content is not None:
+			yield from self._content.validate(recursive, path)
 
 	def append(self, *items):
 		"""
@@ -3326,14 +3815,19 @@ class Element(Node, metaclass=_Element_Meta):
 
 	def clone(self):
 		node = self._create()
-		node.content = self.content.clone() # this is faster than passing it in the constructor (no :func:`tonode` call)
-		node.attrs = self.attrs.clone()
+		# Empty content and attributes don't have to be cloned (``node`` has none either)
+		if self._content is not None:
+			node.content = self._content.clone() # this is faster than passing it in the constructor (no :func:`tonode` call)
+		if self._attrs is not None:
+			node.attrs = self._attrs.clone()
 		return self._decoratenode(node)
 
 	def __copy__(self):
 		node = self._create()
-		node.content = copy.copy(self.content)
-		node.attrs = copy.copy(self.attrs)
+		if self._content is not None:
+			node.content = copy.copy(self._content)
+		if self._attrs is not None:
+			node.attrs = copy.copy(self._attrs)
 		return self._decoratenode(node)
 
 	def __deepcopy__(self, memo=None):
@@ -3376,23 +3870,20 @@ class Element(Node, metaclass=_Element_Meta):
 		return self.xmlname
 
 	def _publishstarttag(self, publisher):
-		name = self._publishname(publisher)
+		if publisher.lazyxmlns:
+			publisher._enterxmlns([*self.walknodes(Element, Attr, entercontent=False, enterattrs=True), *_customnodes(self.content)])
+			name = self._publishname(publisher)
+			# Remember the name, as the prefix might change before :meth:`_publishendtag` gets called
+			publisher._xmlnsnames.append(name)
+		else:
+			name = self._publishname(publisher)
 		yield publisher.encode("<")
 		yield publisher.encode(name)
-		# we're the first element to be published, so we have to create the xmlns attributes
+		# we're the first element to be published (or the outermost element using a namespace), so we have to create the xmlns attributes
 		if publisher._publishxmlns:
-			for (xmlns, prefix) in sorted(publisher._ns2prefix.items(), key=lambda item: item[1] or ""):
-				if xmlns not in publisher.hidexmlns:
-					yield publisher.encode(" xmlns")
-					if prefix is not None:
-						yield publisher.encode(":")
-						yield publisher.encode(prefix)
-					yield publisher.encode('="')
-					yield publisher.encode(xmlns)
-					yield publisher.encode('"')
-			# reset the note, so the next element won't create the attributes again
-			publisher._publishxmlns = False
-		yield from self.attrs.publish(publisher)
+			yield publisher.encode(publisher._xmlnsattrs())
+		if self._attrs is not None:
+			yield from self._attrs.publish(publisher)
 		if len(self):
 			yield publisher.encode(">")
 		else:
@@ -3409,7 +3900,11 @@ class Element(Node, metaclass=_Element_Meta):
 				yield publisher.encode("/>")
 
 	def _publishendtag(self, publisher):
-		name = self._publishname(publisher)
+		if publisher.lazyxmlns:
+			name = publisher._xmlnsnames.pop()
+			publisher._leavexmlns()
+		else:
+			name = self._publishname(publisher)
 		if len(self):
 			yield publisher.encode("</")
 			yield publisher.encode(name)
@@ -3513,7 +4008,8 @@ class Element(Node, metaclass=_Element_Meta):
 		"""
 		Return the number of children.
 		"""
-		return len(self.content)
+		content = self._content
+		return len(content) if content is not None else 0
 
 	def __iter__(self):
 		return iter(self.content)
@@ -3615,10 +4111,10 @@ class Element(Node, metaclass=_Element_Meta):
 			entercontent = cursor.entercontent
 			enterattrs = cursor.enterattrs
 			leaveelementnode = cursor.leaveelementnode
-		if enterattrs:
-			yield from self.attrs._walk(cursor)
-		if entercontent:
-			yield from self.content._walk(cursor)
+		if enterattrs and self._attrs is not None:
+			yield from self._attrs._walk(cursor)
+		if entercontent and self._content is not None:
+			yield from self._content._walk(cursor)
 		if leaveelementnode:
 			cursor.event = "leaveelementnode"
 			yield cursor
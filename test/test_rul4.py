@@ -139,3 +139,14 @@ def test_oracle_execute_procedure_out(globals):
 			whitespace="strip"
 		)
 		assert template.renders(globals=globals) == f"42|42.5|foo|{100000*'foo'}|2014-10-05 16:17:18"
+
+
+def test_profile(tmp_path, capsys):
+	path = tmp_path / "page.ul4"
+	path.write_text("<?for i in range(3)?><?print i?><?end for?>", encoding="utf-8")
+	rul4.main(["--profile=yes", "--profile_limit=2", "--oracle=no", str(path)])
+	(out, err) = capsys.readouterr()
+	assert "012" == out
+	lines = err.splitlines()
+	assert 3 == len(lines)
+	assert "page:1:" in lines[1]
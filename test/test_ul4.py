@@ -10,7 +10,7 @@
 ## See ll/xist/__init__.py for the license
 
 
-import sys, os, re, io, tempfile, subprocess, codecs, datetime, math, textwrap, pathlib
+import sys, os, re, io, json, tempfile, subprocess, codecs, datetime, math, decimal, textwrap, pathlib, threading, time
 from collections import abc
 
 import pytest
@@ -487,10 +487,16 @@ class TemplateJavascriptNode(TemplateJavascript):
 		return self.runcode("node {fn}", source)
 
 
+class TemplatePythonCompiled(TemplatePython):
+	def maketemplate(self):
+		return ul4c.Template(self.source, name=self.name, whitespace=self.whitespace, signature=self.signature, backend="python")
+
+
 template_params = [
 	pytest.param("python", marks=pytest.mark.python),
 	pytest.param("python_dumps", marks=pytest.mark.python),
 	pytest.param("python_dump", marks=pytest.mark.python),
+	pytest.param("python_compiled", marks=pytest.mark.python),
 	pytest.param("java_compiled_by_python", marks=pytest.mark.java),
 	pytest.param("java_compiled_by_java", marks=pytest.mark.java),
 	pytest.param("js_v8", marks=pytest.mark.js),
@@ -502,6 +508,7 @@ all_templates = dict(
 	python=TemplatePython,
 	python_dumps=TemplatePythonDumpS,
 	python_dump=TemplatePythonDump,
+	python_compiled=TemplatePythonCompiled,
 	java_compiled_by_python=TemplateJavaCompiledByPython,
 	java_compiled_by_java=TemplateJavaCompiledByJava,
 	js_v8=TemplateJavascriptV8,
@@ -514,7 +521,8 @@ def T(request):
 	"""
 	A parameterized fixture that returns each of the testing classes
 	:class:`TemplatePython`, :class:`TemplatePythonDumpS`,
-	:class:`TemplatePythonDump`, :class:`TemplateJavaCompiledByPython`,
+	:class:`TemplatePythonDump`, :class:`TemplatePythonCompiled`,
+	:class:`TemplateJavaCompiledByPython`,
 	:class:`TemplateJavaCompiledByJava`, :class:`TemplateJavascriptV8`,
 	:class:`TemplateJavascriptNode` and :class:`TemplatePHP`.
 
@@ -768,7 +776,7 @@ def test_string(T):
 	assert 'no' == T('<?if ""?>yes<?else?>no<?end if?>').renders()
 	assert 'yes' == T('<?if "foo"?>yes<?else?>no<?end if?>').renders()
 
-	with raises("Unterminated string|mismatched character|MismatchedTokenException|NoViableAltException|SyntaxException"):
+	with raises("Unterminated string|unterminated string|mismatched character|MismatchedTokenException|NoViableAltException|SyntaxException"):
 		T('<?print "?>').renders()
 
 
@@ -3475,7 +3483,7 @@ def test_function_isexception(T):
 	assert "False" == t.renders(data=datetime.datetime.now())
 	assert "False" == t.renders(data=datetime.timedelta(1))
 	assert "False" == t.renders(data=misc.monthdelta(1))
-	if t in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS): # can't serialize exception in UL4ON
+	if t in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS, TemplatePythonCompiled): # can't serialize exception in UL4ON
 		assert "True" == t.renders(data=ValueError("broken"))
 	assert "False" == t.renders(data=())
 	assert "False" == t.renders(data=[])
@@ -4462,7 +4470,7 @@ def test_function_getattr(T):
 	assert "GURK" == T("<?print getattr('gurk', 'upper')()?>").renders()
 	assert "a:42;b:17;c:23;" == T("<?for (key, value) in sorted(getattr(data, 'items')())?><?print key?>:<?print value?>;<?end for?>").renders(data={"a": 42, "b": 17, "c": 23})
 	assert "{/}" == T("<?code getattr(data, 'clear')()?><?print data?>").renders(data={"a", "b", "c"})
-	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS):
+	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS, TemplatePythonCompiled):
 		assert "x=17, y=23" == T("x=<?print getattr(data, 'x')?>, y=<?print getattr(data, 'y')?>").renders(data=Point(17, 23))
 
 
@@ -4472,13 +4480,13 @@ def test_function_hasattr(T):
 	assert "False" == T("<?print hasattr('gurk', 'no')?>").renders()
 	assert "TrueFalseFalse" == T("<?print hasattr(data, 'items')?><?print hasattr('data', 'a')?><?print hasattr('data', 'd')?>").renders(data={"a": 42, "b": 17, "c": 23})
 	assert "TrueFalse" == T("<?print hasattr(data, 'clear')?><?print hasattr('data', 'a')?>").renders(data={"a", "b", "c"})
-	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS):
+	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS, TemplatePythonCompiled):
 		"TrueTrueFalse" == T("<?print hasattr(data, 'x')?><?print getattr(data, 'y')?><?print getattr(data, 'z')?>").renders(data=Point(17, 23))
 
 
 @pytest.mark.ul4
 def test_function_setattr(T):
-	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS):
+	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS, TemplatePythonCompiled):
 		assert "42" == T("<?code setattr(data, 'x', 42)?><?print data.x?>").renders(data=Point(17, 23))
 
 		with raises("readonly attribute"):
@@ -4504,7 +4512,7 @@ def test_function_dir(T):
 	assert {"append", "count", "find", "insert", "pop", "rfind"} == t(data=[1, 2, 3])
 	assert {"add", "clear"} == t(data={1, 2, 3})
 	assert {"clear", "get", "items", "keys", "pop", "update", "values"} == t(data={"a": 17, "b": 23})
-	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS):
+	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS, TemplatePythonCompiled):
 		assert {'x', 'y'} == t(data=Point(17, 23))
 
 	all = [
@@ -4519,7 +4527,7 @@ def test_function_dir(T):
 		{"a": 17, "b": 23},
 	]
 
-	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS):
+	if T in (TemplatePython, TemplatePythonDump, TemplatePythonDumpS, TemplatePythonCompiled):
 		all.append(Point(17, 23))
 
 	# Check that ``getattr(x, ...)`` returns every attribute in ``dir(x)``
@@ -6083,7 +6091,7 @@ def test_doc(T):
 
 @pytest.mark.ul4
 def test_exception(T):
-	if T in (TemplatePython, TemplatePythonDumpS, TemplatePythonDump):
+	if T in (TemplatePython, TemplatePythonDumpS, TemplatePythonDump, TemplatePythonCompiled):
 		assert "None" == T("<?print repr(exc.context)?>").renders(exc=ValueError("broken"))
 		exc = ValueError("broken")
 		exc.__cause__ = ValueError("because")
@@ -6917,7 +6925,7 @@ def test_function_signature_default(T):
 @pytest.mark.ul4
 def test_function_signature_args(T):
 	# Calling a template with position arguments only works in Python (of course, inside a template this works in all implementations)
-	if T in (TemplatePython, TemplatePythonDumpS, TemplatePythonDump):
+	if T in (TemplatePython, TemplatePythonDumpS, TemplatePythonDump, TemplatePythonCompiled):
 		assert 40 == T("<?return sum(args)?>", signature="*args")(17, 23)
 
 
@@ -7756,3 +7764,573 @@ def test_python_boundtemplate_renderblocks():
 	)
 
 	assert "[<&>][!!!][???]" == T('<?renderblocks self.t_render()?><?def content1?>!!!<?end def?><?code content2 = "???"?><?end renderblocks?>').renders(self=obj)
+
+
+@pytest.mark.ul4
+def test_templatecache():
+	cache = ul4c.TemplateCache(maxsize=2)
+
+	t1 = cache.template("<?print x?>", "t1")
+	assert t1.renders(x=42) == "42"
+	assert cache.template("<?print x?>", "t1") is t1
+	assert cache.template("<?print x?>", "t1", whitespace="strip") is not t1
+	assert (cache.hits, cache.misses, cache.evictions) == (1, 2, 0)
+
+	cache.template("<?print y?>", "t2")
+	assert len(cache) == 2
+	assert cache.evictions == 1
+	assert cache.template("<?print x?>", "t1") is not t1 # Evicted as the least recently used template
+
+	cache.clear()
+	assert len(cache) == 0
+	assert (cache.bytes, cache.hits, cache.misses, cache.evictions) == (0, 0, 0, 0)
+
+
+@pytest.mark.ul4
+def test_templatecache_maxbytes():
+	cache = ul4c.TemplateCache(maxsize=None, maxbytes=20)
+
+	cache.template("<?print 'a'?>") # 13 bytes
+	cache.template("<?print 'b'?>")
+	assert len(cache) == 1
+	assert cache.bytes == 13
+	assert cache.evictions == 1
+
+
+@pytest.mark.ul4
+def test_templatecache_directory(tmp_path):
+	cache1 = ul4c.TemplateCache(directory=tmp_path)
+	t1 = cache1.template("<?print x + y?>", "t", signature="x, y=17")
+	assert cache1.misses == 1
+	assert len(list(tmp_path.iterdir())) == 1
+
+	# A new cache (e.g. in another process) loads the dump instead of compiling the template
+	cache2 = ul4c.TemplateCache(directory=tmp_path)
+	t2 = cache2.template("<?print x + y?>", "t", signature="x, y=17", backend="python")
+	assert (cache2.diskhits, cache2.misses) == (1, 0)
+	assert t2 is not t1
+	assert t2.backend == "python"
+	assert t2.renders(25) == "42"
+
+
+@pytest.mark.ul4
+def test_templatecache_directory_failure(tmp_path, monkeypatch):
+	def replace(src, dst):
+		raise PermissionError(dst)
+
+	# If the dump can't be stored, no temporary file is left behind
+	monkeypatch.setattr(os, "replace", replace)
+	cache = ul4c.TemplateCache(directory=tmp_path)
+	assert cache.template("<?print x?>", "t").renders(x=42) == "42"
+	assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.ul4
+def test_templatecache_readonly():
+	cache = ul4c.TemplateCache()
+	t = cache.template("<?def f(x)?><?return x?><?end def?><?print f(x)?>", "t")
+
+	with pytest.raises(TypeError):
+		t.backend = "python"
+	with pytest.raises(TypeError):
+		t.optimize = True
+	with pytest.raises(TypeError):
+		t.content = []
+	for name in ("name", "whitespace", "signature", "parenttemplate"):
+		with pytest.raises(TypeError):
+			setattr(t, name, None)
+		with pytest.raises(TypeError):
+			delattr(t, name)
+	with pytest.raises(AttributeError):
+		t.content.clear()
+	(f,) = [node for node in t.content if isinstance(node, ul4c.Template)]
+	with pytest.raises(TypeError):
+		f.memoize()
+	with pytest.raises(TypeError):
+		t.unmemoize()
+	assert t.backend == "ast"
+	assert t.name == "t"
+	assert t.renders(x=42) == "42"
+	assert cache.template("<?def f(x)?><?return x?><?end def?><?print f(x)?>", "t").renders(x=42) == "42"
+	assert t.renders(x=42) == "42"
+
+	# Templates that are not from the cache can still be modified
+	t = ul4c.Template("<?print x?>", "t")
+	t.backend = "python"
+	assert t.renders(x=42) == "42"
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize(
+	"source",
+	[
+		"<?print a.b.c(1, *x, y=2, **z)[3][1:][:-1][:].d?>",
+		"<?print -~a * b / c // d % e + f - g << h >> i & j ^ k | l?>",
+		"<?print a == b != c < d <= e > f >= g in h not in i is j is not k?>",
+		"<?print not a and b or c if d else e?>",
+		"<?print [1, *a, ]?><?print [x for x in y if x if a else b]?><?print []?>",
+		"<?print {/}?><?print {1, *a}?><?print {x for (x, y) in z}?>",
+		"<?print {}?><?print {1: 2, **a}?><?print {k: v for (k, v) in x if k}?>",
+		"<?print (x for x in y if c)?><?print f(x for x in y)?><?print (a + b) * c?>",
+		"<?print None?><?print True?><?print False?><?print 42?><?print 0x2a?><?print 0o52?><?print 0b101010?>",
+		"<?print 1.?><?print .5e3?><?print 1e5?><?print 'a\\'b'?><?print \"\\u20ac\\x41\"?><?print '''a\r\nb'''?>",
+		"<?print @(2000-02-29)?><?print @(2000-02-29T)?><?print @(2000-02-29T12:34:56.987654)?><?print #fff?><?print #12345678?>",
+		"<?code (a, (b, c),) = x?><?code (a) = x?><?code a.b[c] += 1?><?code a //= 2?><?code a == b?>",
+		"<?for (a, b) in x?><?end for?><?for a in x if y else z?><?end for?>",
+		"<?ul4 t(a, b=[1, 2], *c, **d)?><?def f(*c, **d,)?><?end def?><?def g?><?end def?>",
+	]
+)
+def test_parser_antlr(monkeypatch, source):
+	# The hand-written parser and the ANTLR parser must produce identical ASTs
+	t1 = ul4c.Template(source)
+	monkeypatch.setattr(ul4c.Template, "parser", "antlr")
+	t2 = ul4c.Template(source)
+	assert t1.dumps() == t2.dumps()
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize(
+	"source",
+	[
+		"<?print 1 +?>",
+		"<?print (1?>",
+		"<?print [1 2]?>",
+		"<?print f(a b)?>",
+		"<?print a.if?>",
+		"<?print $?>",
+		"<?print {1: 2, 3}?>",
+		"<?code (a, b) += 1?>",
+		"<?for a b?><?end for?>",
+		"<?def f(a=1, b)?><?end def?>",
+		"<?def f(**a, *b)?><?end def?>",
+	]
+)
+def test_parser_syntaxerror(source):
+	with pytest.raises(Exception) as excinfo:
+		ul4c.Template(source)
+	assert any(isinstance(exc, SyntaxError) for exc in misc.exception_chain(excinfo.value))
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_optimize(backend):
+	source = "a<?print 'b'?>\n<?if False?>no<?elif x?>x<?else?>else<?end if?><?if 1?>one<?end if?><?while False?><?end while?><?print 0 or x?><?print [1, 2] + [3]?>"
+
+	t1 = ul4c.Template(source, backend=backend)
+	t2 = ul4c.Template(source, backend=backend, optimize=True)
+
+	assert ["indent", "indent", "condblock", "text", "print", "print"] == [node.type for node in t2.content]
+	assert "ab\n" == t2.content[0].text
+	assert ["ifblock", "elseblock"] == [node.type for node in t2.content[2].content]
+	assert "<?elif x?>" == t2.content[2].content[0].startsource
+	for x in (None, 42):
+		assert t1.renders(x=x) == t2.renders(x=x)
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_optimize_constant_containers(backend):
+	# Precomputed list/set/dict literals must produce a new object each time
+	t = ul4c.Template("<?for i in range(3)?><?code l = [1, 2]?><?code s = {1}?><?code d = {1: 2}?><?code l.append(i)?><?code s.add(i)?><?code d[i] = i?><?print len(l)?><?print len(s)?><?print len(d)?>;<?end for?>", backend=backend, optimize=True)
+	assert "322;311;322;" == t.renders()
+
+
+@pytest.mark.ul4
+def test_optimize_location():
+	t = ul4c.Template("<?if True?><?print 1/0?><?end if?>", optimize=True)
+	with raises(r"offset \[19:22\]"):
+		t.renders()
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_slots(backend):
+	t = ul4c.Template("<?for i in range(x)?><?code y = i?><?end for?><?print y?>;<?print len('ab')?>", signature="x", backend=backend)
+	assert ("i", "x", "y") == t._resolve()
+	assert "2;2" == t.renders(3)
+
+	# Local variables can be read before they are assigned
+	t = ul4c.Template("<?print x?><?code x = 2?><?print x?><?code x += 1?><?print x?>", backend=backend)
+	assert ("x",) == t._resolve()
+	assert "123" == t.renders(x=1)
+	assert "23" == t.renders()
+
+	# Global and builtin variables
+	t = ul4c.Template("<?print len(x)?>;<?print g?>", signature="x", backend=backend)
+	assert "2;" == t.renders("ab")
+	assert "2;17" == t.renders_with_globals(["ab"], {}, dict(g=17))
+
+	# Parameters may shadow builtins
+	t = ul4c.Template("<?print len?>", signature="len", backend=backend)
+	assert "42" == t.renders(42)
+
+	# Comprehension variables don't leak into the surrounding scope
+	t = ul4c.Template("<?code i = 5?><?print [i*2 for i in range(3)]?><?print i?>", backend=backend)
+	assert "[0, 2, 4]5" == t.renders()
+
+	# Locally defined templates see the current values of the variables
+	t = ul4c.Template("<?code x = 1?><?def t?><?print x?><?end def?><?code x = 2?><?render t()?>", backend=backend)
+	assert t._resolve() is None
+	assert "2" == t.renders()
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_slots_undefined(backend):
+	t = ul4c.Template("<?code x += 1?>", backend=backend)
+	with raises("'x'"):
+		t.renders()
+
+
+@pytest.mark.ul4
+def test_bufferedstream():
+	stream = io.StringIO()
+	bufferedstream = ul4c.BufferedStream(stream, 10)
+	t = ul4c.Template("<?for i in range(20)?><?print i?>;<?end for?>")
+	t.render(bufferedstream)
+	assert t.renders() == stream.getvalue()
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_iterrender(backend):
+	t = ul4c.Template("<?for i in range(n)?><?print i?>;<?end for?><?print g?>", signature="n", backend=backend)
+	t.chunksize = 100
+
+	chunks = list(t.iterrender(1000))
+	assert len(chunks) > 1
+	assert all(len(chunk) >= 100 for chunk in chunks[:-1])
+	assert t.renders(1000) == "".join(chunks)
+	assert t.renders_with_globals([10], {}, dict(g=42)) == "".join(t.iterrender_with_globals([10], {}, dict(g=42)))
+
+	# Stopping the iteration early must work
+	chunks = t.iterrender(10**6)
+	assert next(chunks).startswith("0;1;2;")
+	chunks.close()
+
+
+@pytest.mark.ul4
+def test_iterrender_close():
+	# Closing the iterator must end the rendering thread, even when only the end of the output is pending
+	t = ul4c.Template("<?for c in '0123456789abcdefghij'?><?print c?><?end for?>")
+	t.chunksize = 10
+	for i in range(20):
+		chunks = t.iterrender()
+		assert "0123456789" == next(chunks)
+		chunks.close()
+
+	def running():
+		return any(thread.name == "ul4 iterrender" for thread in threading.enumerate())
+
+	deadline = time.monotonic() + 5
+	while running() and time.monotonic() < deadline:
+		time.sleep(0.05)
+	assert not running()
+
+
+@pytest.mark.ul4
+def test_iterrender_exception():
+	t = ul4c.Template("<?for i in range(n)?><?print i?>;<?print 1/(500-i)?><?end for?>", signature="n")
+	t.chunksize = 100
+	with raises("division by zero"):
+		for chunk in t.iterrender(1000):
+			pass
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("source", [
+	"<?print 1/0?>",
+	"<?for i in range(3)?><?if i == 2?><?print len(i)?><?end if?><?end for?>",
+	"<?def t(x)?><?print 1/x?><?end def?><?render t(0)?>",
+	"<?def t(x)?><?return [1/y for y in x]?><?end def?><?print t([1, 0])?>",
+	"<?code g = (1/y for y in [1, 0])?><?print list(g)?>",
+	"<?code x = [1]?><?code x[5] += 1?>",
+	"<?code (a, b) = 1?>",
+])
+def test_errortracking(source):
+	def chain(mode):
+		ul4c.set_errortracking(mode)
+		try:
+			ul4c.Template(source).renders()
+		except Exception as exc:
+			return [misc.format_exception(exc) for exc in misc.exception_chain(exc)]
+		finally:
+			ul4c.set_errortracking("eager")
+
+	eager = chain("eager")
+	assert eager is not None
+	assert eager == chain("lazy")
+
+
+@pytest.mark.ul4
+def test_errortracking_unknown():
+	with pytest.raises(ValueError):
+		ul4c.set_errortracking("nope")
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_render_many(executor):
+	t = ul4c.Template("<?print name?>=<?print 12 // x?>", "t", backend="python")
+	items = [dict(name=f"n{i}", x=i % 4) for i in range(20)]
+
+	results = list(t.render_many(items, workers=2, executor=executor, chunksize=3))
+
+	assert 20 == len(results)
+	for (i, result) in enumerate(results):
+		if i % 4:
+			assert f"n{i}={12 // (i % 4)}" == result
+		else:
+			assert isinstance(result, ZeroDivisionError)
+			if executor == "process":
+				assert "offset [23:30]" in result.__notes__[0]
+			else:
+				assert isinstance(result.__cause__, ul4c.LocationError)
+
+
+@pytest.mark.ul4
+def test_render_many_globals():
+	t = ul4c.Template("<?print g?><?print x?>")
+	assert ["a1", "a2"] == list(t.render_many([dict(x=1), dict(x=2)], executor="thread", globals=dict(g="a")))
+
+
+@pytest.mark.ul4
+def test_render_many_unknown_executor():
+	with pytest.raises(ValueError):
+		ul4c.Template("").render_many([], executor="nope")
+
+
+@pytest.mark.ul4
+def test_load_lazy(tmpdir):
+	source = """
+		<?def a(x)?>
+			<?def inner?>[<?print x?>]<?end def?>
+			<?render inner()?>
+		<?end def?>
+		<?def b?>b<?end def?>
+		<?for i in range(3)?><?render a(x=i)?><?end for?>
+	"""
+	t = ul4c.Template(source, "t", whitespace="strip")
+	dump = t.dumps()
+
+	t2 = ul4c.Template.loads(dump, lazy=True)
+	b = [node for node in t2.content if isinstance(node, ul4c.Template) and node.name == "b"][0]
+	assert b._lazycontent is not None
+	assert t.renders() == t2.renders()
+	assert b._lazycontent is not None
+	assert str(t) == str(t2)
+	assert b._lazycontent is None
+	assert dump == t2.dumps()
+
+	assert t.renders() == ul4c.Template.load(io.StringIO(dump), lazy=True).renders()
+
+	path = str(tmpdir.join("t.ul4on"))
+	with open(path, "w", encoding="utf-8") as f:
+		f.write(dump)
+	assert t.renders() == ul4on.loadfile(path, lazy=True).renders()
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_memoize(backend):
+	t = ul4c.Template("<?ul4 badge(text, color='red')?><b style='color: <?print color?>'><?print text?></b>", backend=backend)
+	t.memoize(maxsize=2)
+
+	assert "<b style='color: red'>a</b>" == t.renders("a")
+	assert "<b style='color: red'>a</b>" == t.renders(text="a")
+	assert "<b style='color: blue'>a</b>" == t.renders("a", "blue")
+	assert (1, 2, 0) == (t.resultcache.hits, t.resultcache.misses, t.resultcache.evictions)
+	t.renders("b")
+	assert (1, 3, 1) == (t.resultcache.hits, t.resultcache.misses, t.resultcache.evictions)
+	# Equal arguments of different types don't share results
+	assert "<b style='color: red'>True</b>" == t.renders(True)
+	assert "<b style='color: red'>1</b>" == t.renders(1)
+	# This is true for the items of tuples and frozensets too
+	t.memoize()
+	assert "<b style='color: red'>[1, 1.0]</b>" == t.renders((1, 1.0))
+	assert "<b style='color: red'>[1.0, 1]</b>" == t.renders((1.0, 1))
+	assert "<b style='color: red'>[True, 1]</b>" == t.renders((True, 1))
+	assert "<b style='color: red'>{1.0}</b>" == t.renders(frozenset({1.0}))
+	assert "<b style='color: red'>{1}</b>" == t.renders(frozenset({1}))
+	assert 5 == t.resultcache.misses
+	# Unhashable arguments bypass the cache
+	assert "<b style='color: red'>[1]</b>" == t.renders([1])
+	assert 5 == t.resultcache.misses
+	# Equal values that are formatted differently don't share results
+	assert "<b style='color: red'>0.0</b>" == t.renders(0.0)
+	assert "<b style='color: red'>-0.0</b>" == t.renders(-0.0)
+	assert "<b style='color: red'>1.0</b>" == t.renders(decimal.Decimal("1.0"))
+	assert "<b style='color: red'>1.00</b>" == t.renders(decimal.Decimal("1.00"))
+	assert "<b style='color: red'>[-0.0]</b>" == t.renders((-0.0,))
+	assert 10 == t.resultcache.misses
+	t.unmemoize()
+	assert t.resultcache is None
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_memoize_local_template(backend):
+	source = """
+		<?def fib(n)?>
+			<?if n < 2?><?return n?><?end if?>
+			<?return fib(n-1) + fib(n-2)?>
+		<?end def?>
+		<?print fib(40)?>
+	"""
+	t = ul4c.Template(source, whitespace="strip", backend=backend)
+	fib = [node for node in t.content if isinstance(node, ul4c.Template)][0]
+	fib.memoize(None)
+	assert "102334155" == t.renders()
+	assert 41 == len(fib.resultcache)
+
+
+@pytest.mark.ul4
+def test_memoize_globals():
+	t = ul4c.Template("<?ul4 t(x)?><?print len(x)?>")
+	t.memoize()
+	assert "3" == t.renders("foo")
+	# Global variables that hide builtins bypass the cache
+	assert "42" == t.renders_with_globals(["foo"], {}, dict(len=lambda x: 42))
+	assert "3" == t.renders("foo")
+	assert 1 == t.resultcache.hits
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("source", [
+	"<?print x?>",
+	"<?ul4 t(x)?><?print y?>",
+	"<?ul4 t(x)?><?print now()?>",
+	"<?ul4 t(x)?><?print randrange(x)?>",
+	"<?ul4 t(x)?><?code x.y = 42?>",
+	"<?ul4 t(x)?><?code x[0] = 42?>",
+	"<?ul4 t(x)?><?code x += [42]?>",
+	"<?ul4 t(x)?><?code x.append(42)?>",
+	"<?ul4 t(x)?><?code setattr(x, 'y', 42)?>",
+	"<?ul4 t(x)?><?for y in x?><?code y.z = 42?><?end for?>",
+	"<?ul4 t(x)?><?code y = x?><?code y.append(42)?>",
+	"<?ul4 t(x)?><?code y = [x]?><?code y[0].append(42)?>",
+	"<?ul4 t(x)?><?code y = {'x': x}?><?code y.x.z = 42?>",
+	"<?ul4 t(x)?><?code y = [z for z in x]?><?code y[0].append(42)?>",
+	"<?ul4 t(x)?><?code y = [[]]?><?code y = [x]?><?code y[0].append(42)?>",
+	"<?ul4 t(x)?><?def s(y=z)?><?end def?>",
+])
+def test_memoize_impure(source):
+	with pytest.raises(ValueError):
+		ul4c.Template(source).memoize()
+
+
+@pytest.mark.ul4
+def test_memoize_pure():
+	t = ul4c.Template("<?ul4 t(x)?><?code y = []?><?code n = 0?><?for i in x?><?code y.append(i)?><?code n += 1?><?end for?><?def s(z)?><?return z + n?><?end def?><?print y?><?print s(len(y))?>")
+	t.memoize()
+	assert "[1, 2]4" == t.renders([1, 2])
+
+	# Containers that contain objects passed in may be modified, their items may not
+	t = ul4c.Template("<?ul4 t(x)?><?code y = [x]?><?code z = [[]]?><?code y.append(42)?><?code z[0].append(42)?><?print y?><?print z?>")
+	t.memoize()
+	assert "[[1], 42][[42]]" == t.renders([1])
+
+
+@pytest.mark.ul4
+def test_profiler():
+	source = """
+		<?ul4 page(items)?>
+		<?def row(item)?>
+			<?print item.upper()?>
+		<?end def?>
+		<?for item in items?>
+			<?render row(item)?>
+		<?end for?>
+	"""
+	t = ul4c.Template(source, "page", whitespace="strip")
+	profiler = ul4c.Profiler()
+	stream = io.StringIO()
+	t.ul4_render(ul4c.Context(None, stream, profiler), ["a", "b", "c"])
+	assert "ABC" == stream.getvalue()
+
+	stats = {(stat["kind"], stat["template"], stat["type"]): stat for stat in profiler.stats()}
+	assert 1 == stats["template", "page", "Template"]["count"]
+	assert 3 == stats["template", "row", "Template"]["count"]
+	assert 1 == stats["node", "page", "ForBlockAST"]["count"]
+	stat = stats["node", "row", "PrintAST"]
+	assert (3, 4, 4, "<?print item.upper()?>") == (stat["count"], stat["line"], stat["col"], stat["source"])
+	assert stat["cumtime"] >= stat["owntime"] >= 0
+	assert stats["template", "page", "Template"]["cumtime"] >= stats["node", "page", "ForBlockAST"]["cumtime"]
+
+	assert [stat["count"] for stat in profiler.stats("count")] == sorted((stat["count"] for stat in profiler.stats()), reverse=True)
+	assert profiler.stats() == json.loads(profiler.report("json"))
+	assert profiler.stats() == ul4on.loads(profiler.report("ul4on"))
+	report = profiler.report(limit=3).splitlines()
+	assert 4 == len(report)
+	assert "location" in report[0]
+
+	with pytest.raises(ValueError):
+		profiler.stats("nope")
+	with pytest.raises(ValueError):
+		profiler.report("nope")
+
+
+@pytest.mark.ul4
+def test_profiler_recursion():
+	t = ul4c.Template("<?def f(n)?><?return f(n-1) if n else 0?><?end def?><?print f(10)?>", "t")
+	profiler = ul4c.Profiler()
+	t.ul4_render(ul4c.Context(None, io.StringIO(), profiler))
+	stats = {(stat["kind"], stat["template"]): stat for stat in profiler.stats() if stat["kind"] == "template"}
+	f = stats["template", "f"]
+	assert 11 == f["count"]
+	# Recursive calls are only counted once in the cumulative time
+	assert f["cumtime"] <= stats["template", "t"]["cumtime"]
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+@pytest.mark.parametrize("source, limits, exception, location", [
+	("<?while True?><?end while?>", dict(maxsteps=1000), ul4c.StepLimitError, "<?while True?>"),
+	("<?while True?><?end while?>", dict(timeout=0.1), ul4c.TimeLimitError, "<?while True?>"),
+	("<?for i in range(1000000)?><?print i?><?end for?>", dict(maxoutput=100), ul4c.OutputLimitError, "<?print i?>"),
+	("<?def f(n)?><?return f(n+1)?><?end def?><?print f(0)?>", dict(maxdepth=50), ul4c.DepthLimitError, "f(n+1)"),
+	("<?code x = [i for i in range(30000000)]?>", dict(maxsteps=1000), ul4c.StepLimitError, "[i for i in range(30000000)]"),
+	("<?code x = [i for i in range(30000000)]?>", dict(timeout=0.1), ul4c.TimeLimitError, "[i for i in range(30000000)]"),
+	("<?code x = {i for i in range(30000000)}?>", dict(maxsteps=1000), ul4c.StepLimitError, "{i for i in range(30000000)}"),
+	("<?code x = {i: i for i in range(30000000)}?>", dict(maxsteps=1000), ul4c.StepLimitError, "{i: i for i in range(30000000)}"),
+	("<?print sum(i for i in range(30000000))?>", dict(maxsteps=1000), ul4c.StepLimitError, "i for i in range(30000000)"),
+	("<?def f?><?for i in range(100000)?><?print i?><?end for?><?end def?><?code s = f.renders()?>", dict(maxoutput=100), ul4c.OutputLimitError, "<?print i?>"),
+])
+def test_limits(backend, source, limits, exception, location):
+	t = ul4c.Template(source, "t", backend=backend)
+	with pytest.raises(exception) as excinfo:
+		t.ul4_render(ul4c.Context(None, io.StringIO(), **limits))
+	assert isinstance(excinfo.value, ul4c.LimitError)
+	assert location == excinfo.value.__cause__.location.startsource
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_limits_renders(backend):
+	# Output into a string counts too
+	t = ul4c.Template("<?for i in range(100000)?>x<?end for?>", "t", backend=backend)
+	with pytest.raises(ul4c.OutputLimitError):
+		t.ul4_renders(ul4c.Context(maxoutput=100))
+
+	# Output from the result cache counts too, but output that has been
+	# rendered into the cache is only counted once
+	t = ul4c.Template("<?ul4 t(n)?><?for i in range(n)?>x<?end for?>", "t", backend=backend)
+	t.memoize()
+	context = ul4c.Context(maxoutput=10)
+	assert "x"*5 == t.ul4_renders(context, 5)
+	assert "x"*5 == t.ul4_renders(context, 5)
+	with pytest.raises(ul4c.OutputLimitError):
+		t.ul4_renders(context, 5)
+
+
+@pytest.mark.ul4
+@pytest.mark.parametrize("backend", ["ast", "python"])
+def test_limits_not_exceeded(backend):
+	t = ul4c.Template("<?def f(n)?><?return n?><?end def?><?for i in range(10)?><?print f(i)?><?end for?>", "t", backend=backend)
+	stream = io.StringIO()
+	# One render of ``t``, 10 iterations and 10 calls of ``f``
+	context = ul4c.Context(None, stream, maxsteps=21, maxoutput=10, maxdepth=2, timeout=60)
+	t.ul4_render(context)
+	assert "0123456789" == stream.getvalue()
+	assert 21 == context.steps
+	assert 0 == context.depth
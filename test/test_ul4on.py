@@ -10,7 +10,7 @@
 ## See ll/xist/__init__.py for the license
 
 
-import sys, os, json, datetime, math, tempfile, subprocess, re, textwrap, pathlib
+import sys, os, io, json, datetime, math, collections, contextlib, tempfile, subprocess, re, textwrap, pathlib, tracemalloc
 
 import pytest
 
@@ -169,6 +169,31 @@ def transport_python_pretty(obj, registry=None):
 	return _transport_python(obj, indent="\t", registry=registry)
 
 
+def transport_python_binary(obj, registry=None):
+	return ul4on.loadb(ul4on.dumpb(obj), registry=registry)
+
+
+@contextlib.contextmanager
+def _purepython():
+	# Disable the C implementation from :mod:`ll._ul4on` (if it's available)
+	accelerator = ul4on._ul4on
+	ul4on._ul4on = None
+	try:
+		yield
+	finally:
+		ul4on._ul4on = accelerator
+
+
+def transport_python_pure(obj, registry=None):
+	with _purepython():
+		return transport_python(obj, registry)
+
+
+def transport_python_binary_pure(obj, registry=None):
+	with _purepython():
+		return transport_python_binary(obj, registry)
+
+
 def _transport_js_v8(obj, indent):
 	"""
 	Generate Javascript source that loads the dump done by Python, dumps it
@@ -336,6 +361,9 @@ def transport_java_pretty(obj):
 all_transports = [
 	("python", transport_python),
 	("python_pretty", transport_python_pretty),
+	("python_binary", transport_python_binary),
+	("python_pure", transport_python_pure),
+	("python_binary_pure", transport_python_binary_pure),
 	("js_v8", transport_js_v8),
 	("js_v8_pretty", transport_js_v8_pretty),
 	("js_node", transport_js_node),
@@ -604,6 +632,356 @@ def test_chunked_decoder():
 	assert "hurz" == decoder.loads("^1")
 
 
+def test_binary_roundtrip():
+	obj = [
+		None,
+		True,
+		False,
+		0,
+		-1,
+		42,
+		-2**100,
+		2**100,
+		42.5,
+		-0.0,
+		math.inf,
+		"",
+		"gurk",
+		"\u20ac\U0001f600\ud800",
+		color.Color(0x12, 0x34, 0x56, 0x78),
+		datetime.date(2000, 2, 29),
+		datetime.datetime(2000, 2, 29, 12, 34, 56, 987654),
+		datetime.timedelta(-1, 1, 1),
+		misc.monthdelta(-14),
+		slice(None, 42),
+		{1, "2"},
+		{"foo": [1, {"bar": 2}], 3: None},
+		ul4c.Template("<?for i in range(x)?><?print i?><?end for?>", "t", signature="x"),
+	]
+	obj.append(obj[12])
+
+	binary = ul4on.loadb(ul4on.dumpb(obj))
+	text = ul4on.loads(ul4on.dumps(obj))
+
+	assert binary[:-2] == text[:-2]
+	assert binary[-2].renders(3) == text[-2].renders(3) == "012"
+	assert binary[-1] is binary[12]
+
+
+def test_binary_chunked():
+	encoder = ul4on.Encoder(binary=True)
+	decoder = ul4on.Decoder(binary=True)
+	s1 = "gurk"
+	assert b"S\x04gurk" == encoder.dumps(s1)
+	assert b"^\x00" == encoder.dumps(s1)
+	assert "gurk" == decoder.loads(b"S\x04gurk")
+	assert "gurk" == decoder.loads(b"^\x00")
+
+
+def test_binary_indent():
+	with pytest.raises(ValueError):
+		ul4on.Encoder(indent="\t", binary=True)
+
+
+@pytest.mark.parametrize("bufsize", [1, 2, 3, 7, 64*1024])
+def test_buffered_decoder(bufsize):
+	obj = [
+		None,
+		True,
+		12345678901234567890,
+		-42.5,
+		"",
+		"a\"b'c\\d\ne\u20ac\U0001f600",
+		"x" * 100,
+		{"gurk": ["hurz", "gurk"], "hinz": {"kunz"}},
+		color.Color(0x12, 0x34, 0x56, 0x78),
+		datetime.datetime(2000, 2, 29, 12, 34, 56, 987654),
+	]
+	for binary in (False, True):
+		dump = ul4on.Encoder(indent=None if binary else "\t", binary=binary).dumps(obj)
+		decoder = ul4on.Decoder(binary=binary)
+		decoder.bufsize = bufsize
+		assert obj == decoder.load(io.BytesIO(dump) if binary else io.StringIO(dump))
+
+
+@pytest.mark.parametrize("bufsize", [1, 5, 64*1024])
+def test_buffered_decoder_multiple(bufsize):
+	stream = io.StringIO("i42\nS'gurk'\nL^0 i17 ]\n")
+	decoder = ul4on.Decoder()
+	decoder.bufsize = bufsize
+	assert 42 == decoder.load(stream)
+	assert "gurk" == decoder.load(stream)
+	assert ["gurk", 17] == decoder.load(stream)
+	with pytest.raises(EOFError):
+		decoder.load(stream)
+
+
+def test_buffered_load_position(tmp_path):
+	# :func:`ul4on.load` leaves seekable streams positioned directly after the object
+	stream = io.StringIO("i1 L i2 ] rest")
+	assert 1 == ul4on.load(stream)
+	assert [2] == ul4on.load(stream)
+	assert " rest" == stream.read()
+
+	path = tmp_path / "dump.ul4on"
+	t = ul4c.Template("<?print x?>€", "t")
+	path.write_text(f"S'{'€'*100}' {t.dumps()} i42 rest", encoding="utf-8")
+	with path.open("r", encoding="utf-8") as f:
+		assert "€"*100 == ul4on.load(f)
+		assert "42€" == ul4c.Template.load(f).renders(x=42)
+		assert 42 == ul4on.load(f)
+		assert " rest" == f.read()
+
+
+def test_buffered_decoder_eof():
+	with pytest.raises(EOFError):
+		ul4on.loads("L i42 s'gurk")
+	with pytest.raises(EOFError):
+		ul4on.loadb(b"S\x04gu")
+
+
+def test_encoder_subclasses():
+	class MyList(list):
+		pass
+
+	class MyMapping(collections.abc.Mapping):
+		def __init__(self, **kwargs):
+			self._data = kwargs
+
+		def __getitem__(self, key):
+			return self._data[key]
+
+		def __iter__(self):
+			return iter(self._data)
+
+		def __len__(self):
+			return len(self._data)
+
+	assert "L i1 ]" == ul4on.dumps(MyList([1]))
+	assert "bT" == ul4on.dumps(True)
+	assert "E S'x' i1 }" == ul4on.dumps(collections.OrderedDict(x=1))
+	assert "D S'x' i1 }" == ul4on.dumps(MyMapping(x=1))
+
+
+def test_register_encoder():
+	class MyList(list):
+		pass
+
+	class Point:
+		def __init__(self, x, y):
+			self.x = x
+			self.y = y
+
+	class MyPoint(Point):
+		pass
+
+	try:
+		ul4on.register_encoder(MyList, set)
+		ul4on.register_encoder(Point, lambda encoder, obj: encoder.dump([obj.x, obj.y]))
+		assert "Y i1 }" == ul4on.dumps(MyList([1]))
+		assert "L i1 i2 ]" == ul4on.dumps(Point(1, 2))
+		assert "L i1 i2 ]" == ul4on.dumps(MyPoint(1, 2))
+		assert [1, 2] == ul4on.loadb(ul4on.dumpb(Point(1, 2)))
+	finally:
+		del ul4on._encoders[MyList]
+		del ul4on._encoders[Point]
+		ul4on._encodercache.clear()
+	assert "L i1 ]" == ul4on.dumps(MyList([1]))
+
+
+def test_iterevents():
+	data = {"meta": {"tags": {"a"}}, "records": [{"id": 1, "name": "foo"}, {"id": 2, "name": "foo"}], "end": None}
+	data["again"] = data["records"]
+	expected = [
+		("startdict", None),
+		("key", "meta"),
+		("startdict", None),
+		("key", "tags"),
+		("startset", None),
+		("value", "a"),
+		("endset", None),
+		("enddict", None),
+		("key", "records"),
+		("startlist", None),
+		("startdict", None),
+		("key", "id"),
+		("value", 1),
+		("key", "name"),
+		("value", "foo"),
+		("enddict", None),
+		("startdict", None),
+		("key", "id"),
+		("value", 2),
+		("key", "name"),
+		("value", "foo"),
+		("enddict", None),
+		("endlist", None),
+		("key", "end"),
+		("value", None),
+		("key", "again"),
+		("backref", 7),
+		("enddict", None),
+	]
+	assert expected == list(ul4on.iterevents(io.StringIO(ul4on.dumps(data))))
+	assert expected == list(ul4on.Decoder(binary=True).iterevents(io.BytesIO(ul4on.dumpb(data))))
+
+
+def _dumpstream(obj, binary):
+	return io.BytesIO(ul4on.dumpb(obj)) if binary else io.StringIO(ul4on.dumps(obj))
+
+
+def test_iterload_items():
+	class Point:
+		ul4onname = "de.livinglogic.ul4.test.point"
+
+		def __init__(self, id=None, x=None, y=None):
+			self.ul4onid = id
+			self.x = x
+			self.y = y
+
+		def ul4ondump(self, encoder):
+			encoder.dump(self.x)
+			encoder.dump(self.y)
+
+		def ul4onload(self, decoder):
+			self.x = decoder.load()
+			self.y = decoder.load()
+
+	registry = {Point.ul4onname: Point}
+
+	p = Point("p", 17, 23)
+	data = {"skip": [{"x": [1, 2]}], "data": [{"records": [[p, "foo"], [p, "foo"], [Point(None, 1, 2)]]}]}
+	stream = io.StringIO(ul4on.dumps(data) + " i42")
+	decoder = ul4on.Decoder(registry)
+
+	items = list(decoder.iterload_items(stream, ["data", 0, "records"]))
+	assert 3 == len(items)
+	assert items[0][0] is items[1][0]
+	assert (17, 23) == (items[0][0].x, items[0][0].y)
+	assert "foo" == items[1][1]
+	assert (1, 2) == (items[2][0].x, items[2][0].y)
+	# The containers from the items are not kept in the backreference table
+	assert not any(isinstance(obj, (list, dict, set)) for obj in decoder._objects)
+	# The rest of the dump has been skipped
+	assert 42 == decoder.load(stream)
+
+	assert [1, 2] == list(ul4on.iterload_items(io.StringIO(ul4on.dumps([1, 2]))))
+
+	with pytest.raises(KeyError):
+		list(ul4on.iterload_items(io.StringIO(ul4on.dumps(data)), ["nope"], registry))
+
+	with pytest.raises(TypeError):
+		list(ul4on.iterload_items(io.StringIO(ul4on.dumps(data)), ["data", 0, "records", 0, 0, "x"], registry))
+
+	# Backreferences to containers from previous items and from skipped parts
+	# only work with ``keepbackrefs=True``
+	item = [1]
+	with pytest.raises(ValueError):
+		list(ul4on.iterload_items(io.StringIO(ul4on.dumps([item, item]))))
+	l = [1, 2]
+	with pytest.raises(ValueError):
+		list(ul4on.iterload_items(io.StringIO(ul4on.dumps({"a": l, "records": [l]})), ["records"]))
+
+	for binary in (False, True):
+		items = list(ul4on.Decoder(binary=binary).iterload_items(_dumpstream([item, item], binary), keepbackrefs=True))
+		assert [[1], [1]] == items
+		assert items[0] is items[1]
+
+		s = {3}
+		data = {"a": l, "b": {"s": s}, "records": [{"l": l, "s": s}, {"l": l, "s": s}]}
+		items = list(ul4on.Decoder(binary=binary).iterload_items(_dumpstream(data, binary), ["records"], keepbackrefs=True))
+		assert data["records"] == items
+		assert items[0]["l"] is items[1]["l"]
+		assert items[0]["s"] is items[1]["s"]
+
+	# Backreferences to the containers on the path never work
+	data = {"records": []}
+	data["records"].append(data)
+	with pytest.raises(ValueError):
+		list(ul4on.iterload_items(io.StringIO(ul4on.dumps(data)), ["records"], keepbackrefs=True))
+
+
+def test_iterload_items_memory():
+	# Memory usage doesn't depend on the size of the dump (unless ``keepbackrefs`` is true)
+	data = {
+		"skip": [{"id": i, "values": [i, -i]} for i in range(50000)],
+		"records": [{"id": i, "values": [i, -i]} for i in range(50000)],
+	}
+	dump = ul4on.dumps(data)
+
+	def peak(f):
+		stream = io.StringIO(dump)
+		tracemalloc.start()
+		try:
+			f(stream)
+			return tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+
+	def iterate(stream, **kwargs):
+		for item in ul4on.iterload_items(stream, ["records"], **kwargs):
+			pass
+
+	loadpeak = peak(ul4on.load)
+	assert peak(iterate) < loadpeak / 10
+	assert peak(lambda stream: iterate(stream, keepbackrefs=True)) > loadpeak / 10
+
+
+@pytest.mark.skipif(ul4on._ul4on is None, reason="ll._ul4on not available")
+def test_accelerator():
+	class Point:
+		ul4onname = "de.livinglogic.ul4.test.point"
+
+		def __init__(self, x=None, y=None):
+			self.x = x
+			self.y = y
+
+		def ul4ondump(self, encoder):
+			encoder.dump(self.x)
+			encoder.dump(self.y)
+
+		def ul4onload(self, decoder):
+			self.x = decoder.load()
+			self.y = decoder.load()
+
+	s = "a'b\"c\\d\n\u20ac\U0001f600\ud800<"
+	p = Point([s, 2**100], {1.5: -2**63})
+	obj = [None, True, False, 42, -42, 2**64, -0.0, math.inf, s, s, p, p, [{"x": {1}}], datetime.date(2000, 2, 29)]
+	registry = {Point.ul4onname: Point}
+	for binary in (False, True):
+		encoder = ul4on.Encoder(binary=binary)
+		dump = encoder.dumps(obj)
+		with _purepython():
+			assert dump == ul4on.Encoder(binary=binary).dumps(obj)
+		for bufsize in (1, 64*1024):
+			decoder = ul4on.Decoder(registry, binary=binary)
+			decoder.bufsize = bufsize
+			result = decoder.load(io.BytesIO(dump) if binary else io.StringIO(dump))
+			assert result[10] is result[11]
+			assert (result[10].x, result[10].y) == (p.x, p.y)
+			assert repr(result[:10] + result[12:]) == repr(obj[:10] + obj[12:])
+
+
+@pytest.mark.parametrize("pure", [False, True])
+def test_dump_exception(pure):
+	# Exceptions during dumping must propagate unchanged (even when output is buffered)
+	class D(dict):
+		def items(self):
+			raise ValueError("broken")
+
+	obj = []
+	for i in range(1000):
+		obj = [obj]
+
+	with contextlib.ExitStack() as stack:
+		if pure:
+			stack.enter_context(_purepython())
+		with pytest.raises(RecursionError):
+			ul4on.dumps(obj)
+		with pytest.raises(ValueError):
+			ul4on.dumps(["x", D(a=1)])
+
+
 def test_incremental_without_id():
 	class Point:
 		ul4onname = "de.livinglogic.ul4.test.point"
@@ -723,6 +1101,246 @@ def test_incremental_with_id():
 	assert p3.y == 25
 
 
+def _persistent_dump(*ids):
+	return "L " + " ".join(f"P S'de.livinglogic.ul4.test.persistent' S'{id}' )" for id in ids) + " ]"
+
+
+class Persistent:
+	ul4onname = "de.livinglogic.ul4.test.persistent"
+
+	def __init__(self, id=None):
+		self.ul4onid = id
+
+	def ul4onload(self, decoder):
+		pass
+
+
+def test_persistent_cache_dict():
+	decoder = ul4on.Decoder({Persistent.ul4onname: Persistent})
+	(a, b) = decoder.loads(_persistent_dump("a", "b"))
+	decoder.reset()
+	(a2, c) = decoder.loads(_persistent_dump("a", "c"))
+	assert a is a2
+	assert (1, 3, 0) == (decoder.hits, decoder.misses, decoder.evictions)
+	assert 3 == len(list(decoder.persistent_objects()))
+
+
+def test_persistent_cache_weak():
+	decoder = ul4on.Decoder({Persistent.ul4onname: Persistent}, cache="weak")
+	(a, b) = decoder.loads(_persistent_dump("a", "b"))
+	decoder.reset() # Drop the backreferences
+	del b
+	assert (0, 2, 1) == (decoder.hits, decoder.misses, decoder.evictions)
+	assert decoder.persistent_object(Persistent.ul4onname, "a") is a
+	assert decoder.persistent_object(Persistent.ul4onname, "b") is None
+
+	(a2, b2) = decoder.loads(_persistent_dump("a", "b"))
+	assert a is a2
+	assert (1, 3, 1) == (decoder.hits, decoder.misses, decoder.evictions)
+
+	decoder.forget_persistent_object(a)
+	assert 1 == decoder.evictions
+
+
+def test_persistent_cache_lru():
+	decoder = ul4on.Decoder({Persistent.ul4onname: Persistent}, cache="lru", maxsize=2)
+	(a, b) = decoder.loads(_persistent_dump("a", "b"))
+	decoder.reset()
+	(a2,) = decoder.loads(_persistent_dump("a")) # "a" is now the most recently used object
+	decoder.reset()
+	(c,) = decoder.loads(_persistent_dump("c")) # evicts "b"
+	assert a is a2
+	assert (1, 3, 1) == (decoder.hits, decoder.misses, decoder.evictions)
+	assert decoder.persistent_object(Persistent.ul4onname, "b") is None
+	assert {a, c} == set(decoder.persistent_objects())
+
+	decoder.reset()
+	(b2,) = decoder.loads(_persistent_dump("b")) # "b" is a new object, evicts "a"
+	assert b is not b2
+	assert {b2, c} == set(decoder.persistent_objects())
+	assert (1, 4, 2) == (decoder.hits, decoder.misses, decoder.evictions)
+
+
+def test_persistent_cache_unknown():
+	with pytest.raises(ValueError):
+		ul4on.Decoder(cache="gurk")
+	with pytest.raises(ValueError):
+		ul4on.Decoder(cache="lru")
+	with pytest.raises(ValueError):
+		ul4on.Decoder(cache="weak", maxsize=10)
+
+
+def _encoder_dumps(obj, **kwargs):
+	# Check that the C accelerator and the Python implementation produce the same dump
+	dump = ul4on.Encoder(**kwargs).dumps(obj)
+	with _purepython():
+		assert dump == ul4on.Encoder(**kwargs).dumps(obj)
+	return dump
+
+
+def test_encoder_dedupstrings():
+	obj = ["".join(["gu", "rk"]), "".join(["gur", "k"]), "hurz"]
+	assert obj[0] is not obj[1]
+
+	assert "L S'gurk' S'gurk' S'hurz' ]" == _encoder_dumps(obj)
+	assert "L S'gurk' ^1 S'hurz' ]" == _encoder_dumps(obj, dedupstrings=True)
+	for binary in (False, True):
+		assert obj == ul4on.Decoder(binary=binary).loads(_encoder_dumps(obj, binary=binary, dedupstrings=True))
+
+
+def test_encoder_scalarbackrefs():
+	d = datetime.date(2000, 2, 29)
+	l = [1]
+	obj = ["gurk", "gurk", d, d, l, l]
+
+	assert "L S'gurk' ^1 X i2000 i2 i29 ^2 L i1 ] ^3 ]" == _encoder_dumps(obj)
+	assert "L s'gurk' s'gurk' x i2000 i2 i29 x i2000 i2 i29 L i1 ] ^1 ]" == _encoder_dumps(obj, scalarbackrefs=False)
+	for binary in (False, True):
+		result = ul4on.Decoder(binary=binary).loads(_encoder_dumps(obj, binary=binary, scalarbackrefs=False))
+		assert obj == result
+		assert result[4] is result[5]
+
+
+def test_encoder_maxbackrefs():
+	l = [1]
+	obj = [l, l, "gurk", "gurk"]
+
+	assert "L L i1 ] ^1 s'gurk' s'gurk' ]" == _encoder_dumps(obj, maxbackrefs=2)
+	assert "l l i1 ] l i1 ] s'gurk' s'gurk' ]" == _encoder_dumps(obj, maxbackrefs=0)
+	for binary in (False, True):
+		assert obj == ul4on.Decoder(binary=binary).loads(_encoder_dumps(obj, binary=binary, maxbackrefs=2))
+
+
+def _loadfile_data():
+	class Point:
+		ul4onname = "de.livinglogic.ul4.test.point"
+
+		def __init__(self, x=None, y=None):
+			self.x = x
+			self.y = y
+
+		def ul4ondump(self, encoder):
+			encoder.dump(self.x)
+			encoder.dump(self.y)
+
+		def ul4onload(self, decoder):
+			self.x = decoder.load()
+			self.y = decoder.load()
+
+		def __eq__(self, other):
+			return (self.x, self.y) == (other.x, other.y)
+
+	shared = ["gurk", datetime.date(2000, 2, 29)]
+	s = "\"'\\\n\xe4€\U0001f600"
+	data = {
+		"a": [1, 2.5, s, shared, None, True],
+		"b": {"x": shared, "y": {1, 2}},
+		"c": Point(shared, s),
+		"d": [color.red, datetime.timedelta(1), slice(1, 2), misc.monthdelta(1)],
+		42: s,
+	}
+	return (data, {Point.ul4onname: Point})
+
+
+def _writedump(path, data, binary):
+	dump = ul4on.Encoder(binary=binary).dumps(data)
+	path.write_bytes(dump if binary else dump.encode("utf-8"))
+
+
+def test_loadfile(tmp_path):
+	(data, registry) = _loadfile_data()
+	path = tmp_path / "data.ul4on"
+	for binary in (False, True):
+		_writedump(path, data, binary)
+		result = ul4on.loadfile(path, registry, binary=binary)
+		assert data == result
+		assert result["a"][3] is result["b"]["x"] is result["c"].x
+
+
+def test_loadfile_lazy(tmp_path):
+	(data, registry) = _loadfile_data()
+	path = tmp_path / "data.ul4on"
+	for binary in (False, True):
+		_writedump(path, data, binary)
+		for order in (["a", "b", "c", "d", 42], [42, "d", "c", "b", "a"]):
+			result = ul4on.loadfile(path, registry, binary=binary, lazy=True)
+			assert isinstance(result, ul4on.LazyDict)
+			assert list(data) == list(result)
+			assert 5 == len(result)
+			assert "c" in result
+			assert "e" not in result
+			with pytest.raises(KeyError):
+				result["e"]
+			for key in order:
+				assert data[key] == result[key]
+			assert result["a"][3] is result["b"]["x"] is result["c"].x
+			assert data == dict(result)
+
+
+def test_loadfile_lazy_backreference(tmp_path):
+	path = tmp_path / "data.ul4on"
+	# ``"b"`` references objects from the value of ``"a"``, so accessing
+	# ``"b"`` loads ``"a"`` too
+	path.write_text("D S'a' L S'gurk' L i42 ] ] S'b' L ^3 ^4 ^2 ] }", encoding="utf-8")
+	result = ul4on.loadfile(path, lazy=True)
+	b = result["b"]
+	assert ["gurk", [42], ["gurk", [42]]] == b
+	assert b[1] is result["a"][1]
+	assert b[2] is result["a"]
+
+
+def test_loadfile_lazy_nodict(tmp_path):
+	path = tmp_path / "data.ul4on"
+	path.write_text("L i42 ]", encoding="utf-8")
+	assert [42] == ul4on.loadfile(path, lazy=True)
+
+
+def test_loadlazy():
+	class Box:
+		ul4onname = "de.livinglogic.ul4.test.box"
+
+		def ul4ondump(self, encoder):
+			encoder.dump(self.value)
+
+		def ul4onload(self, decoder):
+			self.value = decoder.loadlazy() if decoder.lazy else decoder.load()
+
+	box = Box()
+	box.value = ["gurk", [42]]
+	dump = ul4on.dumps([box, box.value[1]])
+	registry = {Box.ul4onname: Box}
+	for stream in (False, True):
+		decoder = ul4on.Decoder(registry=registry, lazy=True)
+		(result, inner) = decoder.load(io.StringIO(dump)) if stream else decoder.loads(dump)
+		# The backreference to the inner list forced loading the value
+		assert result.value.load() == ["gurk", [42]]
+		assert result.value.load()[1] is inner
+
+	dump = ul4on.dumps([box, "hurz"])
+	(result, s) = ul4on.Decoder(registry=registry, lazy=True).loads(dump)
+	assert "hurz" == s
+	assert "unloaded" in repr(result.value)
+	assert ["gurk", [42]] == result.value.load()
+	assert "unloaded" not in repr(result.value)
+
+
+def test_loadfile_errors(tmp_path):
+	path = tmp_path / "data.ul4on"
+	path.write_bytes(b"")
+	with pytest.raises(EOFError):
+		ul4on.loadfile(path)
+	path.write_text("D S'x' L i42 ]", encoding="utf-8")
+	with pytest.raises(EOFError):
+		ul4on.loadfile(path, lazy=True)
+
+
+def test_encoder_options_invalid():
+	with pytest.raises(ValueError):
+		ul4on.Encoder(dedupstrings=True, scalarbackrefs=False)
+	with pytest.raises(ValueError):
+		ul4on.Encoder(maxbackrefs=-1)
+
+
 @pytest.mark.db
 def test_oracle_none(oracle):
 	if oracle:
@@ -17,7 +17,7 @@ from xml.parsers import expat
 import pytest
 
 from ll import url
-from ll.xist import xsc, css, present, sims, xnd, xfind
+from ll.xist import xsc, css, present, sims, xnd, xfind, parse
 from ll.xist.ns import wml, html, chars, abbr, specials, htmlspecials, meta, form, php, xml, tld, docbook
 
 import xist_common as common
@@ -949,3 +949,65 @@ def test_plainprocinst_mapped():
 def test_clone_plain_attributes():
 	node = html.p({"data-id": 42})
 	assert node.clone().string() == '<p data-id="42"></p>'
+
+
+def test_lazy_content_and_attrs():
+	node = html.br()
+	assert node._content is None
+	assert node._attrs is None
+	assert len(node) == 0
+	assert list(node.walknodes(xsc.Node, enterattrs=True)) == [node]
+	assert node.clone()._content is None
+	assert node.bytes() == b"<br />"
+	assert node._content is None
+	assert node._attrs is None
+
+	content = node.content
+	assert isinstance(content, xsc.Frag)
+	assert node.content is content
+	attrs = node.attrs
+	assert isinstance(attrs, html.br.Attrs)
+	assert node.attrs is attrs
+
+	node = html.p()
+	node.append("foo")
+	node.attrs.class_ = "bar"
+	assert node.bytes() == b'<p class="bar">foo</p>'
+
+	# Default attributes are always created
+	class foo(xsc.Element):
+		xmlns = None
+		class Attrs(xsc.Element.Attrs):
+			class bar(xsc.TextAttr):
+				default = "baz"
+
+	assert str(foo().attrs.bar) == "baz"
+
+
+def test_slots():
+	node = html.p(html.b("foo"), "bar")
+	assert not hasattr(node, "__dict__") or not node.__dict__
+	assert node.startloc is None
+	assert node.endloc is None
+	assert node[1].startloc is None
+
+	# Arbitrary attributes are still supported
+	node.foo = 42
+	assert node.foo == 42
+	node[1].foo = 17
+	assert node[1].foo == 17
+
+
+def test_location():
+	node = parse.tree(b"<p>foo<b>bar</b></p>", parse.Expat(), parse.NS(html), parse.Node(), validate=False)[0]
+	assert (node.startloc.line, node.startloc.col) == (0, 0)
+	assert (node.endloc.line, node.endloc.col) == (0, 16)
+	assert (node[1].startloc.line, node[1].startloc.col) == (0, 6)
+	assert (node[1].endloc.line, node[1].endloc.col) == (0, 12)
+	assert node[0].startloc is not None
+	assert node[0].endloc is None
+	assert node.clone().startloc is node.startloc
+
+	node = parse.tree(b"<p>foo<b>bar</b></p>", parse.Expat(), parse.NS(html), parse.Node(loc=False), validate=False)[0]
+	assert node.startloc is None
+	assert node[0].startloc is None
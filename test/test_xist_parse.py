@@ -463,3 +463,44 @@ def test_plain_procinst():
 
 	assert len(ws) == 2
 	assert all(issubclass(w.category, xsc.UndeclaredNodeWarning) for w in ws)
+
+
+def test_publish():
+	source = b"<html xmlns='http://www.w3.org/1999/xhtml'><head><script>a&lt;b</script></head><body><p class='x'>a&lt;b<br/>\xc3\xa4<img src='foo.png'/></p><!--c--><p></p>&amp;</body></html>"
+
+	def pipeline(**kwargs):
+		return (source, parse.Expat(ns=True), parse.Node(pool=xsc.Pool(html)), parse.Publish(**kwargs))
+
+	for kwargs in ({}, dict(prefixes={html: None}), dict(prefixes={html: "h"}, xhtml=2), dict(encoding="ascii", xhtml=0), dict(base="root:foo/"), dict(prefixdefault=True)):
+		stream = io.BytesIO()
+		parse.write(stream, *pipeline(**kwargs))
+		assert stream.getvalue() == parse.tree(*pipeline()[:-1]).bytes(**kwargs)
+		assert all(evtype == "bytes" for (evtype, data) in parse.events(*pipeline(**kwargs)))
+
+
+def test_publish_convert():
+	source = b"<html xmlns='http://www.w3.org/1999/xhtml'><body><p>foo</p><div><p>bar<b>baz</b></p></div><hr/></body></html>"
+
+	def publish(**kwargs):
+		stream = io.BytesIO()
+		parse.write(stream, source, parse.Expat(ns=True), parse.Node(pool=xsc.Pool(html)), parse.Publish(**kwargs))
+		return stream.getvalue()
+
+	assert publish(selector=html.p, convert=lambda node: html.h1(node.content)) == b"<html><body><h1>foo</h1><div><h1>bar<b>baz</b></h1></div><hr /></body></html>"
+	assert publish(selector=html.div/html.p, convert=lambda node: None) == b"<html><body><p>foo</p><div></div><hr /></body></html>"
+	assert publish(selector=xsc.Text, convert=lambda node: node.content.upper()) == b"<html><body><p>FOO</p><div><p>BAR<b>BAZ</b></p></div><hr /></body></html>"
+	assert publish(selector=html.hr, convert=lambda node: (node, node)) == b"<html><body><p>foo</p><div><p>bar<b>baz</b></p></div><hr /><hr /></body></html>"
+
+
+def test_publish_xmlns():
+	source = b"<html xmlns='http://www.w3.org/1999/xhtml'><body><p>foo<a xmlns='http://www.example.com/foo' id='a'/></p><p><a xmlns='http://www.example.com/foo' xmlns:xl='http://www.w3.org/1999/xlink' xl:title='t'>bar</a></p></body></html>"
+
+	def pipeline(**kwargs):
+		return (source, parse.Expat(ns=True), parse.Node(pool=xsc.Pool(html, xlink, a)), parse.Publish(**kwargs))
+
+	stream = io.BytesIO()
+	parse.write(stream, *pipeline(prefixes={html: None, a: "foo"}))
+	output = stream.getvalue()
+	# The namespaces are declared by the outermost element that needs them
+	assert output == b"<html xmlns=\"http://www.w3.org/1999/xhtml\"><body><p>foo<foo:a xmlns:foo=\"http://www.example.com/foo\" id=\"a\"></foo:a></p><p><foo:a xmlns:foo=\"http://www.example.com/foo\" xmlns:ns=\"http://www.w3.org/1999/xlink\" ns:title=\"t\">bar</foo:a></p></body></html>"
+	assert parse.tree(output, parse.Expat(ns=True), parse.Node(pool=xsc.Pool(html, xlink, a))) == parse.tree(*pipeline()[:-1])
@@ -10,7 +10,7 @@
 ## See ll/xist/__init__.py for the license
 
 
-from ll.xist import xsc, parse
+from ll.xist import xsc, parse, sims
 from ll.xist.ns import html, xml, php, abbr, xlink, specials, struts_html
 
 import pytest
@@ -213,3 +213,163 @@ def test_script():
 	node2 = html.script("</script>")
 	assert node2.string() == "<script>\\u003c/script></script>"
 	assert node2.string(xhtml=2) == "<script>&lt;/script&gt;</script>"
+
+
+class slowpublish(xsc.Element):
+	# Forces publishing of the content via the :meth:`publish` methods of all nodes
+	xmlns = None
+
+	def publish(self, publisher):
+		yield from self.content.publish(publisher)
+
+
+@pytest.mark.parametrize("xhtml", [0, 1, 2])
+@pytest.mark.parametrize("encoding", [None, "ascii", "iso-8859-1", "utf-16"])
+@pytest.mark.parametrize("base", [None, "http://www.example.org/"])
+def test_publishfast(xhtml, encoding, base):
+	node = xsc.Frag(
+		xml.XML(),
+		html.DocTypeXHTML11(),
+		"\n",
+		html.html(
+			html.head(
+				html.meta(charset="utf-8"),
+				html.title("<foo> & €\U0001f600"),
+				html.script("a < b"),
+			),
+			html.body(
+				xsc.Comment("comment"),
+				html.p("foo", html.br(), "bar", html.img(src="http://www.example.org/foo.png", alt='"€"'), class_="€", id="p1"),
+				html.input(disabled=True, value="42"),
+				html.div(),
+				html.a("link", href=["http://www.example.org/", abbr.xml()], title=["foo", "bar"]),
+				html.span(style="background: url(http://www.example.org/index.html)"),
+				php.php("echo 42;"),
+				xsc.Frag(html.ul(html.li(i) for i in range(3000))),
+				abbr.xml(),
+			),
+			xml.Attrs(lang="de"),
+		),
+	)
+	assert node.bytes(xhtml=xhtml, encoding=encoding, base=base) == slowpublish(node).bytes(xhtml=xhtml, encoding=encoding, base=base)
+
+
+def test_publishfast_prefixes():
+	node = html.div(html.p("foo", xml.Attrs(lang="en")), xsc.Comment("bar"))
+	for prefixes in ({html: False}, {html: None}, {html: "h"}, {html: True}):
+		assert node.bytes(prefixes=prefixes) == slowpublish(node).bytes(prefixes=prefixes)
+
+
+def test_publishfast_strictmarkup():
+	# Text uses character references for unencodable characters, but markup doesn't
+	node = html.div("€", xsc.Comment("€"))
+	with pytest.raises(UnicodeEncodeError):
+		node.bytes(encoding="ascii")
+	assert html.div("€").bytes(encoding="ascii") == b"<div>&#8364;</div>"
+
+
+def test_publishfast_chunks(monkeypatch):
+	monkeypatch.setattr(xsc.Publisher, "chunksize", 10)
+	node = html.ul(html.li(i) for i in range(100))
+	parts = list(node.iterbytes())
+	assert len(parts) > 1
+	assert b"".join(parts) == slowpublish(node).bytes()
+
+
+def test_publishtagcache():
+	node = html.div(html.br(), html.input(disabled=True))
+	assert node.bytes(xhtml=0) == b'<div><br><input disabled></div>'
+	assert node.bytes(xhtml=1) == b'<div><br /><input disabled="disabled" /></div>'
+	assert node.bytes(xhtml=2) == b'<div><br/><input disabled="disabled"/></div>'
+	assert node.bytes(prefixes={html: "h"}) == b'<h:div xmlns:h="http://www.w3.org/1999/xhtml"><h:br /><h:input disabled="disabled" /></h:div>'
+
+	class foo(xsc.Element):
+		xmlns = None
+
+	assert foo().bytes() == b"<foo></foo>"
+	foo.model = sims.Empty()
+	assert foo().bytes() == b"<foo />"
+	foo.xmlname = "bar"
+	assert foo().bytes() == b"<bar />"
+
+	# Subclasses that inherit the changed attribute don't keep outdated tags
+	class base(xsc.Element):
+		xmlns = None
+
+	class sub(base):
+		pass
+
+	class subsub(sub):
+		pass
+
+	node = xsc.Frag(sub(), subsub())
+	assert node.bytes() == b"<sub></sub><subsub></subsub>"
+	base.model = sims.Empty()
+	assert node.bytes() == b"<sub /><subsub />"
+	del base.model
+	assert node.bytes() == b"<sub></sub><subsub></subsub>"
+
+
+def test_publishlazyxmlns():
+	# The namespaces are declared on the outermost element that uses them
+	node = html.div(html.p(xlink.Attrs(title="foo")), html.p(html.span(xlink.Attrs(title="bar"))))
+	assert node.bytes(prefixes={html: None, xlink: "xl"}, lazyxmlns=True) == b'<div xmlns="http://www.w3.org/1999/xhtml"><p xmlns:xl="http://www.w3.org/1999/xlink" xl:title="foo"></p><p><span xmlns:xl="http://www.w3.org/1999/xlink" xl:title="bar"></span></p></div>'
+	assert node.bytes(prefixes={html: None, xlink: "xl"}, lazyxmlns=True) == slowpublish(node).bytes(prefixes={html: None, xlink: "xl"}, lazyxmlns=True)
+
+	# Without namespaces the result is the same
+	node = html.div(html.p("foo", xml.Attrs(lang="en")), xsc.Comment("bar"))
+	assert node.bytes(lazyxmlns=True) == node.bytes()
+	assert node.bytes(prefixes={html: "h"}, lazyxmlns=True) == node.bytes(prefixes={html: "h"})
+
+	# Multiple roots get their own namespace declarations
+	node = xsc.Frag(html.p(), html.p())
+	with pytest.raises(xsc.MultipleRootsError):
+		node.bytes(prefixes={html: None})
+	assert node.bytes(prefixes={html: None}, lazyxmlns=True) == b'<p xmlns="http://www.w3.org/1999/xhtml"></p><p xmlns="http://www.w3.org/1999/xhtml"></p>'
+
+	# Forced and hidden namespaces
+	node = html.div(html.p())
+	assert node.bytes(prefixes={html: "h", specials: "s"}, showxmlns=[specials], lazyxmlns=True) == f'<h:div xmlns:h="{html.xmlns}" xmlns:s="{specials.xmlns}"><h:p></h:p></h:div>'.encode("ascii")
+	assert node.bytes(prefixes={html: "h"}, hidexmlns=[html], lazyxmlns=True) == b"<h:div><h:p></h:p></h:div>"
+
+
+def test_publishlazyxmlns_custompublish():
+	# Elements with their own :meth:`publish` method get their namespaces declared too
+	class foo(xsc.Element):
+		xmlns = "urn:foo"
+
+		def publish(self, publisher):
+			yield publisher.encode(f"<{self._publishname(publisher)}/>")
+
+	class bar(xsc.Element):
+		xmlns = "urn:foo"
+
+		def publish(self, publisher):
+			yield from super().publish(publisher)
+
+	node = html.div(foo())
+	assert node.bytes(prefixes={"urn:foo": "f"}, lazyxmlns=True) == b'<div xmlns:f="urn:foo"><f:foo/></div>'
+	assert node.bytes(prefixes={"urn:foo": "f"}, lazyxmlns=True) == node.bytes(prefixes={"urn:foo": "f"})
+
+	node = html.div(xsc.Frag(bar(foo())), html.p(foo()))
+	assert node.bytes(prefixes={"urn:foo": "f"}, lazyxmlns=True) == b'<div xmlns:f="urn:foo"><f:bar><f:foo/></f:bar><p><f:foo/></p></div>'
+
+	node = bar(foo())
+	assert node.bytes(prefixes={"urn:foo": "f"}, lazyxmlns=True) == b'<f:bar xmlns:f="urn:foo"><f:foo/></f:bar>'
+
+
+def test_publishlazyxmlns_prefixchange():
+	# A global attribute from a namespace that uses unprefixed element names requires a prefix
+	class foo(xsc.Element):
+		xmlns = "http://www.example.org/foo"
+
+	class Attrs(xsc.Attrs):
+		xmlns = "http://www.example.org/foo"
+
+		class bar(xsc.TextAttr):
+			xmlns = "http://www.example.org/foo"
+
+	node = foo(foo(Attrs(bar="baz"), foo()), foo())
+	expected = b'<foo xmlns="http://www.example.org/foo"><ns:foo xmlns:ns="http://www.example.org/foo" ns:bar="baz"><ns:foo></ns:foo></ns:foo><ns:foo xmlns:ns="http://www.example.org/foo"></ns:foo></foo>'
+	assert node.bytes(prefixdefault=None, lazyxmlns=True) == expected
+	assert slowpublish(node).bytes(prefixdefault=None, lazyxmlns=True) == expected